@@ -1,13 +1,10 @@
 import pyttsx3
-import speech_recognition as sr
 import datetime
-import wikipedia
 import webbrowser
 import os
 import pywhatkit
 import random
 import getpass
-import requests
 import pyautogui
 import psutil
 import time
@@ -18,15 +15,26 @@ import win32gui
 import win32con
 import win32process
 import pygetwindow as gw
-import queue
 from win10toast_click import ToastNotifier
 from pywinauto import Application
 from ctypes import cast, POINTER
+import comtypes
 from comtypes import CLSCTX_ALL
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume
 import threading
-import json
 from pathlib import Path
+from app_index import AppIndex, AppRoot
+from http_client import FixtureTransport, HttpClient, TTLCache
+from intent_router import route, UNKNOWN_INTENT
+from learned_responses import LearnedResponseIndex, migrate_learned_responses
+from memory_store import MemoryManager, apply_change, make_backend
+from reminders import Reminders, describe_delay, parse_duration, parse_reminder
+from scheduler import Scheduler, SKIP
+from shared_state import SharedState
+from process_snapshot import ProcessSnapshotService, WIN32_AVAILABLE
+from speech_input import ASRError, MicrophoneSource, ReplaySource, make_engine
+from ui_scanner import ElementScanner, UIAProvider
+from speech_output import PhraseCache, SpeechWorker, URGENT, NORMAL, make_sink, split_sentences
 
 
 def log_command(speaker, text):
@@ -37,20 +45,45 @@ def log_command(speaker, text):
 
 toaster = ToastNotifier()
 
-command_queue = queue.Queue()
+# Set SIDD_DEBUG=1 for extra diagnostics on stdout (the frontend logs stdout as-is)
+DEBUG = os.environ.get("SIDD_DEBUG") == "1"
+
+# ========== SPEECH INPUT ==========
+# ASR_ENGINE: "google" (online) or "vosk" (offline, CPU-only; needs VOSK_MODEL_PATH)
+ASR_ENGINE = "google"
+VOSK_MODEL_PATH = "vosk-model-small-en-in"
+# Set SIDD_REPLAY_DIR to a folder of WAV files to run without a microphone
+REPLAY_DIR = os.environ.get("SIDD_REPLAY_DIR")
+
+speech_source = ReplaySource(REPLAY_DIR) if REPLAY_DIR else MicrophoneSource(device_index=1)
+asr = make_engine(ASR_ENGINE, VOSK_MODEL_PATH)
 
 # ========== PERSISTENT MEMORY ==========
 MEMORY_FILE = Path("sidd_memory.json")
 
-# Default memory structure
+# Bump when the on-disk layout changes; load_memory() migrates older files
+MEMORY_VERSION = 2
+
+# Storage backend: "json" rewrites sidd_memory.json on each save,
+# "journal" appends only the changes and compacts them into a snapshot,
+# "sqlite" keeps memory in sidd_memory.db with full-text search
+MEMORY_BACKEND = "journal"
+
+# Saves are coalesced and written by a background flusher; memory_lock keeps
+# the dict from changing while the flusher serializes it
+memory_lock = threading.RLock()
+memory_manager = MemoryManager(make_backend(MEMORY_BACKEND, MEMORY_FILE), debounce=2.0, lock=memory_lock)
+
 # Default memory structure
 memory = {
+    "version": MEMORY_VERSION,
     "user_profile": {
         "name": None,       # e.g. "Rahul"
         "nickname": None,   # e.g. "Boss"
     },
     "notes": [],             # free-form facts user teaches
     "learned_responses": [],  # list of {"query": "...", "response": "..."}
+    "reminders": {},         # id -> {"due": timestamp, "text": "...", "kind": "reminder"/"timer", "created": ...}
     "conversation_context": {
         "last_topic": None,
         "last_action": None,
@@ -62,9 +95,8 @@ def load_memory():
     """Load memory from disk if it exists."""
     global memory
     try:
-        if MEMORY_FILE.exists():
-            with open(MEMORY_FILE, "r", encoding="utf-8") as f:
-                data = json.load(f)
+        data = memory_manager.load()
+        if data is not None:
             # Merge with defaults so older versions still work
             if "user_profile" not in data:
                 data["user_profile"] = memory["user_profile"]
@@ -72,41 +104,78 @@ def load_memory():
                 data["notes"] = memory["notes"]
             if "learned_responses" not in data:
                 data["learned_responses"] = memory["learned_responses"]
+            if "reminders" not in data:
+                data["reminders"] = memory["reminders"]
             if "conversation_context" not in data:
                 data["conversation_context"] = memory["conversation_context"]
+            migrated = False
+            if data.get("version", 1) < 2:
+                # v1 files could hold the same query many times; keep the latest answer
+                data["learned_responses"] = migrate_learned_responses(data["learned_responses"])
+                data["version"] = MEMORY_VERSION
+                migrated = True
             memory = data
+            if migrated:
+                save_memory()
+                print("[MEMORY] Migrated memory file to version", MEMORY_VERSION)
         else:
             save_memory()  # create file with default structure
     except Exception as e:
         print("[MEMORY] Error loading memory:", e)
 
+def memory_changed():
+    """Tell state subscribers that memory was modified."""
+    state.mutate("memory_revision", lambda revision: revision + 1)
+
 def save_memory():
-    """Save memory to disk."""
+    """Mark the whole memory as changed; the flusher writes it shortly after."""
     try:
-        with open(MEMORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(memory, f, ensure_ascii=False, indent=2)
+        memory_manager.mark_dirty(memory)
+        memory_changed()
     except Exception as e:
         print("[MEMORY] Error saving memory:", e)
 
+def update_memory(op, path, value):
+    """Apply one change ("set" / "append" / "delete" at path) to memory and queue just that change."""
+    try:
+        change = (op, list(path), value)
+        with memory_lock:
+            apply_change(memory, change)
+        memory_manager.mark_dirty(memory, change)
+        memory_changed()
+    except Exception as e:
+        print("[MEMORY] Error updating memory:", e)
+
+def flush_memory():
+    """Write pending memory changes now (used on shutdown)."""
+    try:
+        memory_manager.close()
+    except Exception as e:
+        print("[MEMORY] Error saving memory:", e)
+
+learned_index = LearnedResponseIndex()
+
 def find_learned_response(query):
-    """Return saved response for this exact query if it exists."""
+    """Return saved response for this query (normalized) if it exists."""
     try:
-        for item in memory.get("learned_responses", []):
-            if item.get("query") == query:
-                return item.get("response")
+        return learned_index.lookup(memory.get("learned_responses", []), query)
     except Exception as e:
         print("[MEMORY] Error finding learned response:", e)
     return None
 
 def add_learned_response(query, response):
-    """Store a new query → response pair in memory."""
+    """Store (or update) a query → response pair in memory."""
     try:
-        memory.setdefault("learned_responses", [])
-        memory["learned_responses"].append({
-            "query": query,
-            "response": response
-        })
-        save_memory()
+        with memory_lock:
+            items = memory.setdefault("learned_responses", [])
+            changed = learned_index.upsert(items, query, response)
+        if changed:
+            pos, added = changed
+            if added:
+                memory_manager.mark_dirty(memory, ("append", ["learned_responses"], items[pos]))
+            else:
+                memory_manager.mark_dirty(memory, ("set", ["learned_responses", pos, "response"], response))
+            memory_changed()
         print("[MEMORY] Learned:", query, "->", response)
     except Exception as e:
         print("[MEMORY] Error adding learned response:", e)
@@ -115,26 +184,66 @@ def add_learned_response(query, response):
 # Your OpenWeatherMap API key here
 WEATHER_API_KEY = "YOUR_OPENWEATHERMAP_API_KEY"
 
-# Initialize voice engine
-engine = pyttsx3.init('sapi5')
-voices = engine.getProperty('voices')
-tts_lock = threading.Lock()             # Make TTS thread-safe
-if voices:
-    engine.setProperty('voice', voices[1].id)
-    engine.setProperty('rate', 190)
-else:
-    engine.setProperty('voice', voices[0].id)
+# ========== WEB LOOKUPS ==========
+# One pooled client with timeouts and a TTL cache (saved to http_cache.json)
+LOCATION_URL = "http://ip-api.com/json/"
+WEATHER_URL = "http://api.openweathermap.org/data/2.5/weather"
+WIKIPEDIA_URL = "https://en.wikipedia.org/w/api.php"
+LOCATION_TTL = 6 * 3600          # IP location barely changes
+WEATHER_TTL = 10 * 60
+WIKIPEDIA_TTL = 7 * 86400
+# Set SIDD_HTTP_FIXTURES to a JSON file of canned responses to run offline
+HTTP_FIXTURES = os.environ.get("SIDD_HTTP_FIXTURES")
+
+http = HttpClient(
+    transport=FixtureTransport.load(HTTP_FIXTURES) if HTTP_FIXTURES else None,
+    cache=TTLCache(Path("http_cache.json")),
+)
+
+# Initialize voice engine (runs on the TTS worker thread)
+def create_tts_engine():
+    engine = pyttsx3.init('sapi5')
+    voices = engine.getProperty('voices')
+    if len(voices) > 1:
+        engine.setProperty('voice', voices[1].id)
+    elif voices:
+        engine.setProperty('voice', voices[0].id)
     engine.setProperty('rate', 190)
-
-# Simple memory of last interaction
-last_query = ""
+    return engine
+
+# Synthesized audio for fixed phrases, replayed instead of re-synthesized
+TTS_CACHE_DIR = Path("tts_cache")
+TTS_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# One thread owns the engine; while it talks the mic marks what it hears as echo
+speech_worker = SpeechWorker(
+    create_tts_engine,
+    log=lambda text: log_command("SIDD", text),
+    on_speaking=speech_source.set_speaking,
+    cache=PhraseCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES),
+    sink=make_sink(),
+)
+
+# Words that cut SIDD off mid-sentence
+BARGE_IN_WORDS = ("stop", "cancel", "quiet", "shut up", "enough")
+
+# State shared by the command loop, the window scanner and the proactive checker.
+# Read with state.get()/state.snapshot(), write with state.update()/state.mutate().
+state = SharedState(
+    last_query="",               # simple memory of last interaction
+    last_actionable_query=None,  # for "try again"
+    last_opened_app=None,        # for "close it"
+    notifications=(),
+    active_window=None,
+    ui_elements=(),
+    memory_revision=0,           # bumped whenever memory changes
+)
 
 # Notification system
-notifications = []
-
-def add_notification(title, msg):
-    notifications.append(f"{title}: {msg}")
-    toaster.show_toast(title, msg, duration=5)
+def add_notification(title, msg, toast=True):
+    state.mutate("notifications", lambda notes: notes + (f"{title}: {msg}",))
+    if toast:
+        toaster.show_toast(title, msg, duration=5)
 
 def fetch_system_notifications():
     try:
@@ -147,20 +256,21 @@ def fetch_system_notifications():
         print("Error fetching system notifications:", e)
         return ""
 
-def update_notifications():
+def update_notifications(toast=True):
     system_notes = fetch_system_notifications()
     if system_notes:
         # Split by line and add each as a notification
         for line in system_notes.splitlines():
             line = line.strip()
-            if line and line not in notifications:
-                add_notification("System Notification", line)
+            if line and line not in state.get("notifications"):
+                add_notification("System Notification", line, toast=toast)
 
 def handle_notifications_query(query):
     """Handle any user query related to notifications/messages"""
     query_lower = query.lower()
     # First, update internal notifications from system
     update_notifications()
+    notifications = state.get("notifications")
     # If user wants to read the latest notification/message
     if any(phrase in query_lower for phrase in ["read recent notification", "read recent message"]):
         if notifications:
@@ -176,16 +286,39 @@ def handle_notifications_query(query):
         else:
             speak("No, you don't have any notifications.")
 
-# Speak function
-def speak(text):
-    log_command("SIDD", text)
-    with tts_lock:
+# Speak function (blocks until said, so replies keep their order with the dialogue)
+def speak(text, stream=False):
+    speech_worker.say(text, stream=stream).wait()
+
+def speak_async(text, priority=NORMAL, coalesce=False, stream=False):
+    """Queue text without waiting; used for alerts and long answers.
+
+    stream=True speaks long answers sentence by sentence, so the first
+    sentence starts before the rest is synthesized.
+    """
+    return speech_worker.say(text, priority=priority, coalesce=coalesce, stream=stream)
+
+# Search remembered facts
+def search_memory(topic, limit=3):
+    """Return up to `limit` remembered facts/answers related to topic, best first."""
+    backend = memory_manager.backend
+    if hasattr(backend, "search"):
         try:
-            engine.say(text)
-            engine.runAndWait()
-        except RuntimeError as e:
-            # Prevent crash if pyttsx3 is in a weird state
-            print("TTS RuntimeError:", e)
+            memory_manager.flush()  # make sure the latest facts are searchable
+            return [text for kind, text in backend.search(topic, limit)]
+        except Exception as e:
+            print("[MEMORY] Search error:", e)
+            return []
+
+    # no search index: rank notes by how many topic words they share
+    words = set(topic.lower().split())
+    scored = []
+    for fact in memory.get("notes", []):
+        overlap = len(words & set(fact.lower().split()))
+        if overlap:
+            scored.append((overlap, fact))
+    scored.sort(key=lambda item: -item[0])
+    return [fact for _, fact in scored[:limit]]
 
 # Wishing user based on time
 def wish_user():
@@ -205,34 +338,24 @@ def wish_user():
     except Exception:
         display_name = None
 
-    if display_name:
-        speak(f"Hello {display_name}, {greet} How can I assist you today?")
-    else:
-        speak(f"Hello Sir, {greet} How can I assist you today?")
+    speak(greeting_text(display_name or "Sir", greet))
+
+def greeting_text(display_name, greet):
+    return f"Hello {display_name}, {greet} How can I assist you today?"
 
 def start_background_listener():
-    recognizer = sr.Recognizer()
-    mic = sr.Microphone(device_index=1)
+    """Open the speech source once; utterances then queue up for next_utterance()."""
+    speech_source.start()
+    return speech_source.stop
 
-    def callback(recognizer, audio):
-        try:
-            query = recognizer.recognize_google(audio, language='en-in')
-            log_command("YOU", query)
-            command_queue.put(query.lower())
-        except sr.UnknownValueError:
-            pass  # ignore noise
-        except sr.RequestError:
-            speak("I think there is a network issue. Please check your connection.")
-        except Exception as e:
-            print("Recognition error:", e)
+def next_utterance(timeout=None):
+    """Return the next Utterance spoken after SIDD last spoke, or None on timeout."""
+    return speech_source.next(timeout)
 
-    # Start non-blocking listener
-    stop_listening = recognizer.listen_in_background(mic, callback, phrase_time_limit=6)
-    return stop_listening
+scanner_interval = 0.5  # seconds between foreground checks (a full re-walk only happens on change)
 
-current_ui_elements = []
-current_active_window = None
-scanner_interval = 1.5  # seconds between scans (lower -> more responsive, higher -> lighter CPU)
+# One cached scan per (window handle, title); re-walked on focus/structure change
+ui_scanner = ElementScanner(UIAProvider(), max_depth=12, max_elements=2000, fingerprint_interval=1.5)
 CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS = True  # toggle safety confirmations
 
 # ================ SIDD Personality ================
@@ -256,81 +379,138 @@ PERSONALITY_PRESETS = {
 }
 
 SIDD_MODE = "friendly"
-# ---------- Background scanner ----------
-def continuous_window_scanner(interval=scanner_interval):
-    """Continuously update current_active_window and current_ui_elements."""
-    global current_ui_elements, current_active_window
-    while True:
-        try:
-            active_title = get_active_window()
-            if not active_title:
-                # no active window detected; clear elements and keep looping
-                current_ui_elements = []
-                current_active_window = None
-                time.sleep(interval)
-                continue
 
-            # Update only on change or always refresh elements for reliability
-            if active_title != current_active_window:
-                current_active_window = active_title
-                # print(f"[Scanner] Active window changed: {current_active_window}")
+FAREWELL_RESPONSES = [
+    "Goodbye Sir! Take care.",
+    "See you later! Have a wonderful day."
+]
 
-            # Attempt to scan UI elements (scan_app_elements from your code)
-            try:
-                elements = scan_app_elements()
-                if elements is None:
-                    elements = []
-                # Normalize to lowercase for matching convenience
-                current_ui_elements = [e for e in elements if e]
-            except Exception as e:
-                # print("[Scanner] scan_app_elements error:", e)
-                current_ui_elements = []
+# Constant replies synthesized into the TTS cache at startup
+CACHED_PHRASES = [
+    "Volume increased.", "Volume decreased.", "Volume muted.", "Volume unmuted.",
+    "Scrolled down.", "Scrolled up.", "Clicked at the center.",
+    "Paused the song.", "Resumed the song.",
+    "Wi-Fi disabled.", "Wi-Fi enabled.",
+    "Okay, sir!", "Alright, Sir.", "Trying again.",
+    "Yes Sir, I hear you clearly!",
+    "Got it, I will remember that.", "Okay, I will remember that.",
+    "Yes, you have notifications.", "No, you don't have any notifications.",
+    "Please specify what you want me to open.",
+    "Please specify what you want to close.",
+    "I think there is a network issue. Please check your connection.",
+    "Session ended. Goodbye!",
+]
 
-        except Exception as e:
-            print("[Scanner] Unexpected error:", e)
-        time.sleep(interval)
-    
-def proactive_checks():
-    last_morning_greeted_day = None
-    while True:
-        try:
-            # Battery check
-            battery = psutil.sensors_battery()
-            if battery and battery.percent is not None:
-                if battery.percent < 20 and not battery.power_plugged:
-                    speak("Sir, battery is below twenty percent. I recommend connecting the charger.")
-
-            # Simple daily morning greeting around 9 AM
-            now = datetime.datetime.now()
-            if now.hour == 9:
-                today = now.date()
-                if last_morning_greeted_day != today:
-                    speak("Good morning, Sir. All systems are operational.")
-                    last_morning_greeted_day = today
+def known_phrases():
+    """Every fixed phrase worth keeping pre-synthesized, including the greetings."""
+    phrases = list(CACHED_PHRASES) + FAREWELL_RESPONSES
+    for preset in PERSONALITY_PRESETS.values():
+        phrases.extend(preset.values())
+    profile = memory.get("user_profile", {})
+    display_name = profile.get("nickname") or profile.get("name") or "Sir"
+    for greet in ("Good Morning!", "Good Afternoon!", "Good Evening!"):
+        phrases.append(greeting_text(display_name, greet))
+    return phrases
+# ---------- Background jobs (run by the scheduler) ----------
+scheduler = Scheduler()
+
+BATTERY_CHECK_INTERVAL = 60      # seconds between battery readings
+BATTERY_ALERT_REPEAT = 300       # don't repeat the low-battery alert more often than this
+last_battery_alert = 0.0
+
+def scan_foreground_window():
+    """Publish the active window and its UI elements to state."""
+    try:
+        result = ui_scanner.poll()
+        state.update(active_window=ui_scanner.active_title,
+                     ui_elements=tuple(result.texts()) if result is not None else ())
+    except Exception as e:
+        print("[Scanner] Unexpected error:", e)
+        state.update(ui_elements=())
 
-        except Exception as e:
-            print("Proactive error:", e)
+# The scheduler job only sets this; one long-lived thread does the UIA walks,
+# so COM is initialized once and a slow walk never piles up more scans behind it
+scan_requested = threading.Event()
 
-        time.sleep(300)  # check every 5 minutes
+def scanner_loop():
+    try:
+        comtypes.CoInitialize()
+    except Exception as e:
+        print("[Scanner] COM init failed:", e)
+    while True:
+        scan_requested.wait()
+        scan_requested.clear()
+        scan_foreground_window()
+
+def start_scanner():
+    threading.Thread(target=scanner_loop, name="ui-scanner", daemon=True).start()
+
+def check_battery():
+    global last_battery_alert
+    battery = psutil.sensors_battery()
+    if battery and battery.percent is not None:
+        if battery.percent < 20 and not battery.power_plugged:
+            if time.time() - last_battery_alert >= BATTERY_ALERT_REPEAT:
+                last_battery_alert = time.time()
+                speak_async("Sir, battery is below twenty percent. I recommend connecting the charger.",
+                            priority=URGENT, coalesce=True)
+
+def morning_greeting():
+    speak_async("Good morning, Sir. All systems are operational.", coalesce=True)
+
+def poll_notifications():
+    update_notifications(toast=False)
+
+# ---------- Reminders and timers ----------
+def persist_reminder(op, key, record):
+    update_memory(op, ["reminders", key], record)
+
+def fire_reminder(key, record, late):
+    if record["kind"] == "timer":
+        msg = f"Sir, your {record['text']} is done."
+    elif late > 60:
+        msg = f"Sir, this reminder was due {describe_delay(late)} ago: {record['text']}"
+    else:
+        msg = f"Sir, you asked me to remind you: {record['text']}"
+    # toast + speech take a few seconds; keep them off the scheduler thread
+    scheduler.once(lambda: show_notification("Reminder", msg), name=f"reminder-{key}", blocking=False)
+
+# Due reminders sit in a timing wheel advanced by one scheduler job (see reminders.py)
+reminders = Reminders(fire_reminder, persist=persist_reminder)
+
+def register_background_jobs():
+    # a UIA walk can take seconds; the scanner thread does it, so it cannot hold up reminders or the battery check
+    scheduler.every(scanner_interval, scan_requested.set, name="ui-scan", start_delay=0, misfire=SKIP)
+    scheduler.every(1.0, reminders.tick, name="reminders", start_delay=0, misfire=SKIP)
+    scheduler.every(BATTERY_CHECK_INTERVAL, check_battery, start_delay=5, jitter=2, misfire=SKIP)
+    # Daily greeting at 9 AM; if the PC was asleep at 9, greet on wake-up during that hour, never later
+    scheduler.cron(morning_greeting, hour=9, minute=0, misfire=SKIP, grace=3600)
+    # Get-StartApps takes a while, so it runs on its own thread
+    scheduler.every(600, poll_notifications, start_delay=30, jitter=30, misfire=SKIP, blocking=False)
 
 # Taking command from microphone
 def take_command():
-    recognizer = sr.Recognizer()
-    with sr.Microphone(device_index=1) as source:
-        print("Listening...")
-        recognizer.adjust_for_ambient_noise(source)
-        recognizer.dynamic_energy_threshold = False
+    print("Listening...")
+    audio = next_utterance()
+    if audio is None:
+        return ""
 
-        audio = recognizer.listen(source, phrase_time_limit=7)
+    # Heard while SIDD was talking: mostly our own voice coming back
+    if audio.during_speech and not speech_worker.busy:
+        return ""
 
     try:
         print("Recognizing...")
-        query = recognizer.recognize_google(audio, language='en-in')
-        print(f"You said: {query}")
-        return query.lower()
-    except sr.UnknownValueError:
-        return ""
-    except sr.RequestError:
+        query = asr.transcribe(audio, language='en-in')
+        if audio.during_speech:
+            if query and any(word in query.lower() for word in BARGE_IN_WORDS):
+                print(f"[BARGE-IN] {query}")
+                speech_worker.interrupt()
+            return ""
+        if query:
+            print(f"You said: {query}")
+        return query
+    except ASRError:
         speak("I think there is a network issue. Please check your connection.")
         return ""
     except Exception as e:
@@ -345,11 +525,11 @@ def show_notification(title, msg):
 
 # Location Functions
 def get_current_location():
-    """ Get approximate location via IP """
+    """ Get approximate location via IP (cached for hours; a stale one is refreshed in the background) """
     try:
-        # Use a free geolocation API
-        resp = requests.get("http://ip-api.com/json/")
-        data = resp.json()
+        # ip-api answers a failed lookup with HTTP 200 and status "fail"; don't cache that
+        data = http.get_json(LOCATION_URL, ttl=LOCATION_TTL, stale_ok=True,
+                             validate=lambda body: body.get("status") == "success")
         lat = data.get("lat")
         lon = data.get("lon")
         city = data.get("city")
@@ -364,11 +544,9 @@ def get_weather(lat, lon):
     if lat is None or lon is None:
         return None
     try:
-        url = f"http://api.openweathermap.org/data/2.5/weather?lat={lat}&lon={lon}&appid={WEATHER_API_KEY}&units=metric"
-        resp = requests.get(url)
-        weather_data = resp.json()
-        if weather_data.get("cod") != 200:
-            return None
+        params = {"lat": lat, "lon": lon, "appid": WEATHER_API_KEY, "units": "metric"}
+        weather_data = http.get_json(WEATHER_URL, params, ttl=WEATHER_TTL,
+                                     validate=lambda body: body.get("cod") == 200)
         # Extract what you want
         desc = weather_data["weather"][0]["description"]
         temp = weather_data["main"]["temp"]
@@ -397,7 +575,8 @@ def handle_weather():
     # Speak out results
     speak(f"The current weather in {city} is {weather['description']}. "
           f"The temperature is {weather['temperature']}°C, "
-          f"feels like {weather['feels_like']}°C. Humidity is {weather['humidity']} percent.")
+          f"feels like {weather['feels_like']}°C. Humidity is {weather['humidity']} percent.",
+          stream=True)
 
 # Website Control
 def open_website(url, name):
@@ -470,14 +649,27 @@ def play_music_from_folder(path, description):
         speak(f"Hmm… that folder doesn’t seem to exist.")
 
 # Wikipedia Search Function
+def wikipedia_summary(topic, sentences=2):
+    """First sentences of the intro of the best Wikipedia match for topic (cached for days)."""
+    params = {
+        "action": "query", "format": "json", "prop": "extracts", "exintro": 1, "explaintext": 1,
+        "redirects": 1, "generator": "search", "gsrsearch": topic.strip(), "gsrlimit": 1,
+    }
+    data = http.get_json(WIKIPEDIA_URL, params, ttl=WIKIPEDIA_TTL)
+    pages = data.get("query", {}).get("pages", {})
+    extract = next((page.get("extract") for page in pages.values() if page.get("extract")), None)
+    if not extract:
+        raise LookupError(f"No Wikipedia article for {topic!r}")
+    return " ".join(split_sentences(extract)[:sentences])
+
 def handle_wikipedia(query):
     try:
         speak('Let me check Wikipedia for that...')
         query = query.replace('wikipedia', '')
-        summary = wikipedia.summary(query, sentences=2)
+        summary = wikipedia_summary(query)
         speak("Here’s what I found:")
         print(summary)
-        speak(summary)
+        speak_async(summary, stream=True)
     except Exception:
         speak("I couldn’t retrieve information from Wikipedia right now.")
 
@@ -532,18 +724,20 @@ START_MENU_PATHS = [
     r"C:\ProgramData\Microsoft\Windows\Start Menu\Programs"
 ]
 
-def find_in_start_menu(app_name):
-    app_name = app_name.lower()
-    for path in START_MENU_PATHS:
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if file.lower().endswith(".lnk") and app_name in file.lower():
-                    return os.path.join(root, file)
-    return None
+# Running processes and windows, refreshed in the background for close commands
+process_snapshot = ProcessSnapshotService(interval=2.0)
+
+# Desktop items (any file or folder) + Start Menu shortcuts, scanned once and
+# kept fresh by re-listing only folders whose mtime changed
+APP_INDEX_FILE = Path("app_index.json")
+app_index = AppIndex(
+    [AppRoot(STANDARD_FOLDERS["desktop"], recursive=False, extensions=None, include_dirs=True)]
+    + [AppRoot(path) for path in START_MENU_PATHS],
+    APP_INDEX_FILE,
+)
 
 # Universal Open Function (supports apps and files)
 def open_app_or_file(name):
-    global last_opened_app
     try:
         key = name.lower().replace("open ", "").replace("from ", "").strip()
 
@@ -553,22 +747,19 @@ def open_app_or_file(name):
             if os.path.exists(target) or target.endswith(".exe"):
                 os.startfile(target)
                 speak(f"Opening {key} for you.")
-                last_opened_app = key
-                return
-
-        # 2. Scan Desktop for folder or shortcut
-        desktop_path = STANDARD_FOLDERS["desktop"]
-        for item in os.listdir(desktop_path):
-            if key in item.lower():
-                os.startfile(os.path.join(desktop_path, item))
-                speak(f"Opening {item} from Desktop.")
+                state.update(last_opened_app=key)
                 return
 
-        # 3. Search Start Menu for shortcuts
-        shortcut_path = find_in_start_menu(key)
+        # 2./3. Desktop items and Start Menu shortcuts (indexed, most launched first)
+        shortcut_path = app_index.lookup(key)
         if shortcut_path:
             os.startfile(shortcut_path)
-            speak(f"Opening {name} from Start Menu.")
+            app_index.record_launch(shortcut_path)
+            state.update(last_opened_app=key)
+            if os.path.dirname(shortcut_path) == STANDARD_FOLDERS["desktop"]:
+                speak(f"Opening {os.path.basename(shortcut_path)} from Desktop.")
+            else:
+                speak(f"Opening {name} from Start Menu.")
             return
 
         # 4. Try Windows Search (Win+S) first
@@ -589,6 +780,7 @@ def open_app_or_file(name):
                 webbrowser.open(search_url)
                 return
             else:
+                state.update(last_opened_app=key)
                 speak(f"Opening {name}.")
                 return  # Successfully opened via Windows Search
         except Exception:
@@ -598,46 +790,39 @@ def open_app_or_file(name):
         speak(f"Error opening {name}: {e}")
 
 def close_edge(timeout=1.2):
-    end_time = time.time() + timeout
+    """Kill Edge if it shows up within timeout (Windows Search opened a web result)."""
     closed = False
-
-    while time.time() < end_time:
-        for proc in psutil.process_iter(['name']):
-            try:
-                if proc.info['name'] and "msedge.exe" in proc.info['name'].lower():
-                    proc.kill()
-                    closed = True
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        if closed:
-            break
-        time.sleep(0.05)  # check every 200ms
+    for pid in process_snapshot.wait_for_process("msedge.exe", timeout):
+        try:
+            psutil.Process(pid).kill()
+            closed = True
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    if closed:
+        process_snapshot.invalidate()
     return closed
 # Universal Close Function (supports apps and files)
 
-def close_app_or_file(name):
-    key = name.lower().replace("close ", "").strip()
+def terminate_matching(snapshot, key):
+    """Terminate processes named key or owning a window titled key; True if any was closed."""
     closed = False
-    for proc in psutil.process_iter(['pid', 'name']):
-        proc_name = proc.info['name']
-        if proc_name and key in proc_name.lower():
-            proc.terminate()
+    pids = set(snapshot.pids(key))
+    pids.update(pid for _, pid, _ in snapshot.windows_matching(key))
+    for pid in pids:
+        try:
+            psutil.Process(pid).terminate()
             closed = True
-    try:
-        def enumHandler(hwnd, lParam):
-            if win32gui.IsWindowVisible(hwnd):
-                title = win32gui.GetWindowText(hwnd).lower()
-                if key in title:
-                    pid = win32process.GetWindowThreadProcessId(hwnd)[1]
-                    try:
-                        p = psutil.Process(pid)
-                        p.terminate()
-                        nonlocal closed
-                        closed = True
-                    except Exception:
-                        pass
-        win32gui.EnumWindows(enumHandler, None)
-    except ImportError:
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return closed
+
+def close_app_or_file(name):
+    key = name.lower().replace("close ", "").strip()
+    closed = terminate_matching(process_snapshot.snapshot, key)
+    if not closed:
+        # the snapshot can be a couple of seconds old; "close X" right after "open X" needs a live look
+        closed = terminate_matching(process_snapshot.refresh(), key)
+    if not WIN32_AVAILABLE:
         # fallback: simple taskkill (will close all explorer windows)
         if key in ["desktop", "computer", "this pc"]:
             os.system("taskkill /f /im explorer.exe")
@@ -646,6 +831,7 @@ def close_app_or_file(name):
             closed = True
 
     if closed:
+        process_snapshot.invalidate()
         speak(f"Closed {name} successfully.")
     else:
         speak(f"No running process or folder found matching {name}.")
@@ -658,20 +844,17 @@ def get_active_window():
     except:
         return None
 def scan_app_elements():
+    """Named elements of the foreground window (served from the scanner's cache)."""
     try:
-        app = Application(backend="uia").connect(active_only=True)
-        dlg = app.top_window()
-        controls = [ctrl.window_text() for ctrl in dlg.descendants() if ctrl.window_text()]
-        return controls
+        return ui_scanner.texts()
     except Exception as e:
         print("UI Scan error:", e)
         return []
 
 # Working on any where inside an app
 def handle_in_app_action(command, app):
-    global current_ui_elements
     print("Active Window:", get_active_window())
-    print("Live Elements (top 10):", current_ui_elements[:10])
+    print("Live Elements (top 10):", state.get("ui_elements")[:10])
 
     active_title = get_active_window()
     print("Active Window:", active_title)
@@ -691,13 +874,11 @@ def handle_in_app_action(command, app):
             speak("Scrolled up.")
 
         elif "click" in command:
-            # find the element mentioned
-            for el in elements:
-                if el and el.lower() in command:
-                    dlg = Application(backend="uia").connect(active_only=True).top_window()
-                    dlg[el].click()
-                    speak(f"Clicked on {el}")
-                    return
+            # find the element mentioned (longest label in the command) and click its cached handle
+            el = ui_scanner.click_text(command)
+            if el:
+                speak(f"Clicked on {el}")
+                return
             # fallback: mouse click center
             pyautogui.click()
             speak("Clicked at the center.")
@@ -728,16 +909,16 @@ def detect_mood(query: str):
     }
 
     q = query.lower()
+    detected = "neutral"  # if nothing matched
     for mood, words in mood_map.items():
         if any(word in q for word in words):
-            memory["conversation_context"]["mood"] = mood
-            save_memory()
-            return mood
+            detected = mood
+            break
 
-    # if nothing matched
-    memory["conversation_context"]["mood"] = "neutral"
-    save_memory()
-    return "neutral"
+    # Only touch the memory file when the mood actually changed
+    if memory["conversation_context"].get("mood") != detected:
+        update_memory("set", ["conversation_context", "mood"], detected)
+    return detected
 
 def is_negative_reply(text: str) -> bool:
     if not text:
@@ -754,22 +935,566 @@ def is_positive_reply(text: str) -> bool:
     positives = ["yes", "yeah", "yup", "sure", "ok", "okay", "of course", "teach", "learn"]
     return any(word in t for word in positives)
 
+def is_actionable(q):
+    """Only store actionable queries (not greetings, not "try again", etc.)"""
+    ignore = [
+        "hi", "hello", "hey", "good morning", "good evening",
+        "how are you", "can you hear me", "what is your name",
+        "try again", "quit", "exit", "goodbye", "stop", "get out"
+    ]
+    return not any(word in q for word in ignore)
+
+def remember_actionable(query):
+    """Remember the query so "try again" can repeat it."""
+    if is_actionable(query):
+        state.update(last_actionable_query=query)
+
+def confirm_destructive(action_msg, cancel_msg, command):
+    """Ask for confirmation (if enabled) before running a system command."""
+    if CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS:
+        speak(PERSONALITY_PRESETS[SIDD_MODE]["confirm"])
+        confirm = take_command()
+        if "yes" in confirm or "do it" in confirm:
+            speak(f"{action_msg}, Sir.")
+            os.system(command)
+        else:
+            speak(cancel_msg)
+    else:
+        speak(f"{action_msg}.")
+        os.system(command)
+
+# ================ Intent Handlers ================
+# Each handler takes (query, slots) from intent_router.route().
+# Returning True ends the main loop.
+
+WEBSITES = {
+    "open youtube": ('https://www.youtube.com', 'YouTube'),
+    "open google": ('https://www.google.com', 'Google'),
+    "open gmail": ('https://mail.google.com', 'Gmail'),
+    "open stackoverflow": ('https://stackoverflow.com', 'Stack Overflow'),
+}
+
+def intent_greeting(query, slots):
+    responses = ["Hey there! 😊 How can I help?", "Hello Sir! What can I do for you today?"]
+    speak(random.choice(responses))
+    state.update(last_query="")
+
+def intent_hear_me(query, slots):
+    speak("Yes Sir, I hear you clearly!")
+    state.update(last_query="")
+
+def intent_set_name(query, slots):
+    # Example: "my name is rahul"
+    name = slots["rest"]
+    if name:
+        # Capitalize nicely
+        name = " ".join(part.capitalize() for part in name.split())
+        update_memory("set", ["user_profile", "name"], name)
+        speak(f"Nice to meet you, {name}. I will remember your name.")
+    else:
+        speak("I didn't catch your name. Please say it again.")
+    state.update(last_query="")
+
+def intent_set_nickname(query, slots):
+    # Example: "call me boss"
+    nickname = slots["rest"]
+    if nickname:
+        nickname = " ".join(part.capitalize() for part in nickname.split())
+        update_memory("set", ["user_profile", "nickname"], nickname)
+        speak(f"Okay, I will call you {nickname} from now on.")
+    else:
+        speak("I didn't catch what you want me to call you.")
+    state.update(last_query="")
+
+def intent_remember_fact(query, slots):
+    # Example: "remember that my favorite color is blue"
+    fact = slots["rest"]
+    if fact:
+        update_memory("append", ["notes"], fact)
+        speak("Okay, I will remember that.")
+        print("[MEMORY] New fact:", fact)
+    else:
+        speak("Tell me clearly what you want me to remember.")
+    state.update(last_query="")
+
+def intent_recall(query, slots):
+    # Example: "what do you remember about my sister"
+    topic = slots["rest"]
+    if topic.startswith("about "):
+        topic = topic[len("about "):].strip()
+
+    if topic:
+        facts = search_memory(topic)
+        if facts:
+            speak(f"Here is what I remember about {topic}.")
+            for fact in facts:
+                speak(fact)
+        else:
+            speak(f"I don't remember anything about {topic} yet.")
+    else:
+        profile = memory.get("user_profile", {})
+        pieces = []
+        if profile.get("name"):
+            pieces.append(f"Your name is {profile['name']}.")
+        if profile.get("nickname"):
+            pieces.append(f"I call you {profile['nickname']}.")
+        for fact in memory.get("notes", []):
+            pieces.append(f"I remember that {fact}.")
+
+        if pieces:
+            speak("Here are some things I remember about you.")
+            for p in pieces[:6]:   # don't talk forever if long
+                speak(p)
+        else:
+            speak("Right now, I don't remember anything special. You can teach me by saying 'remember that' followed by your sentence.")
+    state.update(last_query="")
+
+def intent_wikipedia(query, slots):
+    handle_wikipedia(query)
+    state.update(last_query="")
+    remember_actionable(query)
+
+def intent_weather(query, slots):
+    handle_weather()
+    state.update(last_query="")
+    remember_actionable(query)
+
+def intent_open_website(query, slots):
+    url, name = WEBSITES[slots["keyword"]]
+    open_website(url, name)
+    state.update(last_query="")
+    remember_actionable(query)
+
+def intent_play_song(query, slots):
+    song = slots["rest"]  # Extract after 'play '
+
+    # Retry until we get a song name
+    while not song:
+        speak("I couldn't understand the song name. Please say the song name again in Bengali or English.")
+        audio = next_utterance()
+        try:
+            # Try Bengali first
+            song_retry = asr.transcribe(audio, language='bn-IN')
+            if not song_retry.strip():
+                # fallback to English
+                song_retry = asr.transcribe(audio, language='en-IN')
+            song = song_retry.strip()
+            if song:
+                print(f"You said (song): {song}")
+            else:
+                speak("Sorry, I still couldn't understand. Please repeat the song name.")
+        except Exception as e:
+            print(e)
+            speak("Something went wrong, let's try again.")
+
+    # Play the song on YouTube
+    speak(f"Great! Playing '{song}' on YouTube now.")
+    try:
+        pywhatkit.playonyt(song)
+    except Exception as e:
+        print(e)
+        speak("Sorry, I couldn't play the song right now.")
+    remember_actionable(query)
+
+# Pause/Resume Music (local + YouTube)
+def intent_pause_music(query, slots):
+    try:
+        pyautogui.press("playpause")  # Works for most players
+        # Also try YouTube-specific pause
+        time.sleep(0.5)
+        pyautogui.press("k")  # YouTube pause/play shortcut
+        speak("Paused the song.")
+    except Exception as e:
+        speak("Sorry, I couldn't pause the song.")
+        print(e)
+    remember_actionable(query)
+
+def intent_resume_music(query, slots):
+    try:
+        pyautogui.press("playpause")  # Resume for local players
+        time.sleep(0.5)
+        pyautogui.press("k")  # Resume YouTube
+        speak("Resumed the song.")
+    except Exception as e:
+        speak("Sorry, I couldn't resume the song.")
+        print(e)
+    remember_actionable(query)
+
+def intent_tell_time(query, slots):
+    str_time = datetime.datetime.now().strftime("%H:%M")
+    speak(f"It's currently {str_time}.")
+    state.update(last_query="")
+    remember_actionable(query)
+
+# ==================== Reminders and Timers ======================
+def intent_set_reminder(query, slots):
+    due, text = parse_reminder(query)
+    if due is None:
+        speak("When should I remind you, Sir?")
+        due, _ = parse_reminder("remind me " + take_command())
+    if due is None:
+        speak("Sorry, I couldn't understand the time.")
+        return
+    text = text or "your reminder"
+    reminders.add(text, due)
+    speak(f"Okay Sir, I'll remind you in {describe_delay(due - time.time())}: {text}.")
+    state.update(last_query="")
+
+def intent_set_timer(query, slots):
+    seconds = parse_duration(query)
+    if seconds is None:
+        speak("For how long, Sir?")
+        seconds = parse_duration(take_command())
+    if not seconds:
+        speak("Sorry, I couldn't understand the duration.")
+        return
+    length = describe_delay(seconds)
+    reminders.add(f"timer for {length}", time.time() + seconds, kind="timer")
+    speak(f"Timer set for {length}.")
+    state.update(last_query="")
+
+def intent_cancel_reminder(query, slots):
+    kind = "timer" if "timer" in query else "reminder"
+    record = reminders.cancel_latest(kind)
+    if record is None:
+        speak(f"You don't have any {kind}s running, Sir.")
+    elif kind == "timer":
+        speak(f"{record['text'].capitalize()} cancelled.")
+    else:
+        speak(f"Reminder cancelled: {record['text']}.")
+
+def intent_list_reminders(query, slots):
+    pending = reminders.pending("timer" if "timer" in query else None)
+    if not pending:
+        speak("You have no reminders or timers, Sir.")
+        return
+    speak(f"You have {len(pending)} pending.")
+    now = time.time()
+    for _, record in pending[:3]:
+        speak(f"{record['text']}, in {describe_delay(max(record['due'] - now, 0))}.")
+
+# ==================== Open/shift/Close Applications ======================
+def intent_open_app(query, slots):
+    source = slots["rest"]
+    if source:
+        open_app_or_file(source)
+    else:
+        speak("Please specify what you want to open.")
+    remember_actionable(query)
+
+def intent_shift_to(query, slots):
+    target = slots["rest"]
+    if not target:
+        speak("Please specify what you want me to shift to.")
+    else:
+        # Try Chrome tab first
+        if "chrome" in target and "tab" in target:
+            site = target.replace("chrome", "").replace("tab", "").strip()
+            if site and shift_chrome_tab(site):
+                speak(f"Shifted to {site} tab in Chrome.")
+            elif bring_window_to_front("Chrome"):
+                speak("Shifted to Chrome.")
+            else:
+                speak("Chrome is not open.")
+        else:
+            # Try to bring general window forward
+            if bring_window_to_front(target):
+                speak(f"Shifted to {target}.")
+            else:
+                speak(f"I couldn’t find any window for {target}.")
+
+def intent_close_last(query, slots):
+    last_opened_app = state.get("last_opened_app")
+    if last_opened_app:
+        close_app_or_file(last_opened_app)
+    else:
+        speak("I don't know which application to close. Please specify.")
+    remember_actionable(query)
+
+def intent_close_app(query, slots):
+    source = slots["rest"]
+    if source:
+        close_app_or_file(source)
+    else:
+        speak("Please specify what you want to close.")
+    remember_actionable(query)
+
+def intent_follow_steps(query, slots):
+    speak("Okay, sir!")
+    while True:
+        step = take_command()
+        if not step:
+            continue
+        if "leave" in step or "stop" in step or "end steps" in step:
+            speak("Step following stopped.")
+            break
+        # Elements come from the scanner's cache (re-walked only if the window changed)
+        elements = scan_app_elements()
+        print("Scanned Elements:", elements[:15])  # just show first 15 for debug
+        # Try to match your step with a UI element
+        matched = False
+        try:
+            el = ui_scanner.click_text(step)
+            if el:
+                speak(f"Clicked on {el}")
+                matched = True
+        except Exception as e:
+            print("Error clicking element:", e)
+        if not matched:
+            # If no element match, fallback to generic actions
+            handle_in_app_action(step, state.get("last_opened_app"))
+
+# ==================== In-App Actions ======================
+def intent_in_app_action(query, slots):
+    active_app = get_active_window()
+    if active_app:
+        handle_in_app_action(query, active_app)
+    else:
+        speak("I couldn't detect any active application.")
+    remember_actionable(query)
+
+# ================ Search and Explain =================
+def intent_tell_me_about(query, slots):
+    topic = slots["rest"]
+    if topic:
+        try:
+            speak(f"Let me tell you about {topic}")
+            summary = wikipedia_summary(topic)
+            print(summary)
+            speak_async(summary, stream=True)
+        except Exception:
+            speak("Sorry, I couldn’t find details about that right now.")
+    else:
+        speak("Please tell me clearly what you want me to explain.")
+    remember_actionable(query)
+
+# ==================== System Configuration ======================
+def intent_shutdown(query, slots):
+    confirm_destructive("Shutting down your system, goodbye", "Shutdown cancelled, Sir.", "shutdown /s /t 1")
+    remember_actionable(query)
+
+def intent_restart(query, slots):
+    confirm_destructive("Restarting your system now", "Restart cancelled, Sir.", "shutdown /r /t 1")
+    remember_actionable(query)
+
+def intent_log_off(query, slots):
+    confirm_destructive("Signing out now", "Log off cancelled, Sir.", "shutdown /l")
+    remember_actionable(query)
+
+def intent_lock_system(query, slots):
+    confirm_destructive("Locking your computer", "Lock cancelled, Sir.", "rundll32.exe user32.dll,LockWorkStation")
+    remember_actionable(query)
+
+def intent_wifi_off(query, slots):
+    os.system("netsh interface set interface Wi-Fi admin=disable")
+    speak("Wi-Fi disabled.")
+    remember_actionable(query)
+
+def intent_wifi_on(query, slots):
+    os.system("netsh interface set interface Wi-Fi admin=enable")
+    speak("Wi-Fi enabled.")
+    remember_actionable(query)
+
+def intent_screenshot(query, slots):
+    filename = f"screenshot_{int(time.time())}.png"
+    pyautogui.screenshot(filename)
+    speak(f"Screenshot saved as {filename}")
+    remember_actionable(query)
+
+def intent_battery(query, slots):
+    battery = psutil.sensors_battery()
+    percent = battery.percent
+    plugged = "charging" if battery.power_plugged else "not charging"
+    speak(f"Battery is at {percent} percent and is {plugged}.")
+    if percent < 20 and not battery.power_plugged:
+        speak("Warning! Battery is below 20 percent. Please connect to a power source.")
+    remember_actionable(query)
+
+# ------------ Volume and Brightness Controls ------------
+def intent_set_volume(query, slots):
+    level = slots["rest"].replace("to", "", 1).strip().replace("%", "")
+    set_volume(level)
+    remember_actionable(query)
+
+def intent_volume_up(query, slots):
+    pyautogui.press("volumeup", presses=5)
+    speak("Volume increased.")
+    remember_actionable(query)
+
+def intent_volume_down(query, slots):
+    pyautogui.press("volumedown", presses=5)
+    speak("Volume decreased.")
+    remember_actionable(query)
+
+def intent_mute(query, slots):
+    pyautogui.press("volumemute")
+    speak("Volume muted.")
+    remember_actionable(query)
+
+def intent_unmute(query, slots):
+    pyautogui.press("volumemute")
+    speak("Volume unmuted.")
+    remember_actionable(query)
+
+def intent_set_brightness(query, slots):
+    try:
+        level = int(slots["rest"].replace("%", ""))
+        set_brightness(level)
+    except:
+        speak("Please say a number between 0 and 100.")
+    remember_actionable(query)
+
+def intent_brightness_up(query, slots):
+    increase_brightness()
+    remember_actionable(query)
+
+def intent_brightness_down(query, slots):
+    decrease_brightness()
+    remember_actionable(query)
+
+def intent_notify_test(query, slots):
+    show_notification("AI Assistant", "This is your notification test.")
+    remember_actionable(query)
+
+# ================ Notification Commands =================
+def intent_notifications(query, slots):
+    notifications = state.get("notifications")
+    # If user wants to read the latest
+    if any(phrase in query for phrase in ["read recent notification", "read recent message"]):
+        if notifications:
+            last_note = notifications[-1]
+            speak(f"Here is your latest notification: {last_note}")
+            print(last_note)
+        else:
+            speak("No recent notifications found.")
+    else:
+        # Just asking if there are notifications/messages
+        if notifications:
+            speak("Yes, you have notifications.")
+        else:
+            speak("No, you don't have any notifications.")
+    remember_actionable(query)
+
+# ================ Quit/Exit =================
+def intent_quit(query, slots):
+    speak(random.choice(FAREWELL_RESPONSES))
+    return True
+
+def intent_unknown(query, slots):
+    # 1) First, check if we already learned a response for this query
+    learned = find_learned_response(query)
+    if learned:
+        speak(learned)
+    else:
+        # 2) New unknown query → ask user what to reply and save it
+        if state.get("last_query") != query:
+            speak("That's outside my current knowledge Sir. Shall I learn it from you?")
+            command = take_command()
+
+            if is_positive_reply(command):
+                speak("Please tell me what I should reply.")
+                answer = take_command()
+                if answer:
+                    add_learned_response(query, answer)
+                    speak("Got it, I will remember that.")
+                    state.update(last_query=query)
+                else:
+                    speak("I couldn't hear any reply to learn.")
+                    state.update(last_query="")
+
+            elif is_negative_reply(command):
+                speak("Alright, Sir.")
+                state.update(last_query="")
+
+            else:
+                speak("I couldn't hear any reply to learn.")
+            state.update(last_query=query)
+
+    remember_actionable(query)
+
+INTENT_HANDLERS = {
+    "greeting": intent_greeting,
+    "set_reminder": intent_set_reminder,
+    "set_timer": intent_set_timer,
+    "cancel_reminder": intent_cancel_reminder,
+    "list_reminders": intent_list_reminders,
+    "hear_me": intent_hear_me,
+    "set_name": intent_set_name,
+    "set_nickname": intent_set_nickname,
+    "remember_fact": intent_remember_fact,
+    "recall": intent_recall,
+    "wikipedia": intent_wikipedia,
+    "weather": intent_weather,
+    "open_website": intent_open_website,
+    "play_song": intent_play_song,
+    "pause_music": intent_pause_music,
+    "resume_music": intent_resume_music,
+    "tell_time": intent_tell_time,
+    "open_app": intent_open_app,
+    "shift_to": intent_shift_to,
+    "close_last": intent_close_last,
+    "close_app": intent_close_app,
+    "follow_steps": intent_follow_steps,
+    "in_app_action": intent_in_app_action,
+    "tell_me_about": intent_tell_me_about,
+    "shutdown": intent_shutdown,
+    "restart": intent_restart,
+    "log_off": intent_log_off,
+    "lock_system": intent_lock_system,
+    "wifi_off": intent_wifi_off,
+    "wifi_on": intent_wifi_on,
+    "screenshot": intent_screenshot,
+    "battery": intent_battery,
+    "set_volume": intent_set_volume,
+    "volume_up": intent_volume_up,
+    "volume_down": intent_volume_down,
+    "mute": intent_mute,
+    "unmute": intent_unmute,
+    "set_brightness": intent_set_brightness,
+    "brightness_up": intent_brightness_up,
+    "brightness_down": intent_brightness_down,
+    "notify_test": intent_notify_test,
+    "notifications": intent_notifications,
+    "quit": intent_quit,
+    UNKNOWN_INTENT: intent_unknown,
+}
+
+def print_session_stats():
+    if speech_source.vad is not None:
+        print("[VAD]", speech_source.vad.stats())
+    print("[TTS]", speech_worker.stats())
+    print("[PROCESSES]", process_snapshot.stats())
+    print("[SCHEDULER]", scheduler.stats())
+    print("[UI]", ui_scanner.stats())
+    print("[HTTP]", http.stats())
+    print("[REMINDERS]", f"{len(reminders)} pending, {reminders.fired} fired")
+
 # Main Function
 def main():
-    global last_query
     load_memory()
+    memory_manager.start()
+    learned_index.prepare(memory["learned_responses"])   # fuzzy recall builds in the background
+    reminders.load(memory["reminders"])
+    app_index.load()
+    process_snapshot.start()
+    speech_worker.start()
+    http.submit(get_current_location)    # so the first weather query only waits for the weather
     wish_user()
+    speech_worker.warm(known_phrases())
+
+    if DEBUG:
+        state.subscribe(lambda snap, changed: print(f"[Scanner] Active window changed: {snap['active_window']}"),
+                        keys=["active_window"])
 
     # Start background listener & scanners
-    threading.Thread(target=continuous_window_scanner, daemon=True).start()
-    threading.Thread(target=proactive_checks, daemon=True).start()
+    stop_listening = start_background_listener()
+    start_scanner()
+    register_background_jobs()
+    scheduler.start()
 
     # music_karva_path = f"C:\\Users\\{getpass.getuser()}\\Music\\Carva mini"
     # music_desktop_path = f"C:\\Users\\{getpass.getuser()}\\Music\\desktop"
 
-    last_actionable_query = None  # Store last actionable query
-    last_opened_app = None  # Store last opened app for potential closing
-
     try:
         while True:
             query = take_command()
@@ -785,488 +1510,38 @@ def main():
             elif current_mood == "angry":
                 speak("I understand your frustration, Sir. I'll try to make things smoother.")
                 
+            last_actionable_query = state.get("last_actionable_query")
             if query == "try again" and last_actionable_query:
                 query = last_actionable_query
                 speak("Trying again.")
 
-            # Only store actionable queries (not greetings, not "try again", etc.)
-            def is_actionable(q):
-                ignore = [
-                    "hi", "hello", "hey", "good morning", "good evening",
-                    "how are you", "can you hear me", "what is your name",
-                    "try again", "quit", "exit", "goodbye", "stop", "get out"
-                ]
-                return not any(word in q for word in ignore)
-
             if is_actionable(query):
                     print(f"[COMMAND][YOU] {query}", flush=True)
-                    
-            # ==================== Basic Commands ======================
-            greetings = ['hi', 'hello', 'hey', 'good morning', 'good evening']
-            if any(query.lower().split()[0] == greet.split()[0] for greet in greetings):
-                responses = ["Hey there! 😊 How can I help?", "Hello Sir! What can I do for you today?"]
-                speak(random.choice(responses))
-                last_query = ""
-
-            # elif 'how are you' in query:
-            #     responses = [
-            #         "I'm fine, How about you?",
-            #         "All systems running smoothly. How are you today?"
-            #     ]
-            #     speak(random.choice(responses))
-            #     last_query = ""
-
-            elif 'can you hear me' in query:
-                speak("Yes Sir, I hear you clearly!")
-                last_query = ""
-
-            # elif 'what is your name' in query:
-            #     speak("I am Sidd, your personal assistent!")
-            #     last_query = ""
-
-                        # ========== PERSONAL MEMORY / TRAINING ==========
-            elif "my name is" in query:
-                # Example: "my name is rahul"
-                name = query.split("my name is", 1)[1].strip()
-                if name:
-                    # Capitalize nicely
-                    name = " ".join(part.capitalize() for part in name.split())
-                    memory["user_profile"]["name"] = name
-                    save_memory()
-                    speak(f"Nice to meet you, {name}. I will remember your name.")
-                else:
-                    speak("I didn't catch your name. Please say it again.")
-                last_query = ""
-
-            elif "call me" in query:
-                # Example: "call me boss"
-                nickname = query.split("call me", 1)[1].strip()
-                if nickname:
-                    nickname = " ".join(part.capitalize() for part in nickname.split())
-                    memory["user_profile"]["nickname"] = nickname
-                    save_memory()
-                    speak(f"Okay, I will call you {nickname} from now on.")
-                else:
-                    speak("I didn't catch what you want me to call you.")
-                last_query = ""
-
-            elif query.startswith("remember that"):
-                # Example: "remember that my favorite color is blue"
-                fact = query.replace("remember that", "").strip()
-                if fact:
-                    memory["notes"].append(fact)
-                    save_memory()
-                    speak("Okay, I will remember that.")
-                    print("[MEMORY] New fact:", fact)
-                else:
-                    speak("Tell me clearly what you want me to remember.")
-                last_query = ""
-
-            # elif "what do you remember" in query or "what things do you remember" in query:
-            #     notes = memory.get("notes", [])
-            #     profile = memory.get("user_profile", {})
-            #     pieces = []
-
-            #     if profile.get("name"):
-            #         pieces.append(f"Your name is {profile['name']}.")
-            #     if profile.get("nickname"):
-            #         pieces.append(f"I call you {profile['nickname']}.")
-            #     for fact in notes:
-            #         pieces.append(f"I remember that {fact}.")
-
-            #     if pieces:
-            #         speak("Here are some things I remember about you.")
-            #         for p in pieces[:6]:   # don't talk forever if long
-            #             speak(p)
-            #     else:
-            #         speak("Right now, I don't remember anything special. You can teach me by saying 'remember that' followed by your sentence.")
-            #     last_query = ""
-
-            elif 'wikipedia' in query:
-                handle_wikipedia(query)
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'weather' in query:
-                handle_weather()
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'open youtube' in query:
-                open_website('https://www.youtube.com', 'YouTube')
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'open google' in query:
-                open_website('https://www.google.com', 'Google')
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'open gmail' in query:
-                open_website('https://mail.google.com', 'Gmail')
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'open stackoverflow' in query:
-                open_website('https://stackoverflow.com', 'Stack Overflow')
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            # elif 'play music from karva mini' in query:
-            #     play_music_from_folder(music_karva_path, "Karva Mini folder")
-            #     last_query = ""
-            #     if is_actionable(query): last_actionable_query = query
-
-            # elif 'play music from desktop' in query:
-            #     play_music_from_folder(music_desktop_path, "Desktop folder")
-            #     last_query = ""
-            #     if is_actionable(query): last_actionable_query = query
-
-            elif query.startswith("play "):
-                song = query[5:].strip()  # Extract after 'play '
-
-                # Retry until we get a song name
-                while not song:
-                    speak("I couldn't understand the song name. Please say the song name again in Bengali or English.")
-                    recognizer = sr.Recognizer()
-                    with sr.Microphone() as source:
-                        recognizer.adjust_for_ambient_noise(source, duration=1)
-                        audio = recognizer.listen(source, phrase_time_limit=7)
-                    try:
-                        # Try Bengali first
-                        song_retry = recognizer.recognize_google(audio, language='bn-IN')
-                        if not song_retry.strip():
-                            # fallback to English
-                            song_retry = recognizer.recognize_google(audio, language='en-IN')
-                        song = song_retry.strip()
-                        print(f"You said (song): {song}")
-                    except sr.UnknownValueError:
-                        speak("Sorry, I still couldn't understand. Please repeat the song name.")
-                    except Exception as e:
-                        print(e)
-                        speak("Something went wrong, let's try again.")
-
-                # Play the song on YouTube
-                speak(f"Great! Playing '{song}' on YouTube now.")
-                try:
-                    pywhatkit.playonyt(song)
-                except Exception as e:
-                    print(e)
-                    speak("Sorry, I couldn't play the song right now.")
-                if is_actionable(query): last_actionable_query = query
-            
-            # Pause/Resume Music (local + YouTube)
-            elif "pause song" in query or "pause music" in query:
-                try:
-                    pyautogui.press("playpause")  # Works for most players
-                    # Also try YouTube-specific pause
-                    time.sleep(0.5)
-                    pyautogui.press("k")  # YouTube pause/play shortcut
-                    speak("Paused the song.")
-                except Exception as e:
-                    speak("Sorry, I couldn't pause the song.")
-                    print(e)
-                if is_actionable(query): last_actionable_query = query
-
-            elif "resume" in query or "resume song" in query:
-                try:
-                    pyautogui.press("playpause")  # Resume for local players
-                    time.sleep(0.5)
-                    pyautogui.press("k")  # Resume YouTube
-                    speak("Resumed the song.")
-                except Exception as e:
-                    speak("Sorry, I couldn't resume the song.")
-                    print(e)
-                if is_actionable(query): last_actionable_query = query
-
-            elif 'the time' in query:
-                str_time = datetime.datetime.now().strftime("%H:%M")
-                speak(f"It's currently {str_time}.")
-                last_query = ""
-                if is_actionable(query): last_actionable_query = query
-
-            # ==================== Open/shift/Close Applications ======================
-            elif query.startswith("open "):
-                source = query.replace("open ", "").strip()
-                if source:
-                    open_app_or_file(source)
-                else:
-                    speak("Please specify what you want to open.")
-                if is_actionable(query): last_actionable_query = query
-            
-            elif query.startswith("shift to "):
-                target = query.replace("shift to ", "").strip()
-                if not target:
-                    speak("Please specify what you want me to shift to.")
-                else:
-                    # Try Chrome tab first
-                    if "chrome" in target and "tab" in target:
-                        site = target.replace("chrome", "").replace("tab", "").strip()
-                        if site and shift_chrome_tab(site):
-                            speak(f"Shifted to {site} tab in Chrome.")
-                        elif bring_window_to_front("Chrome"):
-                            speak("Shifted to Chrome.")
-                        else:
-                            speak("Chrome is not open.")
-                    else:
-                        # Try to bring general window forward
-                        if bring_window_to_front(target):
-                            speak(f"Shifted to {target}.")
-                        else:
-                            speak(f"I couldn’t find any window for {target}.")
-
-            elif query == "close it":
-                if last_opened_app:
-                    close_app_or_file(last_opened_app)
-                else:
-                    speak("I don't know which application to close. Please specify.")
-                if is_actionable(query): last_actionable_query = query
 
-            elif query.startswith("close "):
-                source = query.replace("close ", "").strip()
-                if source:
-                    close_app_or_file(source)
-                else:
-                    speak("Please specify what you want to close.")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "follow the steps" in query or "follow my steps" in query or "follow my commands" in query or "follow my instructions" in query or "enter to the screen" in query or "check screen" in query:
-                speak("Okay, sir!")
-                while True:
-                    step = take_command()
-                    if not step:
-                        continue
-                    if "leave" in step or "stop" in step or "end steps" in step:
-                        speak("Step following stopped.")
-                        break
-                    # Scan UI elements every time before executing
-                    elements = scan_app_elements()
-                    print("Scanned Elements:", elements[:15])  # just show first 15 for debug
-                    # Try to match your step with a UI element
-                    matched = False
-                    for el in elements:
-                        if el and el.lower() in step:
-                            try:
-                                dlg = Application(backend="uia").connect(active_only=True).top_window()
-                                dlg[el].click_input()
-                                speak(f"Clicked on {el}")
-                                matched = True
-                                break
-                            except Exception as e:
-                                print("Error clicking element:", e)
-                    if not matched:
-                        # If no element match, fallback to generic actions
-                        handle_in_app_action(step, last_opened_app)
-
-            # ==================== In-App Actions ======================
-            elif any(phrase in query for phrase in ["scroll down", "scroll up", "click", "type", "search", "click"]):
-                active_app = get_active_window()
-                if active_app:
-                    handle_in_app_action(query, active_app)
-                else:
-                    speak("I couldn't detect any active application.")
-                if is_actionable(query): last_actionable_query = query
-
-            # ================ Search and Explain =================
-            elif query.startswith("tell me about"):
-                topic = query.replace("tell me about", "").strip()
-                if topic:
-                    try:
-                        speak(f"Let me tell you about {topic}")
-                        summary = wikipedia.summary(topic, sentences=2)
-                        print(summary)
-                        speak(summary)
-                    except Exception:
-                        speak("Sorry, I couldn’t find details about that right now.")
-                else:
-                    speak("Please tell me clearly what you want me to explain.")
-                if is_actionable(query): last_actionable_query = query
-
-                        # ==================== System Configuration ======================
-            elif "shutdown" in query:
-                if CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS:
-                    speak(PERSONALITY_PRESETS[SIDD_MODE]["confirm"])
-                    confirm = take_command()
-                    if "yes" in confirm or "do it" in confirm:
-                        speak("Shutting down your system, goodbye, Sir.")
-                        os.system("shutdown /s /t 1")
-                    else:
-                        speak("Shutdown cancelled, Sir.")
-                else:
-                    speak("Shutting down your system, goodbye!")
-                    os.system("shutdown /s /t 1")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "restart" in query:
-                if CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS:
-                    speak(PERSONALITY_PRESETS[SIDD_MODE]["confirm"])
-                    confirm = take_command()
-                    if "yes" in confirm or "do it" in confirm:
-                        speak("Restarting your system now, Sir.")
-                        os.system("shutdown /r /t 1")
-                    else:
-                        speak("Restart cancelled, Sir.")
-                else:
-                    speak("Restarting your system.")
-                    os.system("shutdown /r /t 1")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "log off" in query or "sign out" in query:
-                if CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS:
-                    speak(PERSONALITY_PRESETS[SIDD_MODE]["confirm"])
-                    confirm = take_command()
-                    if "yes" in confirm or "do it" in confirm:
-                        speak("Signing out now, Sir.")
-                        os.system("shutdown /l")
-                    else:
-                        speak("Log off cancelled, Sir.")
-                else:
-                    speak("Signing out now.")
-                    os.system("shutdown /l")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "lock system" in query or "lock computer" in query:
-                if CONFIRM_BEFORE_DESTRUCTIVE_ACTIONS:
-                    speak(PERSONALITY_PRESETS[SIDD_MODE]["confirm"])
-                    confirm = take_command()
-                    if "yes" in confirm or "do it" in confirm:
-                        speak("Locking your computer, Sir.")
-                        os.system("rundll32.exe user32.dll,LockWorkStation")
-                    else:
-                        speak("Lock cancelled, Sir.")
-                else:
-                    speak("Locking your computer.")
-                    os.system("rundll32.exe user32.dll,LockWorkStation")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "off wi-fi" in query:
-                os.system("netsh interface set interface Wi-Fi admin=disable")
-                speak("Wi-Fi disabled.")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "on wi-fi" in query:
-                os.system("netsh interface set interface Wi-Fi admin=enable")
-                speak("Wi-Fi enabled.")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "screenshot" in query:
-                filename = f"screenshot_{int(time.time())}.png"
-                pyautogui.screenshot(filename)
-                speak(f"Screenshot saved as {filename}")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "battery" in query or "power" in query:
-                battery = psutil.sensors_battery()
-                percent = battery.percent
-                plugged = "charging" if battery.power_plugged else "not charging"
-                speak(f"Battery is at {percent} percent and is {plugged}.")
-                if percent < 20 and not battery.power_plugged:
-                    speak("Warning! Battery is below 20 percent. Please connect to a power source.")
-                if is_actionable(query): last_actionable_query = query
-
-            # ------------ Volume and Brightness Controls ------------
-            elif "set volume" in query:
-                level = query.replace("set volume to", "").strip().replace("%", "")
-                set_volume(level)
-                if is_actionable(query): last_actionable_query = query
-            elif "increase volume" in query:
-                pyautogui.press("volumeup", presses=5)
-                speak("Volume increased.")
-                if is_actionable(query): last_actionable_query = query
-            elif "decrease volume" in query:
-                pyautogui.press("volumedown", presses=5)
-                speak("Volume decreased.")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "mute" in query:
-                pyautogui.press("volumemute")
-                speak("Volume muted.")
-                if is_actionable(query): last_actionable_query = query
-            elif "unmute" in query:
-                pyautogui.press("volumemute")
-                speak("Volume unmuted.")
-                if is_actionable(query): last_actionable_query = query
-
-            elif "set brightness into" in query:
-                try:
-                    level = int(query.replace("set brightness into", "").strip().replace("%", ""))
-                    set_brightness(level)
-                except:
-                    speak("Please say a number between 0 and 100.")
-                if is_actionable(query): last_actionable_query = query
-            elif "increase brightness" in query:
-                increase_brightness()
-                if is_actionable(query): last_actionable_query = query
-            elif "decrease brightness" in query:
-                decrease_brightness()
-                if is_actionable(query): last_actionable_query = query
-
-            elif "notify me" in query:
-                show_notification("AI Assistant", "This is your notification test.")
-                if is_actionable(query): last_actionable_query = query
-
-            # ================ Notification Commands =================
-            elif any(word in query for word in ["notification", "notifications", "message", "messages"]):
-                query_lower = query.lower()
-                # If user wants to read the latest
-                if any(phrase in query_lower for phrase in ["read recent notification", "read recent message"]):
-                    if notifications:
-                        last_note = notifications[-1]
-                        speak(f"Here is your latest notification: {last_note}")
-                        print(last_note)
-                    else:
-                        speak("No recent notifications found.")
-                else:
-                    # Just asking if there are notifications/messages
-                    if notifications:
-                        speak("Yes, you have notifications.")
-                    else:
-                        speak("No, you don't have any notifications.")
-                if is_actionable(query): last_actionable_query = query
-
-            # ================ Quit/Exit =================
-            elif 'quit' in query or 'exit' in query or 'goodbye' in query or 'stop' in query or 'get out' in query or 'leave' in query:
-                farewell_responses = [
-                    "Goodbye Sir! Take care.",
-                    "See you later! Have a wonderful day."
-                ]
-                speak(random.choice(farewell_responses))
+            # One pass over the query picks the intent; see intent_router.INTENT_TABLE
+            intent, slots = route(query)
+            handler = INTENT_HANDLERS.get(intent, intent_unknown)
+            if handler(query, slots):
                 break
-
-            else:
-                # 1) First, check if we already learned a response for this query
-                learned = find_learned_response(query)
-                if learned:
-                    speak(learned)
-                else:
-                    # 2) New unknown query → ask user what to reply and save it
-                    if last_query != query:
-                        speak("That's outside my current knowledge Sir. Shall I learn it from you?")
-                        command = take_command()
-
-                        if is_positive_reply(command):
-                            speak("Please tell me what I should reply.")
-                            answer = take_command()
-                            if answer:
-                                add_learned_response(query, answer)
-                                speak("Got it, I will remember that.")
-                                last_query = query
-                            else:
-                                speak("I couldn't hear any reply to learn.")
-                                last_query = ""
-
-                        elif is_negative_reply(command):
-                            speak("Alright, Sir.")
-                            last_query = ""
-
-                        else:
-                            speak("I couldn't hear any reply to learn.")
-                        last_query = query
-
-                if is_actionable(query):
-                    last_actionable_query = query
     except KeyboardInterrupt:
         speak("Session ended. Goodbye!")
+    finally:
+        # pending memory writes must reach disk even if a step before them fails
+        try:
+            try:
+                stop_listening()
+            except Exception as e:
+                print("Error stopping the listener:", e)
+            try:
+                print_session_stats()
+            except Exception as e:
+                print("Error printing session stats:", e)
+            try:
+                http.close()    # writes the HTTP cache file if a timed save is still pending
+            except Exception as e:
+                print("Error saving the HTTP cache:", e)
+        finally:
+            flush_memory()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
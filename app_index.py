@@ -0,0 +1,382 @@
+"""
+Index of launchable shortcuts for "open X".
+
+The Start Menu folders and the Desktop are scanned once, and the result is
+kept in app_index.json between runs. Later refreshes only re-list folders
+whose modification time changed (adding, removing or renaming an entry
+updates its parent folder's mtime), so staying current costs one stat() per
+folder instead of a full os.walk.
+
+Lookup tiers, best first: exact name, name prefix, word prefix, substring
+(the old find_in_start_menu rule), then character-trigram fuzzy match for
+misheard names. Within a tier, apps launched more often rank first.
+"""
+
+import bisect
+import heapq
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from memory_store import write_atomic
+
+INDEX_VERSION = 1
+
+# tiers returned by AppIndex.find (lower is better)
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING, FUZZY = range(5)
+
+
+def _normalize(name):
+    return " ".join(name.lower().replace("_", " ").replace("-", " ").split())
+
+
+def _trigrams(text):
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class AppRoot:
+    """A folder to index: recursive or not, optionally limited to some extensions."""
+
+    def __init__(self, path, recursive=True, extensions=(".lnk",), include_dirs=False):
+        self.path = str(path)
+        self.recursive = recursive
+        self.extensions = tuple(e.lower() for e in extensions) if extensions else None
+        self.include_dirs = include_dirs   # Desktop folders are launchable too
+
+    def accepts(self, filename):
+        return self.extensions is None or filename.lower().endswith(self.extensions)
+
+
+class AppEntry:
+    __slots__ = ("name", "path", "root")
+
+    def __init__(self, name, path, root):
+        self.name = name     # normalized display name ("google chrome")
+        self.path = path
+        self.root = root     # index into AppIndex.roots (earlier roots win ties)
+
+
+class AppIndex:
+    """Persisted, incrementally refreshed index of shortcuts under a few roots."""
+
+    def __init__(self, roots, cache_path=None, refresh_interval=5.0, fuzzy_threshold=0.5,
+                 probe_grams=8, candidates=64):
+        self.roots = list(roots)
+        self.cache_path = Path(cache_path) if cache_path else None
+        self.refresh_interval = refresh_interval
+        self.fuzzy_threshold = fuzzy_threshold
+        self.probe_grams = probe_grams   # rarest query trigrams used to find fuzzy candidates
+        self.candidates = candidates     # entries scored exactly per fuzzy lookup
+        self.launches = {}       # path -> launch count
+        self._dirs = {}          # folder -> {"mtime", "root", "files", "subdirs"}
+        self._entries = None     # rebuilt lazily from _dirs
+        self._last_refresh = 0.0
+        self._dirty = False
+
+    # ---------- scanning ----------
+    def _scan_dir(self, folder, root_idx):
+        """List one folder; recurse into new subfolders of recursive roots."""
+        root = self.roots[root_idx]
+        try:
+            mtime = os.stat(folder).st_mtime
+            names = os.listdir(folder)
+        except OSError:
+            self._drop_dir(folder)
+            return
+        files, subdirs = [], []
+        for name in names:
+            full = os.path.join(folder, name)
+            if os.path.isdir(full):
+                if root.recursive:
+                    subdirs.append(full)
+                if root.include_dirs:
+                    files.append(name)
+            elif root.accepts(name):
+                files.append(name)
+        old = self._dirs.get(folder)
+        self._dirs[folder] = {"mtime": mtime, "root": root_idx, "files": files, "subdirs": subdirs}
+        known = set(old["subdirs"]) if old else set()
+        for sub in subdirs:
+            if sub not in known or sub not in self._dirs:
+                self._scan_dir(sub, root_idx)
+        for sub in known.difference(subdirs):
+            self._drop_dir(sub)
+        self._entries = None
+        self._dirty = True
+
+    def _drop_dir(self, folder):
+        info = self._dirs.pop(folder, None)
+        if info is None:
+            return
+        for sub in info["subdirs"]:
+            self._drop_dir(sub)
+        self._entries = None
+        self._dirty = True
+
+    def build(self):
+        """Full scan of every root."""
+        self._dirs = {}
+        for idx, root in enumerate(self.roots):
+            self._scan_dir(root.path, idx)
+        self._last_refresh = time.monotonic()
+
+    def refresh(self):
+        """Re-list only folders whose mtime changed. Returns how many were re-listed."""
+        changed = 0
+        for idx, root in enumerate(self.roots):
+            if root.path not in self._dirs:
+                self._scan_dir(root.path, idx)
+                changed += 1
+        for folder, info in list(self._dirs.items()):
+            if folder not in self._dirs:
+                continue   # dropped while refreshing a parent
+            try:
+                mtime = os.stat(folder).st_mtime
+            except OSError:
+                self._drop_dir(folder)
+                changed += 1
+                continue
+            if mtime != info["mtime"]:
+                self._scan_dir(folder, info["root"])
+                changed += 1
+        self._last_refresh = time.monotonic()
+        return changed
+
+    # ---------- persistence ----------
+    def load(self):
+        """Load the saved index and bring it up to date; full scan if there is none."""
+        data = None
+        if self.cache_path is not None and self.cache_path.exists():
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except Exception as e:
+                print("[APPS] Could not read app index, rebuilding:", e)
+        roots = [r.path for r in self.roots]
+        if data and data.get("version") == INDEX_VERSION and data.get("roots") == roots:
+            self._dirs = data.get("dirs", {})
+            self.launches = data.get("launches", {})
+            self._entries = None
+            self.refresh()
+        else:
+            if data:
+                self.launches = data.get("launches", {})
+            self.build()
+        self.save()
+
+    def save(self):
+        if self.cache_path is None or not self._dirty:
+            return
+        data = {
+            "version": INDEX_VERSION,
+            "roots": [r.path for r in self.roots],
+            "dirs": self._dirs,
+            "launches": self.launches,
+        }
+        try:
+            write_atomic(self.cache_path, json.dumps(data))
+            self._dirty = False
+        except OSError as e:
+            print("[APPS] Could not save app index:", e)
+
+    # ---------- lookup ----------
+    def _ensure_entries(self):
+        if self._entries is not None:
+            return
+        entries = []
+        for folder, info in self._dirs.items():
+            for filename in info["files"]:
+                stem, ext = os.path.splitext(filename)
+                name = stem if ext.lower() in (".lnk", ".url", ".exe") else filename
+                entries.append(AppEntry(_normalize(name), os.path.join(folder, filename), info["root"]))
+        self._entries = entries
+        self._by_name = {}
+        for i, e in enumerate(entries):
+            self._by_name.setdefault(e.name, []).append(i)
+        self._names = sorted((e.name, i) for i, e in enumerate(entries))
+        self._words = sorted((w, i) for i, e in enumerate(entries) for w in set(e.name.split()))
+        # one newline-joined string so substring search runs in C
+        self._blob = "\n".join(e.name for e in entries)
+        self._starts = []
+        pos = 0
+        for e in entries:
+            self._starts.append(pos)
+            pos += len(e.name) + 1
+        self._grams = None   # trigram postings, built on the first fuzzy lookup
+
+    def _ensure_grams(self):
+        if self._grams is not None:
+            return
+        self._gram_sets = [_trigrams(e.name) for e in self._entries]
+        self._grams = {}
+        for i, grams in enumerate(self._gram_sets):
+            for g in grams:
+                self._grams.setdefault(g, []).append(i)
+
+    def _substring_hits(self, q):
+        hits = set()
+        pos = self._blob.find(q)
+        while pos != -1:
+            i = bisect.bisect_right(self._starts, pos) - 1
+            hits.add(i)
+            # continue after this entry
+            nxt = self._starts[i + 1] if i + 1 < len(self._starts) else len(self._blob)
+            pos = self._blob.find(q, nxt)
+        return hits
+
+    @staticmethod
+    def _prefix_range(pairs, prefix):
+        lo = bisect.bisect_left(pairs, (prefix,))
+        hi = bisect.bisect_left(pairs, (prefix + "\uffff",))
+        return {i for _, i in pairs[lo:hi]}
+
+    def find(self, query, limit=5):
+        """Return up to limit (tier, path) pairs, best first."""
+        if self.refresh_interval is not None and time.monotonic() - self._last_refresh > self.refresh_interval:
+            self.refresh()
+        self._ensure_entries()
+        q = _normalize(query)
+        if not q:
+            return []
+
+        tiers = {}
+        for i in self._by_name.get(q, ()):
+            tiers.setdefault(i, EXACT)
+        for i in self._prefix_range(self._names, q):
+            tiers.setdefault(i, PREFIX)
+        for i in self._prefix_range(self._words, q):
+            tiers.setdefault(i, WORD_PREFIX)
+        if not tiers and "\n" not in q:
+            for i in self._substring_hits(q):
+                tiers[i] = SUBSTRING
+
+        scores = {}
+        if not tiers:
+            self._ensure_grams()
+            grams = _trigrams(q)
+            probe = sorted((g for g in grams if g in self._grams), key=lambda g: len(self._grams[g]))
+            shared = {}
+            for g in probe[:self.probe_grams]:
+                for i in self._grams[g]:
+                    shared[i] = shared.get(i, 0) + 1
+            for i in heapq.nlargest(self.candidates, shared, key=shared.get):
+                # Dice coefficient over trigram sets
+                other = self._gram_sets[i]
+                score = 2.0 * len(grams & other) / (len(grams) + len(other))
+                if score >= self.fuzzy_threshold:
+                    tiers[i] = FUZZY
+                    scores[i] = score
+
+        def rank(i):
+            e = self._entries[i]
+            return (tiers[i], -scores.get(i, 0.0), -self.launches.get(e.path, 0), e.root, len(e.name), e.name)
+
+        best = heapq.nsmallest(limit, tiers, key=rank)
+        return [(tiers[i], self._entries[i].path) for i in best]
+
+    def lookup(self, query):
+        """Best matching path or None."""
+        hits = self.find(query, limit=1)
+        return hits[0][1] if hits else None
+
+    def record_launch(self, path):
+        self.launches[path] = self.launches.get(path, 0) + 1
+        self._dirty = True
+        self.save()
+
+    def __len__(self):
+        self._ensure_entries()
+        return len(self._entries)
+
+
+# -------------------- BENCHMARK --------------------
+_BENCH_WORDS = (
+    "microsoft office word excel powerpoint visual studio code google chrome firefox "
+    "adobe reader photoshop spotify steam discord zoom teams notepad paint calculator "
+    "python git terminal vlc media player obs studio blender unity android tools"
+).split()
+
+
+def make_synthetic_tree(folder, shortcuts=10000, per_dir=40, seed=3):
+    """Fill folder with nested vendor/product folders of empty .lnk files."""
+    rng = random.Random(seed)
+    folder = Path(folder)
+    made = 0
+    d = 0
+    while made < shortcuts:
+        sub = folder / f"Vendor {d // 10}" / f"Suite {d}"
+        sub.mkdir(parents=True, exist_ok=True)
+        for _ in range(min(per_dir, shortcuts - made)):
+            name = " ".join(rng.choice(_BENCH_WORDS) for _ in range(rng.randint(1, 3)))
+            (sub / f"{name.title()} {made}.lnk").touch()
+            made += 1
+        d += 1
+    return folder
+
+
+def _walk_find(roots, app_name):
+    # the original find_in_start_menu
+    app_name = app_name.lower()
+    for path in roots:
+        for root, dirs, files in os.walk(path):
+            for file in files:
+                if file.lower().endswith(".lnk") and app_name in file.lower():
+                    return os.path.join(root, file)
+    return None
+
+
+def benchmark(shortcuts=10000):
+    tmp = Path(tempfile.mkdtemp(prefix="sidd-apps-"))
+    try:
+        tree = make_synthetic_tree(tmp / "Programs", shortcuts)
+        queries = ["spotify", "visual studio", "notepad 9999", "adobe reader 5000", "photshop", "blendr 77"]
+        roots = [AppRoot(tree)]
+        cache = tmp / "app_index.json"
+
+        start = time.perf_counter()
+        for q in queries:
+            _walk_find([str(tree)], q)
+        walk_ms = (time.perf_counter() - start) / len(queries) * 1000
+
+        index = AppIndex(roots, cache)
+        start = time.perf_counter()
+        index.load()
+        build_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        warm = AppIndex(roots, cache)
+        warm.load()
+        len(warm)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        (tree / "Vendor 0" / "Suite 0" / "New App.lnk").touch()
+        start = time.perf_counter()
+        changed = warm.refresh()
+        refresh_ms = (time.perf_counter() - start) * 1000
+
+        warm.find("warm up the fuzzy index")
+        start = time.perf_counter()
+        rounds = 50
+        for _ in range(rounds):
+            for q in queries:
+                warm.find(q)
+        find_us = (time.perf_counter() - start) / (rounds * len(queries)) * 1e6
+
+        for q in queries:
+            print(f"{q!r:22} -> {[os.path.basename(p) for _, p in warm.find(q, limit=2)]}")
+        print(f"\nshortcuts: {len(warm)} in {len(warm._dirs)} folders")
+        print(f"os.walk per lookup      : {walk_ms:9.1f} ms")
+        print(f"index cold build        : {build_ms:9.1f} ms")
+        print(f"index load from disk    : {load_ms:9.1f} ms")
+        print(f"refresh after 1 change  : {refresh_ms:9.1f} ms ({changed} folder re-listed)")
+        print(f"index lookup            : {find_us:9.1f} us")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
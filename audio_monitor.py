@@ -0,0 +1,411 @@
+"""
+Audio levels for the HUD, measured off the render thread.
+
+A capture thread reads fixed-size chunks from a source, writes the samples
+into a ring buffer and publishes an AudioLevels snapshot (RMS, peak, the
+0..1 amplitude the HUD animates with, and a few log-spaced FFT bands). The
+render loop only calls latest(), which returns the most recent snapshot
+without waiting on audio I/O. A failing input stream is reopened on the
+capture thread with a backoff, so the frame never stalls on it.
+
+Sources:
+  PyAudioSource   - the default input device (PyAudio, paInt16 mono).
+  SyntheticSource - generated speech-like bursts, paced in real time, for
+                    running the HUD headless or without a microphone.
+                    Only used when asked for (SIDD_SYNTHETIC_AUDIO=1).
+
+Without NumPy the monitor still runs: PythonLevelMeter computes RMS and
+peak with a plain loop (as the HUD used to), without FFT bands.
+
+The ring buffer has one writer (the capture thread). Readers copy the
+newest samples without taking a lock; a copy that races with a write can
+mix two chunks, which is harmless for level meters.
+"""
+
+import array
+import math
+import threading
+import time
+
+# Optional: vectorized levels, FFT bands and the synthetic source
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+# Optional: real microphone input
+try:
+    import pyaudio
+    PYAUDIO_AVAILABLE = True
+except Exception:
+    PYAUDIO_AVAILABLE = False
+
+CHUNK = 1024
+RATE = 44100
+FULL_SCALE_RMS = 3000.0      # RMS that maps to amplitude 1.0 (tune for sensitivity)
+
+
+# -------------------- RING BUFFER --------------------
+class RingBuffer:
+    """Fixed-size int16 sample ring; single writer, lock-free readers."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._data = np.zeros(capacity, dtype=np.int16)
+        self._written = 0            # total samples ever written
+
+    def write(self, samples):
+        n = len(samples)
+        if n >= self.capacity:
+            self._data[:] = samples[-self.capacity:]
+        else:
+            pos = self._written % self.capacity
+            end = pos + n
+            if end <= self.capacity:
+                self._data[pos:end] = samples
+            else:
+                split = self.capacity - pos
+                self._data[pos:] = samples[:split]
+                self._data[:end - self.capacity] = samples[split:]
+        self._written += n           # publish after the samples are in place
+
+    def latest(self, n):
+        """Copy of the newest n samples (zero-padded before the first write)."""
+        n = min(n, self.capacity)
+        end = self._written % self.capacity
+        if end >= n:
+            return self._data[end - n:end].copy()
+        return np.concatenate((self._data[end - n:], self._data[:end]))
+
+    @property
+    def written(self):
+        return self._written
+
+
+# -------------------- LEVELS --------------------
+class AudioLevels:
+    """One measurement of the newest chunk."""
+
+    __slots__ = ("rms", "peak", "amplitude", "bands", "at")
+
+    def __init__(self, rms=0.0, peak=0, amplitude=0.0, bands=None, at=0.0):
+        self.rms = rms
+        self.peak = peak                  # max |sample|, 0..32767
+        self.amplitude = amplitude        # rms / FULL_SCALE_RMS, clipped to 0..1
+        self.bands = bands                # float32 0..1 per FFT band, or None
+        self.at = at                      # time.monotonic() of the measurement
+
+
+class LevelMeter:
+    """RMS, peak and log-spaced FFT band levels of int16 samples with NumPy."""
+
+    def __init__(self, rate=RATE, fft_size=CHUNK, bands=12, low_hz=60.0, high_hz=8000.0,
+                 floor_db=-60.0, full_scale=FULL_SCALE_RMS):
+        self.full_scale = full_scale
+        self.floor_db = floor_db
+        self.fft_size = fft_size
+        self.window = np.hanning(fft_size).astype(np.float32)
+        # scale so a full-scale sine reads 0 dB
+        self._norm = 2.0 / (self.window.sum() * 32768.0)
+        freqs = np.fft.rfftfreq(fft_size, 1.0 / rate)
+        edges = np.geomspace(low_hz, min(high_hz, rate / 2), bands + 1)
+        self._bins = np.clip(np.searchsorted(freqs, edges), 1, len(freqs) - 1)
+        # every band gets at least one FFT bin
+        self._bins[1:] = np.maximum(self._bins[1:], self._bins[:-1] + 1)
+        self._bins = np.minimum(self._bins, len(freqs))
+
+    def measure(self, samples, spectrum_samples=None):
+        x = samples.astype(np.float32)
+        rms = math.sqrt(float(np.dot(x, x)) / len(x)) if len(x) else 0.0
+        peak = int(np.max(np.abs(x))) if len(x) else 0
+        bands = None
+        if spectrum_samples is not None and len(spectrum_samples) == self.fft_size:
+            mag = np.abs(np.fft.rfft(spectrum_samples.astype(np.float32) * self.window)) * self._norm
+            band_mag = np.maximum.reduceat(mag, self._bins[:-1])[:len(self._bins) - 1]
+            db = 20 * np.log10(band_mag + 1e-9)
+            bands = np.clip(1 - db / self.floor_db, 0.0, 1.0).astype(np.float32)
+        return AudioLevels(rms, peak, min(rms / self.full_scale, 1.0), bands, time.monotonic())
+
+
+class PythonLevelMeter:
+    """RMS and peak of int16 samples without NumPy (no FFT bands)."""
+
+    fft_size = None
+
+    def __init__(self, full_scale=FULL_SCALE_RMS):
+        self.full_scale = full_scale
+
+    def measure(self, samples, spectrum_samples=None):
+        n = len(samples)
+        if not n:
+            return AudioLevels(at=time.monotonic())
+        sum_squares = 0.0
+        peak = 0
+        for s in samples:
+            sum_squares += s * s
+            if abs(s) > peak:
+                peak = abs(s)
+        rms = math.sqrt(sum_squares / n)
+        return AudioLevels(rms, peak, min(rms / self.full_scale, 1.0), None, time.monotonic())
+
+
+# -------------------- SOURCES --------------------
+class PyAudioSource:
+    """Default input device as paInt16 mono chunks."""
+
+    def __init__(self, rate=RATE, chunk=CHUNK, device_index=None):
+        self.rate = rate
+        self.chunk = chunk
+        self.device_index = device_index
+        self._pa = None
+        self._stream = None
+
+    def open(self):
+        if self._pa is None:
+            self._pa = pyaudio.PyAudio()
+        self._stream = self._pa.open(format=pyaudio.paInt16, channels=1, rate=self.rate, input=True,
+                                     frames_per_buffer=self.chunk, input_device_index=self.device_index)
+
+    def read(self):
+        """bytes of one chunk; blocks for about chunk / rate seconds."""
+        return self._stream.read(self.chunk, exception_on_overflow=False)
+
+    def close(self):
+        if self._stream is not None:
+            try:
+                self._stream.stop_stream()
+                self._stream.close()
+            except Exception:
+                pass
+            self._stream = None
+
+    def terminate(self):
+        self.close()
+        if self._pa is not None:
+            self._pa.terminate()
+            self._pa = None
+
+
+class SyntheticSource:
+    """Speech-like bursts (a few harmonics + noise under a syllable envelope), in real time."""
+
+    def __init__(self, rate=RATE, chunk=CHUNK, seed=0, realtime=True):
+        self.rate = rate
+        self.chunk = chunk
+        self.realtime = realtime
+        self._rng = np.random.default_rng(seed)
+        self._pos = 0
+        self._next_at = None
+
+    def open(self):
+        self._next_at = time.monotonic()
+
+    def read(self):
+        t = (self._pos + np.arange(self.chunk)) / self.rate
+        self._pos += self.chunk
+        pitch = 140 + 30 * np.sin(2 * math.pi * 0.3 * t)
+        voice = sum(np.sin(2 * math.pi * pitch * k * t) / k for k in (1, 2, 3, 4))
+        # ~4 syllables a second, in 2 s phrases separated by 1 s pauses
+        envelope = np.maximum(np.sin(2 * math.pi * 2 * t), 0) * ((t % 3.0) < 2.0)
+        signal = 4000 * envelope * voice + self._rng.normal(0, 60, self.chunk)
+        if self.realtime:
+            self._next_at += self.chunk / self.rate
+            delay = self._next_at - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return np.clip(signal, -32768, 32767).astype(np.int16).tobytes()
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        pass
+
+
+def make_source(synthetic=False, **options):
+    """SyntheticSource if asked for, else PyAudioSource; None when neither can run."""
+    if synthetic:
+        if not NUMPY_AVAILABLE:
+            print("[AUDIO] The synthetic source needs NumPy; no audio input")
+            return None
+        return SyntheticSource(**options)
+    if not PYAUDIO_AVAILABLE:
+        # never fake a live microphone: the HUD stays silent instead
+        print("[AUDIO] PyAudio is not installed; no audio input (SIDD_SYNTHETIC_AUDIO=1 for a test signal)")
+        return None
+    return PyAudioSource(**options)
+
+
+# -------------------- MONITOR --------------------
+class AudioMonitor:
+    """Capture thread: source -> ring buffer -> AudioLevels snapshot."""
+
+    def __init__(self, source, meter=None, history_seconds=1.0, reopen_delay=0.5, max_reopen_delay=5.0):
+        self.source = source
+        if meter is None:
+            meter = LevelMeter(rate=source.rate, fft_size=source.chunk) if NUMPY_AVAILABLE else PythonLevelMeter()
+        self.meter = meter
+        # the ring only feeds the FFT window
+        self.ring = RingBuffer(int(source.rate * history_seconds)) if NUMPY_AVAILABLE else None
+        self.reopen_delay = reopen_delay
+        self.max_reopen_delay = max_reopen_delay
+        self._levels = AudioLevels()
+        self._thread = None
+        self._running = False
+        self._release_lock = threading.Lock()
+        self._released = False
+        self.chunks = 0
+        self.errors = 0
+        self.reopens = 0
+        self.measure_seconds = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="audio-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop capturing; returns False if the thread is still busy (e.g. in a reopen backoff).
+
+        The source is only terminated once the capture thread has exited;
+        if that takes longer than timeout, the thread terminates it itself.
+        """
+        self._running = False
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+            self._thread = None
+        self._release()
+        return True
+
+    def _release(self):
+        with self._release_lock:
+            if not self._released:
+                self._released = True
+                self.source.terminate()
+
+    def latest(self):
+        """Newest AudioLevels; never blocks."""
+        return self._levels
+
+    def _open(self):
+        """Open the source, retrying with backoff; returns False once stopped."""
+        delay = self.reopen_delay
+        while self._running:
+            try:
+                self.source.open()
+                return True
+            except Exception as e:
+                print("Audio open failed:", repr(e))
+                # sleep in short steps so stop() is noticed during a long backoff
+                deadline = time.monotonic() + delay
+                while self._running and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                delay = min(delay * 2, self.max_reopen_delay)
+        return False
+
+    def _run(self):
+        try:
+            self._capture()
+        finally:
+            # also released here in case stop() gave up waiting for this thread
+            self._release()
+
+    def _capture(self):
+        if not self._open():
+            return
+        expected = self.source.chunk * 2        # paInt16 -> 2 bytes per frame
+        while self._running:
+            try:
+                data = self.source.read()
+            except Exception as e:
+                # the HUD keeps showing silence while the stream is reopened here
+                print("Audio read error:", repr(e))
+                self.errors += 1
+                self._levels = AudioLevels(at=time.monotonic())
+                self.source.close()
+                self.reopens += 1
+                if not self._open():
+                    return
+                continue
+            if len(data) != expected:
+                data = data[:expected].ljust(expected, b'\x00')
+            start = time.perf_counter()
+            if self.ring is not None:
+                samples = np.frombuffer(data, dtype=np.int16)
+                self.ring.write(samples)
+                self._levels = self.meter.measure(samples, self.ring.latest(self.meter.fft_size))
+            else:
+                self._levels = self.meter.measure(array.array('h', data))
+            self.measure_seconds += time.perf_counter() - start
+            self.chunks += 1
+
+    def stats(self):
+        avg_us = self.measure_seconds / self.chunks * 1e6 if self.chunks else 0.0
+        return {
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "reopens": self.reopens,
+            "avg_measure_us": round(avg_us, 1),
+        }
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(chunks=500, seconds=1.0):
+    """Per-chunk cost: struct.unpack + Python RMS loop vs NumPy levels; then a live synthetic run."""
+    import struct
+
+    if not NUMPY_AVAILABLE:
+        print("NumPy not available, skipping audio benchmark")
+        return
+    source = SyntheticSource(realtime=False)
+    blocks = [source.read() for _ in range(chunks)]
+
+    start = time.perf_counter()
+    for data in blocks:
+        samples = struct.unpack(f'{CHUNK}h', data)
+        sum_squares = 0.0
+        for s in samples:
+            sum_squares += s * s
+        math.sqrt(sum_squares / CHUNK)
+    python_us = (time.perf_counter() - start) / chunks * 1e6
+
+    meter = LevelMeter()
+    start = time.perf_counter()
+    for data in blocks:
+        samples = np.frombuffer(data, dtype=np.int16)
+        meter.measure(samples)
+    numpy_us = (time.perf_counter() - start) / chunks * 1e6
+
+    start = time.perf_counter()
+    for data in blocks:
+        samples = np.frombuffer(data, dtype=np.int16)
+        meter.measure(samples, samples)
+    fft_us = (time.perf_counter() - start) / chunks * 1e6
+
+    print(f"struct + Python RMS   : {python_us:7.1f} us/chunk")
+    print(f"NumPy RMS + peak      : {numpy_us:7.1f} us/chunk")
+    print(f"NumPy RMS + peak + FFT: {fft_us:7.1f} us/chunk")
+
+    monitor = AudioMonitor(SyntheticSource())
+    monitor.start()
+    reads = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        levels = monitor.latest()
+        reads.append(time.perf_counter() - start)
+        time.sleep(1 / 60)
+    monitor.stop()
+    print(f"latest() from a 60 FPS loop: max {max(reads) * 1e6:.1f} us")
+    print(f"last levels: amplitude {levels.amplitude:.2f}, peak {levels.peak}, "
+          f"bands {None if levels.bands is None else levels.bands.round(2).tolist()}")
+    print("monitor:", monitor.stats())
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -1,12 +1,12 @@
 import pygame
 import random
 import math
-import pyaudio
-import struct
 import os
 import sys
 import subprocess
 import threading
+import time
+from collections import OrderedDict
 
 # Optional: psutil for CPU monitoring
 try:
@@ -15,6 +15,16 @@ try:
 except Exception:
     PSUTIL_AVAILABLE = False
 
+# Optional: NumPy particle engine (falls back to one Dot object per dot)
+try:
+    import numpy as np
+    from sphere_particles import SphereParticles
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+from audio_monitor import AudioMonitor, make_source
+
 # ------------- GLOBALS THAT WILL BE UPDATED -------------
 WIDTH, HEIGHT = 500, 500
 CENTER_X, CENTER_Y = WIDTH // 2, HEIGHT // 2
@@ -29,14 +39,14 @@ SPHERE_OUTLINE_COLOR = (10, 10, 20)
 ROT_Y_SPEED = 0.4
 ROT_X_SPEED = 0.18
 
-NUM_DOTS = 2000          # number of dots
+NUM_DOTS = 2000          # number of dots (the NumPy engine handles 20k+ at 60 FPS)
 GOLD = (255, 215, 0)
 
 # Audio config (still used to react the HUD)
 CHUNK = 1024
-FORMAT = pyaudio.paInt16
-CHANNELS = 1
 RATE = 44100
+# Set SIDD_SYNTHETIC_AUDIO=1 to animate the HUD from a generated signal (no microphone)
+SYNTHETIC_AUDIO = os.environ.get("SIDD_SYNTHETIC_AUDIO") == "1"
 
 # --------- THEMES (for HUD inner colors) ---------
 # Outer HUD stays cyan; only inner HUD colors change
@@ -174,6 +184,117 @@ def draw_dot(surface, x, y, radius, color):
     pygame.draw.circle(surface, color, (x, y), radius)
 
 
+# -------------------- DOT SPRITE ATLAS --------------------
+DEPTH_BUCKETS = 16       # shades of the dot color between far and near
+DOT_RADII = (2, 3, 4)
+
+
+class DotAtlas:
+    """Pre-rendered dot sprites for every (depth bucket, radius).
+
+    Dot color only depends on depth and the radius is one of a few sizes,
+    so nothing has to be rasterized per dot. draw() stamps the sprites'
+    pixel patterns straight into a 32-bit surface with one NumPy scatter;
+    other surfaces get a single Surface.blits() call with the sprites.
+    """
+
+    def __init__(self, color=GOLD, radii=DOT_RADII, buckets=DEPTH_BUCKETS):
+        self.color = color
+        self.radii = tuple(radii)
+        self.buckets = buckets
+        self.sprites = []        # flat: bucket * len(radii) + radius index
+        self.shades = []         # RGB per depth bucket
+        self.stamps = []         # per radius: (dy, dx) offsets of the sprite's pixels
+        self._mapped = {}        # surface pixel format -> mapped shade per bucket
+        self.build()
+
+    def build(self):
+        """(Re)render the sprites; call again when the color or display changes."""
+        convert = pygame.display.get_surface() is not None
+        self.sprites = []
+        self.shades = []
+        self._mapped = {}
+        for b in range(self.buckets):
+            depth = (b + 0.5) / self.buckets
+            brightness = 0.5 + depth * 0.7
+            shade = tuple(min(255, int(c * brightness)) for c in self.color)
+            self.shades.append(shade)
+            for r in self.radii:
+                sprite = pygame.Surface((r * 2 + 1, r * 2 + 1))
+                sprite.fill((0, 0, 0))
+                pygame.draw.circle(sprite, shade, (r, r), r)
+                sprite.set_colorkey((0, 0, 0), pygame.RLEACCEL)
+                self.sprites.append(sprite.convert() if convert else sprite)
+        self.stamps = []
+        for i, r in enumerate(self.radii):
+            sprite = self.sprites[i]
+            mask = pygame.surfarray.array2d(sprite).T != sprite.map_rgb(sprite.get_colorkey())
+            dy, dx = np.nonzero(mask)
+            self.stamps.append((dy - r, dx - r))
+
+    def set_color(self, color):
+        if color != self.color:
+            self.color = color
+            self.build()
+
+    def _keys(self, proj):
+        bucket = np.minimum((proj.depth * self.buckets).astype(np.int32), self.buckets - 1)
+        size = np.searchsorted(self.radii, np.clip(proj.radius, self.radii[0], self.radii[-1]))
+        return bucket, size
+
+    def blit_sequence(self, proj):
+        """[(sprite, (x, y))] for a sphere_particles.Projection, in draw order."""
+        bucket, size = self._keys(proj)
+        key = bucket * len(self.radii) + size
+        radius = np.asarray(self.radii)[size]
+        sprites = self.sprites
+        return [(sprites[k], (x, y)) for k, x, y in
+                zip(key.tolist(), (proj.sx - radius).tolist(), (proj.sy - radius).tolist())]
+
+    def draw(self, surface, proj):
+        """Draw a whole frame of dots onto surface, farthest first."""
+        if not len(proj):
+            return
+        if surface.get_bytesize() == 4 and len(set(proj.radius.tolist())) == 1:
+            pixels = pygame.surfarray.pixels2d(surface).T   # rows x columns view of the pixels
+            if pixels.flags.c_contiguous:
+                edge = self._stamp(surface, pixels.reshape(-1), proj)
+                del pixels                                   # unlock the surface before blitting
+                if edge:
+                    surface.blits(edge, doreturn=False)
+                return
+            del pixels
+        surface.blits(self.blit_sequence(proj), doreturn=False)
+
+    def _stamp(self, surface, flat, proj):
+        width, height = surface.get_size()
+        bucket, size = self._keys(proj)
+        dy, dx = self.stamps[size[0]]
+        r = self.radii[size[0]]
+        inside = (proj.sx >= r) & (proj.sx < width - r) & (proj.sy >= r) & (proj.sy < height - r)
+
+        fmt = (surface.get_bitsize(), surface.get_masks())
+        mapped = self._mapped.get(fmt)
+        if mapped is None:
+            mapped = self._mapped[fmt] = np.array([surface.map_rgb(c) for c in self.shades], dtype=np.uint32)
+
+        # one index per sprite pixel; later (nearer) dots overwrite earlier ones
+        base = proj.sy[inside].astype(np.int64) * width + proj.sx[inside]
+        index = (base[:, None] + (dy * width + dx)[None, :]).ravel()
+        flat[index] = np.repeat(mapped[bucket[inside]], len(dx))
+
+        # the few dots touching the border are left to blit, which clips them
+        edge = ~inside
+        key = bucket[edge] * len(self.radii) + size[edge]
+        return [(self.sprites[k], (x - r, y - r)) for k, x, y in
+                zip(key.tolist(), proj.sx[edge].tolist(), proj.sy[edge].tolist())]
+
+
+def draw_dots(surface, proj, atlas):
+    """Draw a whole frame of dots from the atlas."""
+    atlas.draw(surface, proj)
+
+
 # -------------------- UTILS --------------------
 def lerp(a, b, t):
     return int(a + (b - a) * t)
@@ -413,6 +534,74 @@ def listen_to_ai_backend(proc):
             print("AI listener error:", e)
             break
 
+# -------------------- FONTS & TEXT CACHE --------------------
+_FONTS = {}
+
+
+def get_font(name, size):
+    """SysFont resolved once per (name, size) and reused every frame."""
+    key = (name, size)
+    font = _FONTS.get(key)
+    if font is None:
+        font = _FONTS[key] = pygame.font.SysFont(name, size)
+    return font
+
+
+class TextCache:
+    """LRU caches of rendered text surfaces and wrapped-line layouts.
+
+    Keys include the font object (fonts come from get_font, so the same
+    (name, size) is always the same object), the text and the color or
+    wrap width. Panels re-draw the same labels and messages every frame;
+    only text that actually changed gets rendered or measured again.
+    """
+
+    def __init__(self, max_surfaces=512, max_layouts=128):
+        self.max_surfaces = max_surfaces
+        self.max_layouts = max_layouts
+        self._surfaces = OrderedDict()
+        self._layouts = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def _get(self, cache, key, limit, make):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = cache[key] = make()
+        if len(cache) > limit:
+            cache.popitem(last=False)
+        return value
+
+    def render(self, font, text, color):
+        """Antialiased font.render(text), cached by (font, text, color)."""
+        return self._get(self._surfaces, (font, text, color), self.max_surfaces,
+                         lambda: font.render(text, True, color))
+
+    def wrap(self, font, text, max_width):
+        """wrap_text_lines(font, text, max_width), cached by (font, text, width)."""
+        return self._get(self._layouts, (font, text, max_width), self.max_layouts,
+                         lambda: tuple(wrap_text_lines(font, text, max_width)))
+
+    def clear(self):
+        self._surfaces.clear()
+        self._layouts.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+text_cache = TextCache()
+
+
+def render_text(font, text, color):
+    return text_cache.render(font, text, color)
+
+
 # Wrap Text
 def wrap_text_lines(font, text, max_width):
     words = text.split()
@@ -441,9 +630,9 @@ def draw_conversation_panel(surface, x, y, w, h):
     text_primary = (220, 230, 255)
     text_dim = (150, 170, 210)
 
-    font_title = pygame.font.SysFont("consolas", 16)
-    font_small = pygame.font.SysFont("consolas", 14)
-    font_tiny = pygame.font.SysFont("consolas", 12)
+    font_title = get_font("consolas", 16)
+    font_small = get_font("consolas", 14)
+    font_tiny = get_font("consolas", 12)
 
     panel_rect = pygame.Rect(x, y, w, h)
     pygame.draw.rect(surface, panel_bg, panel_rect, border_radius=10)
@@ -456,11 +645,11 @@ def draw_conversation_panel(surface, x, y, w, h):
 
     # ---------- HEADER ----------
     surface.blit(
-        font_title.render("CONVERSATION", True, text_primary),
+        render_text(font_title, "CONVERSATION", text_primary),
         (content_x, content_y),
     )
     surface.blit(
-        font_tiny.render("YOU  ⇄  SIDD", True, text_dim),
+        render_text(font_tiny, "YOU  ⇄  SIDD", text_dim),
         (content_x, content_y + 20),
     )
 
@@ -500,7 +689,7 @@ def draw_conversation_panel(surface, x, y, w, h):
         s_color = (0, 220, 255) if speaker.upper() == "SIDD" else (200, 210, 255)
 
         # wrap message into multiple lines
-        wrapped_lines = wrap_text_lines(font_small, text, text_max_w)
+        wrapped_lines = text_cache.wrap(font_small, text, text_max_w)
 
         for i, line_text in enumerate(wrapped_lines):
             if line_y > bottom_limit:
@@ -508,10 +697,10 @@ def draw_conversation_panel(surface, x, y, w, h):
 
             # first line: show speaker label; next lines: just indent
             if i == 0:
-                speaker_surface = font_small.render(f"{speaker}:", True, s_color)
+                speaker_surface = render_text(font_small, f"{speaker}:", s_color)
                 surface.blit(speaker_surface, (content_x, line_y))
             # message text
-            text_surface = font_small.render(line_text, True, text_primary)
+            text_surface = render_text(font_small, line_text, text_primary)
             surface.blit(text_surface, (text_x, line_y))
 
             line_y += line_h
@@ -521,23 +710,82 @@ def draw_conversation_panel(surface, x, y, w, h):
 
     # ---------- FOOTER ----------
     footer_text = "Press K to add demo lines"
-    footer_surface = font_tiny.render(footer_text, True, text_dim)
+    footer_surface = render_text(font_tiny, footer_text, text_dim)
     surface.blit(
         footer_surface,
         (content_x, y + h - pad - 12),
     )
 
-def draw_system_performance(surface, x, y, w):
-    font_title = pygame.font.SysFont("consolas", 16)
-    font_small = pygame.font.SysFont("consolas", 14)
-    font_tiny = pygame.font.SysFont("consolas", 12)
+SYSTEM_STATS_INTERVAL = 1.0   # seconds between psutil (and text cache counter, fps) samples
+_system_stats = None
+_system_stats_at = 0.0
+
+
+_text_cache_stats = None
+_text_cache_stats_at = 0.0
+
+_fps_sample = None
+_fps_sample_at = 0.0
+
+
+def sample_fps(fps, now=None):
+    """Whole-number fps, sampled at most once per interval.
+
+    clock.get_fps() wobbles by a frame or two all the time; showing it live
+    would re-render the analytics panel on nearly every frame.
+    """
+    global _fps_sample, _fps_sample_at
+    now = time.monotonic() if now is None else now
+    if _fps_sample is None or now - _fps_sample_at >= SYSTEM_STATS_INTERVAL:
+        _fps_sample = int(fps)
+        _fps_sample_at = now
+    return _fps_sample
+
+
+def sample_text_cache_stats(now=None):
+    """(hit rate %, misses) of text_cache, sampled at most once per interval.
+
+    Drawing the line is itself a cache miss, so reading the live counters
+    would change the analytics panel on every frame.
+    """
+    global _text_cache_stats, _text_cache_stats_at
+    now = time.monotonic() if now is None else now
+    if _text_cache_stats is None or now - _text_cache_stats_at >= SYSTEM_STATS_INTERVAL:
+        _text_cache_stats = (round(text_cache.hit_rate() * 100), text_cache.misses)
+        _text_cache_stats_at = now
+    return _text_cache_stats
+
+
+def sample_system_stats(now=None):
+    """(cpu, memory, disk, network MB) from psutil, sampled at most once per interval."""
+    global _system_stats, _system_stats_at
+    if not PSUTIL_AVAILABLE:
+        return None
+    now = time.monotonic() if now is None else now
+    if _system_stats is None or now - _system_stats_at >= SYSTEM_STATS_INTERVAL:
+        net = psutil.net_io_counters()
+        net_mb = (net.bytes_sent + net.bytes_recv) / (1024 * 1024)
+        _system_stats = (
+            psutil.cpu_percent(),
+            psutil.virtual_memory().percent,
+            psutil.disk_usage('/').percent,
+            min(net_mb, 100.0),
+        )
+        _system_stats_at = now
+    return _system_stats
+
+
+def draw_system_performance(surface, x, y, w, stats=None):
+    font_title = get_font("consolas", 16)
+    font_small = get_font("consolas", 14)
+    font_tiny = get_font("consolas", 12)
 
     panel_bg = (10, 15, 35)
     panel_border = (40, 60, 120)
     text_color = (210, 225, 255)
     text_dim = (150, 170, 210)
 
-    h = 140
+    h = SYSTEM_PANEL_H
     rect = pygame.Rect(x, y, w, h)
 
     pygame.draw.rect(surface, panel_bg, rect, border_radius=10)
@@ -548,11 +796,11 @@ def draw_system_performance(surface, x, y, w):
     content_y = y + inner_pad
 
     # --- Header ---
-    title = font_title.render("SYSTEM PERFORMANCE", True, text_color)
+    title = render_text(font_title, "SYSTEM PERFORMANCE", text_color)
     surface.blit(title, (content_x, content_y))
 
     # small "LIVE" badge on the right
-    live_text = font_tiny.render("LIVE", True, (0, 220, 255))
+    live_text = render_text(font_tiny, "LIVE", (0, 220, 255))
     live_box = live_text.get_rect()
     live_box.top = content_y + 2
     live_box.right = x + w - inner_pad
@@ -569,37 +817,32 @@ def draw_system_performance(surface, x, y, w):
         1,
     )
 
-    if not PSUTIL_AVAILABLE:
-        msg = font_small.render("psutil not available", True, text_color)
+    if stats is None:
+        stats = sample_system_stats()
+    if stats is None:
+        msg = render_text(font_small, "psutil not available", text_color)
         surface.blit(msg, (content_x, divider_y + 8))
         return
 
-    cpu = psutil.cpu_percent()
-    mem = psutil.virtual_memory().percent
-    disk = psutil.disk_usage('/').percent
-    net = psutil.net_io_counters()
-    net_mb = (net.bytes_sent + net.bytes_recv) / (1024 * 1024)
-
     labels = ["CPU", "MEMORY", "DISK", "NETWORK"]
-    values = [cpu, mem, disk, min(net_mb, 100.0)]
+    values = list(stats)
     units = ["%", "%", "%", "MB"]
 
     row_y = divider_y + 10
     row_gap = 22
 
     label_col_x = content_x
-    value_col_x = x + w - inner_pad - 40  # right-aligned numeric text
     bar_x = content_x + 70
     bar_w = w - (bar_x - x) - inner_pad
 
     for i in range(4):
         # label
-        label_surf = font_small.render(f"{labels[i]} :", True, text_dim)
+        label_surf = render_text(font_small, f"{labels[i]} :", text_dim)
         surface.blit(label_surf, (label_col_x, row_y))
 
         # numeric value (right-aligned)
         val_str = f"{values[i]:5.1f}{units[i]}"
-        val_surf = font_small.render(val_str, True, text_color)
+        val_surf = render_text(font_small, val_str, text_color)
         val_rect = val_surf.get_rect()
         val_rect.right = x + w - inner_pad
         val_rect.top = row_y
@@ -628,123 +871,278 @@ def draw_system_performance(surface, x, y, w):
         row_y += row_gap
 
 # -------------------- ANALYTICS PANELS OUTSIDE SPHERE --------------------
-def draw_analytics(surface, t, amplitude, fps):
-    global current_theme, ULTRA_BOLD
-
-    # --- Colors ---
-    panel_bg = (10, 15, 35)
-    panel_border = (40, 60, 120)
-    text_color = (200, 220, 255)
-
+PANEL_BG = (10, 15, 35)
+PANEL_BORDER = (40, 60, 120)
+PANEL_TEXT = (200, 220, 255)
+AMPLITUDE_STEP = 0.05         # resolution of the amplitude shown in the analytics panel
+SYSTEM_PANEL_H = 140
+
+
+def hud_layout():
+    """Screen rects of every HUD panel for the current window size."""
+    info = pygame.Rect(20, 20, 230, 128)
+    conversation = pygame.Rect(info.x, info.bottom + 12, info.w, HEIGHT - (info.bottom + 40))  # 40 = bottom margin
+    voice = pygame.Rect(CENTER_X - 160, HEIGHT - 16 - 30, 320, 16)
+    graph = pygame.Rect(WIDTH - 220 - 20, HEIGHT - 120 - 30, 220, 120)
+    # same width, directly above graph, 10px gap
+    system = pygame.Rect(graph.x, graph.y - SYSTEM_PANEL_H - 10, graph.w, SYSTEM_PANEL_H)
+    # dots reach about 1.17 radii from the center after projection
+    reach = int(SPHERE_RADIUS * 1.2) + 6
+    sphere = pygame.Rect(CENTER_X - reach, CENTER_Y - reach, reach * 2, reach * 2)
+    return {
+        "info": info,
+        "conversation": conversation,
+        "voice": voice,
+        "graph": graph,
+        "graph_bars": graph.inflate(-2, -2).clip(pygame.Rect(graph.x, graph.y + 24, graph.w, graph.h)),
+        "system": system,
+        "sphere": sphere.clip(pygame.Rect(0, 0, WIDTH, HEIGHT)),
+    }
+
+
+def draw_info_panel(surface, rect, amplitude, fps):
     theme = THEMES.get(current_theme, THEMES[1])
-    theme_name = theme["name"]
-    amp_pct = int(amplitude * 100)
-
-    # smoother amp for visuals
-    amp_visual = min(max(amplitude, 0.0), 1.0) ** 0.8
-
-    # --- FONT ---
-    font_small = pygame.font.SysFont("consolas", 16)
-    font_tiny = pygame.font.SysFont("consolas", 13)
+    font_small = get_font("consolas", 16)
 
-    # ---------- TOP-LEFT: ANALYTICS PANEL ----------
-    info_w, info_h = 230, 110
-    info_x, info_y = 20, 20
-    info_rect = pygame.Rect(info_x, info_y, info_w, info_h)
-
-    pygame.draw.rect(surface, panel_bg, info_rect, border_radius=8)
-    pygame.draw.rect(surface, panel_border, info_rect, 1, border_radius=8)
+    pygame.draw.rect(surface, PANEL_BG, rect, border_radius=8)
+    pygame.draw.rect(surface, PANEL_BORDER, rect, 1, border_radius=8)
 
+    hit_pct, misses = sample_text_cache_stats()
     lines = [
         "SIDD AI — ANALYTICS",
-        f"Theme: {theme_name}",
+        f"Theme: {theme['name']}",
         f"Ultra-Bold: {'ON' if ULTRA_BOLD else 'OFF'}",
-        f"Amplitude: {amp_pct:3d} %",
+        f"Amplitude: {round(amplitude * 100):3d} %",
         f"FPS: {int(fps):3d}",
+        f"Text cache: {hit_pct:3d}% ({misses} miss)",
     ]
     for i, text in enumerate(lines):
-        surf = font_small.render(text, True, text_color)
-        surface.blit(surf, (info_x + 10, info_y + 8 + i * 18))
+        surf = render_text(font_small, text, PANEL_TEXT)
+        surface.blit(surf, (rect.x + 10, rect.y + 8 + i * 18))
 
-    # ---------- CONVERSATION UNDER ANALYTICS ----------
-    conv_x = info_x
-    conv_y = info_y + info_h + 12
-    conv_w = info_w
-    # height until roughly mid-screen or just above sphere bottom
-    conv_h = HEIGHT - (info_y + info_h + 40)   # 40 = bottom margin
-    draw_conversation_panel(surface, conv_x, conv_y, conv_w, conv_h)
 
-    # ---------- BOTTOM-CENTER AUDIO LEVEL BAR ----------
-    bar_w, bar_h = 320, 16
-    bar_x = CENTER_X - bar_w // 2
-    bar_y = HEIGHT - bar_h - 30
+def draw_voice_frame(surface, rect):
+    pygame.draw.rect(surface, PANEL_BG, rect, border_radius=8)
+    pygame.draw.rect(surface, PANEL_BORDER, rect, 1, border_radius=8)
+    label = render_text(get_font("consolas", 13), "VOICE LEVEL", PANEL_TEXT)
+    surface.blit(label, (rect.x, rect.y - 16))
 
-    outer_bar = pygame.Rect(bar_x, bar_y, bar_w, bar_h)
-    pygame.draw.rect(surface, panel_bg, outer_bar, border_radius=8)
-    pygame.draw.rect(surface, panel_border, outer_bar, 1, border_radius=8)
 
+def draw_voice_level(surface, rect, amplitude):
     # fill based on amplitude
-    fill_w = int(bar_w * amp_visual)
+    amp_visual = min(max(amplitude, 0.0), 1.0) ** 0.8
+    fill_w = int(rect.w * amp_visual)
     if fill_w > 0:
         # green → yellow → red based on amplitude
         low = (80, 200, 120)
         high = (255, 80, 80)
         fill_color = mix_color(low, high, amp_visual)
         inner_bar = pygame.Rect(
-            bar_x + 2,
-            bar_y + 2,
+            rect.x + 2,
+            rect.y + 2,
             fill_w - 4 if fill_w > 4 else 0,
-            bar_h - 4,
+            rect.h - 4,
         )
         if inner_bar.width > 0:
             pygame.draw.rect(surface, fill_color, inner_bar, border_radius=6)
 
-    # label
-    label = font_tiny.render("VOICE LEVEL", True, text_color)
-    surface.blit(label, (bar_x, bar_y - 16))
-
-    # ---------- BOTTOM-RIGHT: REAL-TIME SIGNAL ----------
-    graph_w, graph_h = 220, 120
-    graph_x = WIDTH - graph_w - 20
-    graph_y = HEIGHT - graph_h - 30
 
-    graph_rect = pygame.Rect(graph_x, graph_y, graph_w, graph_h)
-    pygame.draw.rect(surface, panel_bg, graph_rect, border_radius=8)
-    pygame.draw.rect(surface, panel_border, graph_rect, 1, border_radius=8)
+def draw_signal_frame(surface, rect):
+    pygame.draw.rect(surface, PANEL_BG, rect, border_radius=8)
+    pygame.draw.rect(surface, PANEL_BORDER, rect, 1, border_radius=8)
+    g_label = render_text(get_font("consolas", 13), "REAL-TIME SIGNAL", PANEL_TEXT)
+    surface.blit(g_label, (rect.x + 8, rect.y + 6))
 
-    g_label = font_tiny.render("REAL-TIME SIGNAL", True, text_color)
-    surface.blit(g_label, (graph_x + 8, graph_y + 6))
 
-    # ---------- SYSTEM PERFORMANCE ABOVE REAL-TIME SIGNAL ----------
-    # same width, directly above graph
-    sys_w = graph_w
-    sys_h = 140  # same as in draw_system_performance
-    sys_x = graph_x
-    sys_y = graph_y - sys_h - 10  # 10px gap above graph
-    draw_system_performance(surface, sys_x, sys_y, sys_w)
+def draw_signal_bars(surface, rect, t, amplitude, bands=None):
+    """Signal bars: FFT band levels when available, otherwise a wave scaled by amplitude."""
+    theme = THEMES.get(current_theme, THEMES[1])
+    amp_visual = min(max(amplitude, 0.0), 1.0) ** 0.8
 
     # bars inside REAL-TIME SIGNAL panel
     num_bars = 12
     gap = 4
-    bar_width = (graph_w - (num_bars + 1) * gap) // num_bars
+    bar_width = (rect.w - (num_bars + 1) * gap) // num_bars
     time_factor = t * 0.004
 
     quiet_color = theme["quiet_core"]
     loud_color = theme["loud_core"]
 
     for i in range(num_bars):
-        phase = time_factor + i * 0.6
-        base_wave = (math.sin(phase) + 1) / 2  # 0..1
-        # scale by amplitude
-        value = (0.25 + 0.75 * amp_visual) * base_wave
-        h = int((graph_h - 40) * value)
-        bx = graph_x + gap + i * (bar_width + gap)
-        by = graph_y + graph_h - 10 - h
+        if bands is not None and len(bands) == num_bars:
+            value = float(bands[i])
+        else:
+            phase = time_factor + i * 0.6
+            base_wave = (math.sin(phase) + 1) / 2  # 0..1
+            # scale by amplitude
+            value = (0.25 + 0.75 * amp_visual) * base_wave
+        h = int((rect.h - 40) * value)
+        bx = rect.x + gap + i * (bar_width + gap)
+        by = rect.y + rect.h - 10 - h
 
         color = mix_color(quiet_color, loud_color, value)
         pygame.draw.rect(surface, color, (bx, by, bar_width, h), border_radius=4)
 
 
+def draw_analytics(surface, t, amplitude, fps):
+    """Every panel around the sphere, drawn immediately (no layer caching)."""
+    layout = hud_layout()
+    draw_info_panel(surface, layout["info"], amplitude, fps)
+
+    # ---------- CONVERSATION UNDER ANALYTICS ----------
+    conv = layout["conversation"]
+    draw_conversation_panel(surface, conv.x, conv.y, conv.w, conv.h)
+
+    # ---------- BOTTOM-CENTER AUDIO LEVEL BAR ----------
+    draw_voice_frame(surface, layout["voice"])
+    draw_voice_level(surface, layout["voice"], amplitude)
+
+    # ---------- BOTTOM-RIGHT: REAL-TIME SIGNAL ----------
+    draw_signal_frame(surface, layout["graph"])
+
+    # ---------- SYSTEM PERFORMANCE ABOVE REAL-TIME SIGNAL ----------
+    system = layout["system"]
+    draw_system_performance(surface, system.x, system.y, system.w)
+
+    draw_signal_bars(surface, layout["graph"], t, amplitude)
+
+
+# -------------------- LAYERED COMPOSITING --------------------
+class Layer:
+    """Offscreen surface re-rendered only when its rect or key changes."""
+
+    def __init__(self, name, render):
+        self.name = name
+        self.render = render            # render(surface, rect) draws at (0, 0)
+        self.surface = None
+        self.rect = None
+        self.key = None
+        self.renders = 0
+        self.render_seconds = 0.0
+        self.last_ms = 0.0
+
+    def refresh(self, rect, key):
+        """Bring the surface up to date; returns True if it was re-rendered."""
+        if self.surface is not None and rect == self.rect and key == self.key:
+            return False
+        start = time.perf_counter()
+        if self.surface is None or self.surface.get_size() != rect.size:
+            self.surface = pygame.Surface(rect.size)
+        self.surface.fill(BG_COLOR)
+        self.render(self.surface, rect)
+        self.rect = pygame.Rect(rect)
+        self.key = key
+        elapsed = time.perf_counter() - start
+        self.renders += 1
+        self.render_seconds += elapsed
+        self.last_ms = elapsed * 1000
+        return True
+
+    def stats(self):
+        avg_ms = self.render_seconds / self.renders * 1000 if self.renders else 0.0
+        return {"renders": self.renders, "avg_ms": round(avg_ms, 2), "last_ms": round(self.last_ms, 2)}
+
+
+class HudCompositor:
+    """Static chrome, event-driven panels and a per-frame dynamic layer.
+
+    chrome       background, sphere outline and the frames of the voice bar
+                 and signal graph; re-rendered on resize or theme change
+    panels       analytics, conversation and system performance, each on
+                 its own surface, re-rendered when what they show changes
+    dynamic      dots, HUD rings, voice level and signal bars, drawn every
+                 frame over a copy of the chrome behind them
+
+    frame() returns the rects that changed, for pygame.display.update().
+    """
+
+    def __init__(self):
+        self.chrome = Layer("chrome", self._render_chrome)
+        self.info = Layer("analytics", self._render_info)
+        self.conversation = Layer("conversation", self._render_conversation)
+        self.system = Layer("system", self._render_system)
+        self._amplitude = 0.0
+        self._fps = 0.0
+        self._stats = None
+        self.frames = 0
+        self.dynamic_seconds = 0.0
+        self.dynamic_last_ms = 0.0
+
+    # ---------- layer renderers (draw at the layer's origin) ----------
+    def _render_chrome(self, surface, rect):
+        layout = hud_layout()
+        pygame.draw.circle(surface, SPHERE_OUTLINE_COLOR, (CENTER_X, CENTER_Y), int(SPHERE_RADIUS * 0.9), 1)
+        draw_voice_frame(surface, layout["voice"])
+        draw_signal_frame(surface, layout["graph"])
+
+    def _render_info(self, surface, rect):
+        draw_info_panel(surface, pygame.Rect(0, 0, rect.w, rect.h), self._amplitude, self._fps)
+
+    def _render_conversation(self, surface, rect):
+        draw_conversation_panel(surface, 0, 0, rect.w, rect.h)
+
+    def _render_system(self, surface, rect):
+        draw_system_performance(surface, 0, 0, rect.w, self._stats)
+
+    # ---------- per frame ----------
+    def frame(self, screen, t, amplitude, fps, draw_sphere, bands=None):
+        """Composite one frame onto screen; returns the dirty rects."""
+        layout = hud_layout()
+        screen_rect = screen.get_rect()
+        full = self.chrome.refresh(screen_rect, (screen_rect.size, current_theme, ULTRA_BOLD))
+        if full:
+            screen.blit(self.chrome.surface, (0, 0))
+
+        # ---- dynamic layer: restore the chrome under it, then draw ----
+        start = time.perf_counter()
+        dynamic = [layout["sphere"], layout["voice"], layout["graph_bars"]]
+        for rect in dynamic:
+            screen.blit(self.chrome.surface, rect, rect)
+        screen.set_clip(layout["sphere"])
+        draw_sphere(screen)
+        # SIDD HUD always on top, inside sphere
+        draw_sidd_hud(screen, t, amplitude)
+        screen.set_clip(None)
+        draw_voice_level(screen, layout["voice"], amplitude)
+        screen.set_clip(layout["graph_bars"])
+        draw_signal_bars(screen, layout["graph"], t, amplitude, bands)
+        screen.set_clip(None)
+        elapsed = time.perf_counter() - start
+        self.frames += 1
+        self.dynamic_seconds += elapsed
+        self.dynamic_last_ms = elapsed * 1000
+
+        # ---- panels: re-render on change, re-blit if the sphere drew over them ----
+        # the panel shows amplitude in AMPLITUDE_STEP steps so it does not redraw for every flicker
+        self._amplitude = round(amplitude / AMPLITUDE_STEP) * AMPLITUDE_STEP
+        self._fps = sample_fps(fps)
+        self._stats = sample_system_stats()
+        panels = (
+            (self.info, layout["info"], (current_theme, ULTRA_BOLD, round(self._amplitude * 100), self._fps,
+                                         sample_text_cache_stats())),
+            (self.conversation, layout["conversation"], tuple(COMMANDS[-10:])),
+            (self.system, layout["system"], self._stats),
+        )
+        dirty = []
+        for layer, rect, key in panels:
+            changed = layer.refresh(rect, key)
+            if changed or full or rect.colliderect(layout["sphere"]):
+                screen.blit(layer.surface, rect)
+                dirty.append(rect)
+        return [screen_rect] if full else dynamic + dirty
+
+    def invalidate(self):
+        """Force a full redraw on the next frame."""
+        self.chrome.key = None
+
+    def stats(self):
+        avg_ms = self.dynamic_seconds / self.frames * 1000 if self.frames else 0.0
+        result = {layer.name: layer.stats() for layer in (self.chrome, self.info, self.conversation, self.system)}
+        result["dynamic"] = {"frames": self.frames, "avg_ms": round(avg_ms, 2),
+                             "last_ms": round(self.dynamic_last_ms, 2)}
+        return result
+
+
 # -------------------- MAIN LOOP --------------------
 def main():
     pygame.init()
@@ -787,17 +1185,20 @@ def main():
 
     clock = pygame.time.Clock()
 
-    dots = [Dot() for _ in range(NUM_DOTS)]
+    if NUMPY_AVAILABLE:
+        particles = SphereParticles(NUM_DOTS, color=GOLD)
+        atlas = DotAtlas(GOLD)
+    else:
+        dots = [Dot() for _ in range(NUM_DOTS)]
 
-    # ---- Audio setup ----
-    pa = pyaudio.PyAudio()
-    stream = pa.open(
-        format=FORMAT,
-        channels=CHANNELS,
-        rate=RATE,
-        input=True,
-        frames_per_buffer=CHUNK
-    )
+    # ---- Audio setup: captured and measured on its own thread ----
+    audio = None
+    source = make_source(synthetic=SYNTHETIC_AUDIO, rate=RATE, chunk=CHUNK)
+    if source is not None:
+        audio = AudioMonitor(source)
+        audio.start()
+
+    compositor = HudCompositor()
 
     rot_x = 0.0
     rot_y = 0.0
@@ -823,6 +1224,12 @@ def main():
                     new_w, new_h = event.w, event.h
                     recalc_layout(new_w, new_h)
                     screen = pygame.display.set_mode((new_w, new_h), pygame.RESIZABLE)
+                    if NUMPY_AVAILABLE:
+                        atlas.build()   # re-convert sprites to the new display format
+
+                # window uncovered / restored: push the whole frame again
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    compositor.invalidate()
 
                 # -------- THEME SWITCH KEYS (1–4) + ULTRA BOLD (U) --------
                 if event.type == pygame.KEYDOWN:
@@ -837,80 +1244,9 @@ def main():
                     elif event.key == pygame.K_u:
                         ULTRA_BOLD = not ULTRA_BOLD
                         
-            # ---- Read audio chunk & compute amplitude ----
-            def _open_stream():
-                """Try to (re)open the input stream with the same settings."""
-                return pa.open(
-                    format=FORMAT,
-                    channels=CHANNELS,
-                    rate=RATE,
-                    input=True,
-                    frames_per_buffer=CHUNK
-                )
-
-            # attempt to read, recover on error, and fallback to silent buffer
-            try:
-                data = stream.read(CHUNK, exception_on_overflow=False)
-            except Exception as e:
-                # log the error, attempt a graceful reopen, then fallback to silence
-                print("Audio read error:", repr(e))
-
-                # try to close & reopen once
-                try:
-                    try:
-                        stream.stop_stream()
-                    except Exception:
-                        pass
-                    try:
-                        stream.close()
-                    except Exception:
-                        pass
-                except Exception:
-                    pass
-
-                try:
-                    stream = _open_stream()
-                    print("Reopened audio stream.")
-                    data = stream.read(CHUNK, exception_on_overflow=False)
-                except Exception as e2:
-                    print("Reopen failed:", repr(e2))
-                    # fallback to a silent buffer (paInt16 -> 2 bytes per sample)
-                    data = b'\x00' * (CHUNK * 2)
-
-            # make sure data has expected length before unpacking
-            expected_bytes = CHUNK * 2  # paInt16 -> 2 bytes per frame
-            if len(data) < expected_bytes:
-                # pad if short
-                data = data.ljust(expected_bytes, b'\x00')
-            elif len(data) > expected_bytes:
-                # trim if too long
-                data = data[:expected_bytes]
-
-            # unpack safely (will produce CHUNK ints)
-            try:
-                samples = struct.unpack(f'{CHUNK}h', data)
-            except struct.error as e:
-                # worst-case: if unpack fails, treat as silence
-                print("struct.unpack error:", repr(e))
-                samples = (0,) * CHUNK
-
-            # RMS (root mean square) for volume — robust against all-zero samples
-            sum_squares = 0.0
-            for s in samples:
-                sum_squares += s * s
-            rms = math.sqrt(sum_squares / CHUNK) if CHUNK > 0 else 0.0
-
-            # Normalize RMS to [0,1] (tune 3000 for sensitivity)
-            amplitude = min(rms / 3000.0, 1.0)
-
-            # RMS (root mean square) for volume
-            sum_squares = 0.0
-            for s in samples:
-                sum_squares += s * s
-            rms = math.sqrt(sum_squares / CHUNK)
-
-            # Normalize RMS to [0,1] (tune 3000 for sensitivity)
-            amplitude = min(rms / 3000.0, 1.0)
+            # ---- Latest audio levels (never waits for the microphone) ----
+            levels = audio.latest() if audio is not None else None
+            amplitude = levels.amplitude if levels is not None else 0.0
 
             # ----- SPEAKING PULSE TRIGGER (on rising edge over threshold) -----
             if amplitude > VOICE_THRESHOLD and last_amplitude <= VOICE_THRESHOLD:
@@ -925,43 +1261,36 @@ def main():
             rot_x += ROT_X_SPEED * dt * 0.001
 
             # update dot positions
-            for d in dots:
-                d.update(dt, rot_x, rot_y)
-
-            # draw farthest first
-            dots_sorted = sorted(dots, key=lambda d: d.z)
+            if NUMPY_AVAILABLE:
+                particles.update(dt, rot_x, rot_y, SPHERE_RADIUS)
+            else:
+                for d in dots:
+                    d.update(dt, rot_x, rot_y)
 
             # ---- DRAW ----
-            screen.fill(BG_COLOR)
-
-            # sphere outline
-            pygame.draw.circle(
-                screen,
-                SPHERE_OUTLINE_COLOR,
-                (CENTER_X, CENTER_Y),
-                int(SPHERE_RADIUS * 0.9),
-                1
-            )
-
-            # sphere dots
-            for d in dots_sorted:
-                sx, sy, radius, color, depth = d.project()
-                if 0 <= sx < WIDTH and 0 <= sy < HEIGHT:
-                    draw_dot(screen, sx, sy, radius, color)
-
-            # SIDD HUD always on top, inside sphere
-            draw_sidd_hud(screen, t, amplitude)
-
-            # Working analytics around the sphere (includes commands panel & CPU)
+            def draw_sphere(surface):
+                # sphere dots, farthest first
+                if NUMPY_AVAILABLE:
+                    proj = particles.project(CENTER_X, CENTER_Y, SPHERE_RADIUS, SPHERE_RADIUS_BASE, FOV, WIDTH, HEIGHT)
+                    draw_dots(surface, proj, atlas)
+                else:
+                    for d in sorted(dots, key=lambda d: -d.z):
+                        sx, sy, radius, color, depth = d.project()
+                        if 0 <= sx < WIDTH and 0 <= sy < HEIGHT:
+                            draw_dot(surface, sx, sy, radius, color)
+
+            # Static chrome, panels (incl. commands & CPU) and the moving sphere/HUD;
+            # only the rects that changed are pushed to the display
             fps = clock.get_fps()
-            draw_analytics(screen, t, amplitude, fps)
-
-            pygame.display.flip()
+            dirty = compositor.frame(screen, t, amplitude, fps, draw_sphere,
+                                     bands=levels.bands if levels is not None else None)
+            pygame.display.update(dirty)
     finally:
+        print("[LAYERS]", compositor.stats())
         # clean up audio
-        stream.stop_stream()
-        stream.close()
-        pa.terminate()
+        if audio is not None:
+            print("[AUDIO]", audio.stats())
+            audio.stop()
         pygame.quit()
 
         # ---- STOP SIDD AI BACKEND ----
@@ -974,5 +1303,149 @@ def main():
                 print("Error terminating AI backend:", e)
 
 
+# -------------------- BENCHMARK --------------------
+def benchmark_particles(counts=(2000, 20000), frames=60):
+    """ms/frame of sphere update + projection + depth sort: Dot objects vs SphereParticles."""
+    recalc_layout(1280, 720)
+    print(f"{'dots':>6}  {'Dot class':>10}  {'NumPy':>8}")
+    for count in counts:
+        dots = [Dot() for _ in range(count)]
+        start = time.perf_counter()
+        for frame in range(frames):
+            for d in dots:
+                d.update(16, frame * 0.003, frame * 0.006)
+            for d in sorted(dots, key=lambda d: -d.z):
+                d.project()
+        dot_ms = (time.perf_counter() - start) / frames * 1000
+
+        numpy_ms = float("nan")
+        if NUMPY_AVAILABLE:
+            particles = SphereParticles(count)
+            start = time.perf_counter()
+            for frame in range(frames):
+                particles.update(16, frame * 0.003, frame * 0.006, SPHERE_RADIUS)
+                particles.project(CENTER_X, CENTER_Y, SPHERE_RADIUS, SPHERE_RADIUS_BASE, FOV, WIDTH, HEIGHT)
+            numpy_ms = (time.perf_counter() - start) / frames * 1000
+        print(f"{count:6d}  {dot_ms:8.2f}ms  {numpy_ms:6.2f}ms")
+
+
+def benchmark_drawing(counts=(2000, 10000, 50000), frames=30):
+    """ms/frame to draw the dots: pygame.draw.circle per dot vs one blits() from the atlas."""
+    if not NUMPY_AVAILABLE:
+        print("NumPy not available, skipping draw benchmark")
+        return
+    pygame.init()
+    recalc_layout(1280, 720)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    atlas = DotAtlas(GOLD)
+    print(f"{'dots':>6}  {'draw.circle':>11}  {'blits':>9}  {'pixel stamp':>11}")
+    for count in counts:
+        particles = SphereParticles(count, seed=1)
+        particles.update(16, 0.3, 0.6, SPHERE_RADIUS)
+        proj = particles.project(CENTER_X, CENTER_Y, SPHERE_RADIUS, SPHERE_RADIUS_BASE, FOV, WIDTH, HEIGHT)
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            surface.fill(BG_COLOR)
+            for sx, sy, radius, color in zip(proj.sx.tolist(), proj.sy.tolist(),
+                                             proj.radius.tolist(), proj.colors.tolist()):
+                draw_dot(surface, sx, sy, radius, color)
+        circle_ms = (time.perf_counter() - start) / frames * 1000
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            surface.fill(BG_COLOR)
+            surface.blits(atlas.blit_sequence(proj), doreturn=False)
+        blits_ms = (time.perf_counter() - start) / frames * 1000
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            surface.fill(BG_COLOR)
+            draw_dots(surface, proj, atlas)
+        stamp_ms = (time.perf_counter() - start) / frames * 1000
+        print(f"{count:6d}  {circle_ms:9.2f}ms  {blits_ms:7.2f}ms  {stamp_ms:9.2f}ms")
+
+
+def benchmark_text(frames=60):
+    """ms/frame for the text panels with and without the font registry and text cache."""
+    pygame.init()
+    recalc_layout(1280, 720)
+    surface = pygame.Surface((WIDTH, HEIGHT))
+    for i in range(20):
+        COMMANDS.append(("YOU" if i % 2 else "SIDD", f"Demo message number {i} with enough words to wrap the line."))
+
+    def run(cached):
+        start = time.perf_counter()
+        for _ in range(frames):
+            if not cached:
+                _FONTS.clear()
+                text_cache.clear()
+            draw_conversation_panel(surface, 20, 160, 230, 500)
+            draw_analytics(surface, 0, 0.3, 60)
+        return (time.perf_counter() - start) / frames * 1000
+
+    cold_ms = run(False)
+    warm_ms = run(True)
+    print(f"text panels: uncached {cold_ms:.2f} ms/frame, cached {warm_ms:.2f} ms/frame, "
+          f"hit rate {text_cache.hit_rate() * 100:.0f}%")
+
+
+def benchmark_layers(frames=120, count=NUM_DOTS):
+    """ms/frame: clear and redraw everything vs. the layered compositor, plus per-layer times."""
+    if not NUMPY_AVAILABLE:
+        print("NumPy not available, skipping layer benchmark")
+        return
+    pygame.init()
+    recalc_layout(1280, 720)
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    particles = SphereParticles(count, seed=1)
+    atlas = DotAtlas(GOLD)
+
+    def draw_sphere(surface):
+        proj = particles.project(CENTER_X, CENTER_Y, SPHERE_RADIUS, SPHERE_RADIUS_BASE, FOV, WIDTH, HEIGHT)
+        draw_dots(surface, proj, atlas)
+
+    def run(layered):
+        compositor = HudCompositor()
+        pixels = 0
+        start = time.perf_counter()
+        for frame in range(frames):
+            t = frame * 16.0
+            amplitude = 0.3 + 0.2 * math.sin(frame * 0.1)
+            particles.update(16, frame * 0.003, frame * 0.006, SPHERE_RADIUS)
+            if layered:
+                dirty = compositor.frame(screen, t, amplitude, 60, draw_sphere)
+            else:
+                screen.fill(BG_COLOR)
+                pygame.draw.circle(screen, SPHERE_OUTLINE_COLOR, (CENTER_X, CENTER_Y), int(SPHERE_RADIUS * 0.9), 1)
+                draw_sphere(screen)
+                draw_sidd_hud(screen, t, amplitude)
+                draw_analytics(screen, t, amplitude, 60)
+                dirty = [screen.get_rect()]
+            pygame.display.update(dirty)
+            pixels += sum(r.w * r.h for r in dirty)
+        ms = (time.perf_counter() - start) / frames * 1000
+        return ms, pixels / frames / (WIDTH * HEIGHT), compositor
+
+    full_ms, _, _ = run(False)
+    layered_ms, updated, compositor = run(True)
+    print(f"full redraw : {full_ms:.2f} ms/frame")
+    print(f"layered     : {layered_ms:.2f} ms/frame, {updated * 100:.0f}% of the screen updated per frame")
+    for name, stats in compositor.stats().items():
+        print(f"  {name:13s} {stats}")
+
+
+def benchmark():
+    """Headless benchmarks: python frontend.py --benchmark"""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    benchmark_particles()
+    benchmark_drawing()
+    benchmark_text()
+    benchmark_layers()
+
+
 if __name__ == "__main__":
-    main()
+    if "--benchmark" in sys.argv:
+        benchmark()
+    else:
+        main()
@@ -0,0 +1,364 @@
+"""
+Shared HTTP client for SIDD's web lookups (location, weather, Wikipedia).
+
+  - One requests.Session with a pooled HTTPAdapter, so repeated calls to the
+    same host reuse a kept-alive connection instead of a new TCP/TLS setup.
+  - Every request has a (connect, read) timeout; nothing can hang the
+    command loop on a dead network.
+  - get_json(url, params, ttl) answers from a TTL cache when it can. The
+    cache can be saved to a JSON file so long-lived entries (location,
+    Wikipedia summaries) survive restarts. With stale_ok=True an expired
+    entry is returned at once and refreshed in the background.
+  - Identical requests that overlap share one fetch.
+  - submit() runs lookups on a small thread pool so independent fetches
+    overlap instead of running back to back.
+
+The network sits behind a transport object. RequestsTransport is the real
+one; FixtureTransport answers from canned responses (optionally with a
+simulated latency) so everything runs offline.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlencode
+
+from memory_store import write_atomic
+
+# Optional: real network access
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+    REQUESTS_AVAILABLE = True
+except Exception:
+    REQUESTS_AVAILABLE = False
+
+
+class HttpError(Exception):
+    """Request failed: transport error, timeout or non-2xx status."""
+
+
+def request_key(url, params=None):
+    """Cache key: url plus sorted query parameters."""
+    if not params:
+        return url
+    return f"{url}?{urlencode(sorted(params.items()))}"
+
+
+# -------------------- CACHE --------------------
+class TTLCache:
+    """LRU dict of key -> (expires_at, value), optionally saved to a JSON file.
+
+    The file is written save_delay seconds after the first unsaved put, not
+    on every put; call close() (or flush()) on shutdown for the rest.
+    """
+
+    def __init__(self, path=None, max_entries=512, save_delay=5.0):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.save_delay = save_delay      # puts within this window share one file write
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._dirty = False
+        self._timer = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.saves = 0
+        if self.path is not None and self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    for key, (expires, value) in json.load(f).items():
+                        self._data[key] = (expires, value)
+            except Exception as e:
+                print("[HTTP] Ignoring unreadable cache file:", e)
+
+    def lookup(self, key, now=None):
+        """(value, fresh) for key, or (None, False) if it was never cached."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            self._data.move_to_end(key)
+            fresh = entry[0] > now
+            if fresh:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+            return entry[1], fresh
+
+    def put(self, key, value, ttl, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._data[key] = (now + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+            if self.path is None:
+                return
+            self._dirty = True
+            if self._timer is None:
+                self._timer = threading.Timer(self.save_delay, self._timed_flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_flush(self):
+        with self._lock:
+            self._timer = None
+        self.flush()
+
+    def flush(self):
+        """Write the cache file now if anything changed; returns True if it wrote."""
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return False
+                text = json.dumps(dict(self._data), ensure_ascii=False)
+                self._dirty = False
+            try:
+                write_atomic(self.path, text)
+            except Exception as e:
+                print("[HTTP] Could not save cache:", e)
+                with self._lock:
+                    self._dirty = True    # retried by the next flush
+                return False
+            self.saves += 1
+            return True
+
+    def close(self):
+        """Cancel the pending timed save and write what is left."""
+        with self._lock:
+            timer, self._timer = self._timer, None
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -------------------- TRANSPORTS --------------------
+class RequestsTransport:
+    """Pooled requests.Session; one adapter serves both http and https."""
+
+    def __init__(self, pool_size=8, retries=1):
+        if not REQUESTS_AVAILABLE:
+            raise HttpError("requests is not installed")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["User-Agent"] = "SIDD-assistant/1.0"
+
+    def get(self, url, params, timeout):
+        """(status, body text) for a GET."""
+        try:
+            resp = self.session.get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            raise HttpError(str(e)) from e
+        return resp.status_code, resp.text
+
+
+class FixtureTransport:
+    """Canned responses keyed by URL prefix, for running without a network.
+
+    fixtures maps a URL prefix to a JSON-able body, a (status, body) pair,
+    or a callable(url, params) returning either. The longest matching prefix
+    wins. latency adds a sleep per request to imitate a slow link.
+    """
+
+    def __init__(self, fixtures, latency=0.0):
+        self.fixtures = dict(fixtures)
+        self.latency = latency
+        self.requests = []                # (url, params) in the order they were made
+
+    @classmethod
+    def load(cls, path, latency=0.0):
+        """Fixtures from a JSON file: {"url prefix": body or [status, body]}."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), latency=latency)
+
+    def get(self, url, params, timeout):
+        self.requests.append((url, dict(params or {})))
+        if self.latency:
+            time.sleep(self.latency)
+        full = request_key(url, params)
+        matches = [prefix for prefix in self.fixtures if full.startswith(prefix)]
+        if not matches:
+            return 404, json.dumps({"error": "no fixture", "url": full})
+        answer = self.fixtures[max(matches, key=len)]
+        if callable(answer):
+            answer = answer(url, params or {})
+        if isinstance(answer, (list, tuple)) and len(answer) == 2 and isinstance(answer[0], int):
+            status, body = answer
+        else:
+            status, body = 200, answer
+        return status, body if isinstance(body, str) else json.dumps(body)
+
+
+# -------------------- CLIENT --------------------
+class HttpClient:
+    """GET-JSON with timeouts, TTL caching, shared in-flight fetches and a worker pool."""
+
+    def __init__(self, transport=None, cache=None, timeout=(3.05, 6.0), workers=4):
+        self.transport = transport or RequestsTransport(pool_size=workers * 2)
+        self.cache = cache if cache is not None else TTLCache()
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self._inflight = {}               # cache key -> Future of the fetch in progress
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.shared = 0                   # callers that joined someone else's fetch
+        self.errors = 0
+        self.fetch_seconds = 0.0
+
+    def get_json(self, url, params=None, ttl=0, stale_ok=False, timeout=None, validate=None):
+        """Decoded JSON body of url; cached for ttl seconds (0 = never cached).
+
+        stale_ok returns an expired cached value immediately and refreshes it
+        in the background. validate(body) -> bool rejects answers that are
+        HTTP 200 but say the lookup failed; those are never cached. Raises
+        HttpError on failure.
+        """
+        key = request_key(url, params)
+        if ttl:
+            value, fresh = self.cache.lookup(key)
+            if fresh:
+                return value
+            if value is not None and stale_ok:
+                self._pool.submit(self._fetch_quietly, key, url, params, ttl, timeout, validate)
+                return value
+        return self._fetch(key, url, params, ttl, timeout, validate)
+
+    def submit(self, fn, *args, **kwargs):
+        """Run fn on the client's pool; returns a Future."""
+        return self._pool.submit(fn, *args, **kwargs)
+
+    def _fetch(self, key, url, params, ttl, timeout, validate=None):
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.shared += 1
+        if not owner:
+            return future.result()
+        try:
+            value = self._request(url, params, timeout)
+            if validate is not None and not validate(value):
+                self.errors += 1
+                raise HttpError(f"Unusable response from {url}")
+            if ttl:
+                self.cache.put(key, value, ttl)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def _fetch_quietly(self, key, url, params, ttl, timeout, validate=None):
+        try:
+            self._fetch(key, url, params, ttl, timeout, validate)
+        except Exception as e:
+            print("[HTTP] Background refresh failed:", e)
+
+    def _request(self, url, params, timeout):
+        start = time.perf_counter()
+        try:
+            status, body = self.transport.get(url, params, timeout or self.timeout)
+            if not 200 <= status < 300:
+                raise HttpError(f"HTTP {status} from {url}")
+            try:
+                return json.loads(body)
+            except ValueError as e:
+                raise HttpError(f"Invalid JSON from {url}") from e
+        except Exception:
+            self.errors += 1
+            raise
+        finally:
+            self.fetches += 1
+            self.fetch_seconds += time.perf_counter() - start
+
+    def stats(self):
+        avg_ms = self.fetch_seconds / self.fetches * 1000 if self.fetches else 0.0
+        return {
+            "fetches": self.fetches,
+            "avg_fetch_ms": round(avg_ms, 1),
+            "errors": self.errors,
+            "shared": self.shared,
+            "cache_hits": self.cache.hits,
+            "stale_hits": self.cache.stale_hits,
+            "cache_misses": self.cache.misses,
+            "cached": len(self.cache),
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False)
+        self.cache.close()
+
+
+# -------------------- BENCHMARK --------------------
+SAMPLE_FIXTURES = {
+    "http://ip-api.com/json/": {"status": "success", "lat": 22.57, "lon": 88.36, "city": "Kolkata"},
+    "http://api.openweathermap.org/data/2.5/weather": {
+        "cod": 200,
+        "weather": [{"description": "haze"}],
+        "main": {"temp": 31.0, "feels_like": 36.2, "humidity": 70},
+    },
+    "https://en.wikipedia.org/w/api.php": {
+        "query": {"pages": {"1": {"title": "Python", "extract": "Python is a programming language. It was created by Guido van Rossum."}}}
+    },
+}
+
+
+def benchmark(latency=0.15):
+    """Weather + Wikipedia lookups over a slow fake link: serial, concurrent, cached."""
+    weather = "http://api.openweathermap.org/data/2.5/weather"
+    wiki = "https://en.wikipedia.org/w/api.php"
+
+    def run(client, concurrent):
+        start = time.perf_counter()
+        if concurrent:
+            jobs = [client.submit(client.get_json, "http://ip-api.com/json/", ttl=3600),
+                    client.submit(client.get_json, wiki, {"titles": "Python"}, ttl=86400)]
+            loc = jobs[0].result()
+            client.get_json(weather, {"lat": loc["lat"], "lon": loc["lon"]}, ttl=600)
+            jobs[1].result()
+        else:
+            loc = client.get_json("http://ip-api.com/json/", ttl=3600)
+            client.get_json(weather, {"lat": loc["lat"], "lon": loc["lon"]}, ttl=600)
+            client.get_json(wiki, {"titles": "Python"}, ttl=86400)
+        return (time.perf_counter() - start) * 1000
+
+    serial = HttpClient(FixtureTransport(SAMPLE_FIXTURES, latency=latency))
+    concurrent = HttpClient(FixtureTransport(SAMPLE_FIXTURES, latency=latency))
+    print(f"fake link latency   : {latency * 1000:.0f} ms per request")
+    print(f"serial, cold        : {run(serial, False):7.1f} ms")
+    print(f"concurrent, cold    : {run(concurrent, True):7.1f} ms")
+    print(f"cached              : {run(concurrent, True):7.2f} ms")
+
+    # overlapping identical requests share one fetch
+    shared = HttpClient(FixtureTransport(SAMPLE_FIXTURES, latency=latency), workers=8)
+    futures = [shared.submit(shared.get_json, "http://ip-api.com/json/", ttl=3600) for _ in range(8)]
+    for f in futures:
+        f.result()
+    print(f"8 overlapping calls : {shared.fetches} fetch, {shared.shared} shared")
+    print("stats               :", concurrent.stats())
+
+
+if __name__ == "__main__":
+    benchmark()
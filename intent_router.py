@@ -0,0 +1,233 @@
+"""
+Intent routing for SIDD voice commands.
+
+The intent table below is compiled once into an Aho-Corasick automaton, so a
+query is matched against every keyword of every intent in a single pass.
+`route(query)` has no hardware or Windows dependencies and can be used
+offline for tests and benchmarks.
+"""
+
+import time
+
+UNKNOWN_INTENT = "unknown"
+
+# ========== INTENT TABLE ==========
+# (intent, priority, patterns)
+# Lower priority number wins when several intents match the same query;
+# ties go to the longest keyword.
+#
+# Pattern syntax (regex-like, but matched with plain string search):
+#   "^open "    -> keyword must start the query
+#   "close it$" -> keyword must end the query
+#   r"\bpower\b" -> keyword must be a whole word ("powerpoint" does not match)
+INTENT_TABLE = [
+    ("greeting", 10, [r"^hi\b", r"^hello\b", r"^hey\b", r"^good\b"]),
+    ("set_reminder", 12, ["^remind me"]),
+    ("set_timer", 14, ["set a timer", "set timer", "start a timer", "start timer"]),
+    ("cancel_reminder", 16, [
+        "cancel the timer", "cancel timer", "cancel my timer", "stop the timer", "stop timer",
+        "cancel the reminder", "cancel reminder", "cancel my reminder",
+    ]),
+    ("list_reminders", 18, ["my reminders", "list reminders", "any reminders", "my timers", "timer left"]),
+    ("hear_me", 20, ["can you hear me"]),
+    ("set_name", 30, ["my name is"]),
+    ("set_nickname", 40, ["call me"]),
+    ("remember_fact", 50, ["^remember that"]),
+    ("recall", 55, ["what do you remember", "what things do you remember"]),
+    ("wikipedia", 60, ["wikipedia"]),
+    ("weather", 70, ["weather"]),
+    ("open_website", 80, ["open youtube", "open google", "open gmail", "open stackoverflow"]),
+    ("play_song", 90, ["^play "]),
+    ("pause_music", 100, ["pause song", "pause music"]),
+    ("resume_music", 110, ["resume"]),
+    ("tell_time", 120, ["the time"]),
+    ("open_app", 130, ["^open "]),
+    ("shift_to", 140, ["^shift to "]),
+    ("close_last", 150, ["^close it$"]),
+    ("close_app", 160, ["^close "]),
+    ("follow_steps", 170, [
+        "follow the steps", "follow my steps", "follow my commands",
+        "follow my instructions", "enter to the screen", "check screen",
+    ]),
+    ("in_app_action", 180, ["scroll down", "scroll up", "click", "type", "search"]),
+    ("tell_me_about", 190, ["^tell me about"]),
+    ("shutdown", 200, ["shutdown"]),
+    ("restart", 210, ["restart"]),
+    ("log_off", 220, ["log off", "sign out"]),
+    ("lock_system", 230, ["lock system", "lock computer"]),
+    ("wifi_off", 240, ["off wi-fi"]),
+    ("wifi_on", 250, ["on wi-fi"]),
+    ("screenshot", 260, ["screenshot"]),
+    ("battery", 270, ["battery", r"\bpower\b"]),
+    ("set_volume", 280, ["set volume"]),
+    ("volume_up", 290, ["increase volume"]),
+    ("volume_down", 300, ["decrease volume"]),
+    ("unmute", 305, ["unmute"]),
+    ("mute", 310, [r"\bmute\b"]),
+    ("set_brightness", 320, ["set brightness into"]),
+    ("brightness_up", 330, ["increase brightness"]),
+    ("brightness_down", 340, ["decrease brightness"]),
+    ("notify_test", 350, ["notify me"]),
+    ("notifications", 360, ["notification", "message"]),
+    ("quit", 370, ["quit", "exit", "goodbye", "stop", "get out", "leave"]),
+]
+
+
+def _parse_pattern(spec):
+    """Split a pattern spec into (keyword, at_start, at_end, left_word, right_word)."""
+    at_start = spec.startswith("^")
+    if at_start:
+        spec = spec[1:]
+    at_end = spec.endswith("$")
+    if at_end:
+        spec = spec[:-1]
+    left_word = spec.startswith(r"\b")
+    if left_word:
+        spec = spec[2:]
+    right_word = spec.endswith(r"\b")
+    if right_word:
+        spec = spec[:-2]
+    return spec, at_start, at_end, left_word, right_word
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch == "_"
+
+
+# -------------------- AHO-CORASICK AUTOMATON --------------------
+class KeywordAutomaton:
+    """Multi-keyword matcher: finds every keyword occurrence in one pass."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+
+        for idx, word in enumerate(keywords):
+            state = 0
+            for ch in word:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append(idx)
+
+        # breadth-first construction of failure links
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                # root children keep their failure link at the root
+                if state:
+                    self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter_matches(self, text):
+        """Yield (keyword_index, end_position) for every match in text."""
+        goto = self.goto
+        fail = self.fail
+        out = self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for idx in out[state]:
+                yield idx, i + 1
+
+
+# -------------------- ROUTER --------------------
+class IntentRouter:
+    """Compiled intent table with single-pass `route(query)` lookup."""
+
+    def __init__(self, table):
+        self.patterns = []  # (intent, priority, keyword, at_start, at_end, left_word, right_word)
+        for intent, priority, specs in table:
+            for spec in specs:
+                self.patterns.append((intent, priority) + _parse_pattern(spec))
+        self.automaton = KeywordAutomaton([p[2] for p in self.patterns])
+
+    def route(self, query):
+        """Return (intent, slots) for the query.
+
+        slots["keyword"] is the matched keyword and slots["rest"] is the text
+        after it (e.g. the app name in "open notepad").
+        """
+        text = query.lower().strip()
+        best = None
+        best_key = None
+        for idx, end in self.automaton.iter_matches(text):
+            intent, priority, keyword, at_start, at_end, left_word, right_word = self.patterns[idx]
+            start = end - len(keyword)
+            if at_start and start != 0:
+                continue
+            if at_end and end != len(text):
+                continue
+            if left_word and start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if right_word and end < len(text) and _is_word_char(text[end]):
+                continue
+            key = (priority, -len(keyword), start)
+            if best_key is None or key < best_key:
+                best_key = key
+                best = (intent, keyword, end)
+
+        if best is None:
+            return UNKNOWN_INTENT, {"keyword": None, "rest": text}
+        intent, keyword, end = best
+        return intent, {"keyword": keyword, "rest": text[end:].strip()}
+
+
+_router = IntentRouter(INTENT_TABLE)
+
+
+def route(query):
+    """Route a recognized utterance to (intent, slots) using the default table."""
+    return _router.route(query)
+
+
+# -------------------- BENCHMARK --------------------
+SAMPLE_QUERIES = [
+    "hello sidd",
+    "remind me in 20 minutes to call mom",
+    "set a timer for 5 minutes",
+    "what is the weather like",
+    "open youtube",
+    "open powerpoint",
+    "close it",
+    "unmute",
+    "mute the sound",
+    "set volume to 40",
+    "tell me about black holes",
+    "play kesariya",
+    "how much power is left",
+    "read recent notification",
+    "what is the meaning of life",
+]
+
+
+def benchmark(rounds=20000):
+    for q in SAMPLE_QUERIES:
+        print(f"{q!r:32} -> {route(q)}")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for q in SAMPLE_QUERIES:
+            route(q)
+    elapsed = time.perf_counter() - start
+    per_query = elapsed / (rounds * len(SAMPLE_QUERIES)) * 1e6
+    print(f"\n{rounds * len(SAMPLE_QUERIES)} routes in {elapsed:.3f}s ({per_query:.2f} us/query)")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,408 @@
+"""
+Hash index over memory["learned_responses"].
+
+The list in sidd_memory.json stays the source of truth; this index maps a
+normalized form of each query to its position so lookups and upserts are O(1)
+instead of a scan over every learned phrase.
+
+When NumPy is available a character n-gram TF-IDF index is kept alongside it,
+so a query that speech recognition returned slightly differently ("whats the
+capital of france" vs "what is the capital of france") still finds its answer.
+N-gram overlap alone cannot tell "turn on the lights" from "turn off the
+lights", so a fuzzy hit is only used if every word that differs between the
+two phrases is filler or a near-spelling of a word in the other one, and both
+carry the same negations.
+
+The fuzzy index takes seconds to build for a large list, so it is built on a
+background thread (prepare() when memory loads); until it is ready only
+exact matches are answered.
+"""
+
+import difflib
+import math
+import random
+import re
+import threading
+import time
+
+# Optional: numpy for fuzzy recall
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+_SPACE_RE = re.compile(r"\s+")
+
+# words whose presence or absence does not change what a query asks
+_FILLER_WORDS = {"a", "an", "the", "is", "are", "am", "was", "were", "s", "do", "does", "please", "to", "of"}
+# "don't" normalizes to "don t", so the bare "t" counts too
+_NEGATION_WORDS = {"not", "no", "never", "nothing", "dont", "doesnt", "didnt", "isnt", "cant", "wont", "t"}
+
+
+def normalize_query(query):
+    """Lowercase, drop punctuation and collapse whitespace."""
+    if not query:
+        return ""
+    text = _PUNCT_RE.sub(" ", query.lower())
+    return _SPACE_RE.sub(" ", text).strip()
+
+
+def migrate_learned_responses(items):
+    """Collapse duplicate queries from older memory files (latest answer wins).
+
+    Returns a new list in first-seen order.
+    """
+    positions = {}
+    merged = []
+    for item in items:
+        key = normalize_query(item.get("query"))
+        if not key:
+            continue
+        if key in positions:
+            merged[positions[key]]["response"] = item.get("response")
+        else:
+            positions[key] = len(merged)
+            merged.append({"query": item.get("query"), "response": item.get("response")})
+    return merged
+
+
+def _near_spelling(word, others):
+    """True if some word in others looks like an ASR variant of word."""
+    for other in others:
+        if sorted(word) == sorted(other):
+            return True
+        if difflib.SequenceMatcher(None, word, other).ratio() >= 0.75:
+            return True
+    return False
+
+
+def same_meaning(query, learned):
+    """Whether a fuzzy match between two phrases can be trusted word by word."""
+    a = normalize_query(query).split()
+    b = normalize_query(learned).split()
+    set_a, set_b = set(a), set(b)
+    if set_a & _NEGATION_WORDS != set_b & _NEGATION_WORDS:
+        return False
+    only_a = set_a - set_b - _FILLER_WORDS
+    only_b = set_b - set_a - _FILLER_WORDS
+    return (all(_near_spelling(w, set_b) for w in only_a)
+            and all(_near_spelling(w, set_a) for w in only_b))
+
+
+class FuzzyResponseIndex:
+    """Character n-gram TF-IDF index with an inverted list per n-gram.
+
+    A lookup takes the query's rarest n-grams, pulls their posting lists to
+    collect a few candidate entries, then scores only those candidates by
+    exact cosine similarity. Cost depends on how rare the query's n-grams
+    are, not on how many phrases have been learned.
+    """
+
+    def __init__(self, n=3, probe_grams=8, candidates=16):
+        self.n = n
+        self.probe_grams = probe_grams  # rarest query n-grams used to find candidates
+        self.candidates = candidates    # entries re-scored exactly per lookup
+        self.clear()
+
+    def clear(self):
+        self._vocab = {}            # n-gram -> id
+        self._post_docs = []        # id -> [doc, ...]
+        self._arrays = {}           # id -> numpy copy of the posting list
+        self._doc_terms = []        # doc -> [(id, tf weight), ...]
+        self._flat_doc = []         # the same terms, flattened for vectorized norms
+        self._flat_gid = []
+        self._flat_tf = []
+        self._norms = []            # doc -> vector norm
+        self._norm_size = 0         # corpus size when norms were last recomputed
+        self.size = 0
+
+    def _grams(self, text):
+        text = f" {normalize_query(text)} "
+        counts = {}
+        for i in range(len(text) - self.n + 1):
+            g = text[i:i + self.n]
+            counts[g] = counts.get(g, 0) + 1
+        return counts
+
+    def _idf(self, df):
+        return math.log((self.size + 1) / (df + 1)) + 1.0
+
+    def add(self, text, refresh=True):
+        """Append one entry; its doc id is its position in the learned list."""
+        doc = self.size
+        terms = []
+        for g, count in self._grams(text).items():
+            gid = self._vocab.get(g)
+            if gid is None:
+                gid = len(self._post_docs)
+                self._vocab[g] = gid
+                self._post_docs.append([])
+            self._post_docs[gid].append(doc)
+            self._arrays.pop(gid, None)
+            tf = 1.0 + math.log(count)
+            terms.append((gid, tf))
+            self._flat_doc.append(doc)
+            self._flat_gid.append(gid)
+            self._flat_tf.append(tf)
+        self._doc_terms.append(terms)
+        self.size += 1
+        if not refresh:
+            return doc
+        self._norms.append(math.sqrt(sum(
+            (tf * self._idf(len(self._post_docs[gid]))) ** 2 for gid, tf in terms
+        )) or 1.0)
+        # idf drifts as the corpus grows; refresh all norms once it has grown by 25%
+        if self.size > self._norm_size * 1.25 + 16:
+            self._refresh_norms()
+        return doc
+
+    def build(self, texts):
+        self.clear()
+        for text in texts:
+            self.add(text, refresh=False)
+        self._refresh_norms()
+        for gid in range(len(self._post_docs)):
+            self._posting_array(gid)
+
+    def _refresh_norms(self):
+        df = np.fromiter((len(p) for p in self._post_docs), dtype=np.float64, count=len(self._post_docs))
+        idf = np.log((self.size + 1) / (df + 1)) + 1.0
+        weights = np.asarray(self._flat_tf) * idf[np.asarray(self._flat_gid, dtype=np.int64)]
+        norms = np.sqrt(np.bincount(self._flat_doc, weights=weights * weights, minlength=self.size))
+        norms[norms == 0] = 1.0
+        self._norms = norms.tolist()
+        self._norm_size = self.size
+
+    def _posting_array(self, gid):
+        arr = self._arrays.get(gid)
+        if arr is None:
+            arr = np.asarray(self._post_docs[gid], dtype=np.int32)
+            self._arrays[gid] = arr
+        return arr
+
+    def search(self, text, k=3):
+        """Return up to k (doc, score) pairs, best first."""
+        if not self.size:
+            return []
+
+        q_weights = {}   # id -> query tf-idf weight
+        q_norm = 0.0
+        for g, count in self._grams(text).items():
+            gid = self._vocab.get(g)
+            df = len(self._post_docs[gid]) if gid is not None else 0
+            w = (1.0 + math.log(count)) * self._idf(df)
+            q_norm += w * w
+            if gid is not None:
+                q_weights[gid] = w
+        if not q_weights:
+            return []
+        q_norm = math.sqrt(q_norm)
+
+        # candidates: entries sharing the most of the query's rarest n-grams
+        probe = sorted(q_weights, key=lambda gid: len(self._post_docs[gid]))[:self.probe_grams]
+        docs = np.concatenate([self._posting_array(gid) for gid in probe])
+        uniq, hits = np.unique(docs, return_counts=True)
+        if len(uniq) > self.candidates:
+            uniq = uniq[np.argpartition(-hits, self.candidates - 1)[:self.candidates]]
+
+        # exact cosine similarity for the candidates only
+        results = []
+        for doc in uniq.tolist():
+            dot = 0.0
+            for gid, tf in self._doc_terms[doc]:
+                qw = q_weights.get(gid)
+                if qw is not None:
+                    dot += qw * tf * self._idf(len(self._post_docs[gid]))
+            results.append((doc, dot / (q_norm * self._norms[doc])))
+        results.sort(key=lambda r: -r[1])
+        return results[:k]
+
+
+class LearnedResponseIndex:
+    """Dict of normalized query -> index in the learned list, plus the fuzzy index.
+
+    Exact (normalized) matches are answered from the dict; otherwise the fuzzy
+    index is consulted and its best hit is used if it scores >= threshold and
+    passes same_meaning(). The dict is rebuilt inline when the list changes
+    behind our back; the fuzzy index is rebuilt on a background thread.
+    """
+
+    def __init__(self, threshold=0.7):
+        self.threshold = threshold
+        self._lock = threading.RLock()
+        self._items = None
+        self._size = 0
+        self._by_key = {}
+        self._fuzzy = None             # FuzzyResponseIndex over self._items, once built
+        self._building = None          # the list a background build is running for
+        self._thread = None
+
+    def prepare(self, items, wait=False):
+        """Index items now (call when memory loads); wait=True blocks until fuzzy recall is ready."""
+        self._ensure(items)
+        thread = self._thread
+        if wait and thread is not None:
+            thread.join()
+
+    def _ensure(self, items):
+        # Rebuild when memory was reloaded (new list) or edited behind our back
+        with self._lock:
+            if items is self._items and len(items) == self._size:
+                return
+            self._by_key = {}
+            for pos, item in enumerate(items):
+                key = normalize_query(item.get("query"))
+                if key:
+                    self._by_key[key] = pos
+            self._items = items
+            self._size = len(items)
+            self._fuzzy = None
+            if not NUMPY_AVAILABLE or self._building is items:
+                return
+            self._building = items
+            self._thread = threading.Thread(target=self._build_fuzzy, args=(items,),
+                                            name="learned-index", daemon=True)
+            self._thread.start()
+
+    def _build_fuzzy(self, items):
+        start = time.perf_counter()
+        fuzzy = FuzzyResponseIndex()
+        fuzzy.build([item.get("query") or "" for item in items[:]])
+        with self._lock:
+            if self._building is items:
+                self._building = None
+            if self._items is not items:
+                return                 # memory was reloaded meanwhile; that build wins
+            for item in items[fuzzy.size:]:
+                fuzzy.add(item.get("query") or "")   # learned while we were building
+            self._fuzzy = fuzzy
+        print(f"[MEMORY] Fuzzy recall ready: {fuzzy.size} phrases in {time.perf_counter() - start:.2f}s")
+
+    def lookup(self, items, query):
+        """Return the learned response for query, or None."""
+        self._ensure(items)
+        pos = self._by_key.get(normalize_query(query))
+        if pos is None:
+            pos = self._fuzzy_match(items, query)
+            if pos is None:
+                return None
+        return items[pos].get("response")
+
+    def _fuzzy_match(self, items, query):
+        for pos, score in self.similar(items, query, k=3):
+            if score >= self.threshold and same_meaning(query, items[pos].get("query")):
+                return pos
+        return None
+
+    def similar(self, items, query, k=3):
+        """Return up to k (position, score) pairs of learned queries like this one.
+
+        Empty while the fuzzy index is still being built.
+        """
+        self._ensure(items)
+        with self._lock:
+            if self._fuzzy is None:
+                return []
+            return self._fuzzy.search(query, k)
+
+    def upsert(self, items, query, response):
+        """Insert or update a query -> response pair.
+
+        Returns (position, added) if the list changed, or None if the same
+        answer was already stored (so the caller knows whether to save).
+        """
+        self._ensure(items)
+        key = normalize_query(query)
+        if not key:
+            return None
+        with self._lock:
+            pos = self._by_key.get(key)
+            if pos is not None:
+                if items[pos].get("response") == response:
+                    return None
+                items[pos]["response"] = response
+                return pos, False
+            items.append({"query": query, "response": response})
+            self._by_key[key] = len(items) - 1
+            if self._fuzzy is not None:
+                self._fuzzy.add(query)
+            self._size = len(items)
+            return len(items) - 1, True
+
+
+# -------------------- BENCHMARK --------------------
+_BENCH_WORDS = (
+    "what is the how do you open play tell me about weather capital of france "
+    "india music song video my favourite color name time today tomorrow city "
+    "best friend school office meeting remind call message email movie book "
+    "game cricket football news price stock market recipe coffee tea cake"
+).split()
+
+
+def _perturb(text, rng):
+    """Simulate an ASR variant: drop, swap or duplicate a character."""
+    chars = list(text)
+    i = rng.randrange(len(chars))
+    op = rng.random()
+    if op < 0.33:
+        del chars[i]
+    elif op < 0.66 and i + 1 < len(chars):
+        chars[i], chars[i + 1] = chars[i + 1], chars[i]
+    else:
+        chars.insert(i, chars[i])
+    return "".join(chars)
+
+
+def benchmark(size=100000, lookups=500, seed=7):
+    rng = random.Random(seed)
+    items = [
+        {"query": " ".join(rng.choice(_BENCH_WORDS) for _ in range(rng.randint(4, 8))) + f" {i}",
+         "response": f"answer {i}"}
+        for i in range(size)
+    ]
+    probes = [rng.randrange(size) for _ in range(lookups)]
+    exact = [items[p]["query"] for p in probes]
+    noisy = [_perturb(q, rng) for q in exact]
+
+    def linear_scan(query):
+        # the original find_learned_response
+        for item in items:
+            if item.get("query") == query:
+                return item.get("response")
+        return None
+
+    start = time.perf_counter()
+    linear_hits = sum(linear_scan(q) is not None for q in noisy[:50])
+    linear_us = (time.perf_counter() - start) / 50 * 1e6
+
+    index = LearnedResponseIndex()
+    start = time.perf_counter()
+    index.prepare(items)
+    exact_ready_s = time.perf_counter() - start
+    index.prepare(items, wait=True)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for q in exact:
+        index.lookup(items, q)
+    exact_us = (time.perf_counter() - start) / lookups * 1e6
+
+    start = time.perf_counter()
+    fuzzy_hits = 0
+    for p, q in zip(probes, noisy):
+        fuzzy_hits += index.lookup(items, q) == items[p]["response"]
+    fuzzy_us = (time.perf_counter() - start) / lookups * 1e6
+
+    print(f"entries: {size}  (exact lookups after {exact_ready_s:.2f}s, fuzzy index built in background in {build_s:.2f}s)")
+    print(f"linear scan (noisy)  : {linear_us:9.1f} us/lookup  hit rate {linear_hits / 50:.0%}")
+    print(f"hash index (exact)   : {exact_us:9.1f} us/lookup")
+    if NUMPY_AVAILABLE:
+        print(f"fuzzy top-1 (noisy)  : {fuzzy_us:9.1f} us/lookup  hit rate {fuzzy_hits / lookups:.0%}")
+    else:
+        print("fuzzy top-1 (noisy)  : skipped (numpy not installed)")
+
+
+if __name__ == "__main__":
+    benchmark()
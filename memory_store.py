@@ -0,0 +1,509 @@
+"""
+Persistence for SIDD memory.
+
+MemoryManager batches saves: callers mark memory dirty, and a background
+flusher hands the pending changes to a storage backend once the debounce
+window has passed without new changes.
+
+Backends:
+  JsonFileBackend - the original single sidd_memory.json document, rewritten
+                    atomically (temp file + rename) on every flush.
+  JournalBackend  - a snapshot plus an append-only journal of changes, so a
+                    flush costs O(changes) instead of O(whole memory).
+  SqliteBackend   - tables in a SQLite database (WAL mode) with an FTS5 index
+                    over notes and learned responses for ranked search.
+
+A change is a tuple (op, path, value):
+  ("set", ["user_profile", "name"], "Rahul")
+  ("append", ["notes"], "my favourite color is blue")
+  ("delete", ["reminders", "3f2a9c"], None)
+  ("replace", [], {...whole memory...})
+"""
+
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+
+def write_atomic(path, text):
+    """Write text to path via a temp file in the same folder + rename."""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix=path.name + ".", suffix=".tmp", dir=path.parent or ".")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def apply_change(data, change):
+    """Apply one (op, path, value) change to data and return the result."""
+    op, path, value = change
+    if op == "replace":
+        return value
+    target = data
+    if op == "append":
+        for key in path:
+            target = target[key]
+        target.append(value)
+    elif op == "set":
+        for key in path[:-1]:
+            target = target[key]
+        target[path[-1]] = value
+    elif op == "delete":
+        for key in path[:-1]:
+            target = target[key]
+        target.pop(path[-1], None)
+    else:
+        raise ValueError(f"Unknown memory change: {op}")
+    return data
+
+
+# -------------------- BACKENDS --------------------
+class JsonFileBackend:
+    """Whole memory as one pretty-printed JSON file (sidd_memory.json)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._last_text = None
+
+    def load(self):
+        if not self.path.exists():
+            return None
+        with open(self.path, "r", encoding="utf-8") as f:
+            text = f.read()
+        self._last_text = text
+        return json.loads(text)
+
+    def save(self, data, changes):
+        """Rewrite the file; returns False if the content did not change."""
+        text = json.dumps(data, ensure_ascii=False, indent=2)
+        if text == self._last_text:
+            return False
+        write_atomic(self.path, text)
+        self._last_text = text
+        return True
+
+    def close(self):
+        pass
+
+
+class JournalBackend:
+    """Snapshot file + append-only journal of changes.
+
+    Journal records are "<length> <json>\\n" where json is [seq, op, path, value].
+    The snapshot stores the seq it includes, so records already folded into
+    it are skipped on replay even if compaction was interrupted. A torn last
+    record (crash mid-append) fails its length check and is dropped.
+    """
+
+    def __init__(self, snapshot_path, journal_path, compact_every=500, import_from=None):
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = Path(journal_path)
+        self.compact_every = compact_every
+        self.import_from = Path(import_from) if import_from else None
+        self.seq = 0
+        self._journal_records = 0
+        self._journal = None
+
+    def load(self):
+        data = None
+        if self.snapshot_path.exists():
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+            data = snapshot["data"]
+            self.seq = snapshot.get("seq", 0)
+        elif self.import_from is not None and self.import_from.exists():
+            # first run with this backend: start from the existing JSON file
+            with open(self.import_from, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._compact(data)
+            print("[MEMORY] Imported", self.import_from, "into journal storage")
+
+        good_bytes = 0
+        if data is not None and self.journal_path.exists():
+            with open(self.journal_path, "rb") as f:
+                for raw in f:
+                    record = self._parse(raw)
+                    if record is None:
+                        break  # torn tail; everything after it is unusable
+                    good_bytes += len(raw)
+                    seq, op, path, value = record
+                    self._journal_records += 1
+                    if seq <= self.seq:
+                        continue
+                    data = apply_change(data, (op, path, value))
+                    self.seq = seq
+            if good_bytes != self.journal_path.stat().st_size:
+                with open(self.journal_path, "r+b") as f:
+                    f.truncate(good_bytes)
+        return data
+
+    @staticmethod
+    def _parse(raw):
+        try:
+            length, payload = raw.rstrip(b"\n").split(b" ", 1)
+            if int(length) != len(payload) or not raw.endswith(b"\n"):
+                return None
+            return json.loads(payload.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            return None
+
+    def save(self, data, changes):
+        if not changes:
+            return False
+        if any(op == "replace" for op, _, _ in changes):
+            self._compact(data)
+            return True
+
+        lines = []
+        for op, path, value in changes:
+            self.seq += 1
+            payload = json.dumps([self.seq, op, path, value], ensure_ascii=False,
+                                 separators=(",", ":")).encode("utf-8")
+            lines.append(b"%d %s\n" % (len(payload), payload))
+        if self._journal is None:
+            self._journal = open(self.journal_path, "ab")
+        self._journal.write(b"".join(lines))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._journal_records += len(lines)
+
+        if self._journal_records >= self.compact_every:
+            self._compact(data)
+        return True
+
+    def _compact(self, data):
+        """Fold the journal into a fresh snapshot and start an empty journal."""
+        write_atomic(self.snapshot_path, json.dumps(
+            {"seq": self.seq, "data": data}, ensure_ascii=False, separators=(",", ":")
+        ))
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, "wb")
+        self._journal_records = 0
+
+    def close(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+
+class SqliteBackend:
+    """Memory stored in SQLite, with full-text search over notes and learned responses.
+
+    user_profile / conversation_context (and any other top-level dict or
+    scalar) live in a key-value table; notes and learned_responses get their
+    own tables. memory_fts mirrors the searchable text of both.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS kv (
+            section TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT,
+            PRIMARY KEY (section, key)
+        );
+        CREATE TABLE IF NOT EXISTS notes (
+            pos INTEGER PRIMARY KEY,
+            text TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS learned_responses (
+            pos INTEGER PRIMARY KEY,
+            query TEXT,
+            response TEXT
+        );
+        CREATE VIRTUAL TABLE IF NOT EXISTS memory_fts USING fts5(
+            kind UNINDEXED, pos UNINDEXED, text
+        );
+    """
+
+    def __init__(self, path, import_from=None):
+        self.path = Path(path)
+        self.import_from = Path(import_from) if import_from else None
+        self._lock = threading.Lock()
+        is_new = not self.path.exists()
+        # the flusher writes while the dispatch thread searches
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._empty = is_new
+
+    def load(self):
+        if self._empty:
+            if self.import_from is not None and self.import_from.exists():
+                import_json_memory(self.import_from, self)
+                print("[MEMORY] Imported", self.import_from, "into", self.path)
+            else:
+                return None
+        self._empty = False
+        with self._lock:
+            data = {}
+            for section, key, value in self._conn.execute("SELECT section, key, value FROM kv"):
+                value = json.loads(value)
+                if key == "":
+                    data[section] = value
+                else:
+                    data.setdefault(section, {})[key] = value
+            data["notes"] = [t for (t,) in self._conn.execute("SELECT text FROM notes ORDER BY pos")]
+            data["learned_responses"] = [
+                {"query": q, "response": r}
+                for q, r in self._conn.execute("SELECT query, response FROM learned_responses ORDER BY pos")
+            ]
+        return data
+
+    def save(self, data, changes):
+        if not changes:
+            return False
+        with self._lock, self._conn:
+            for change in changes:
+                if not self._apply(change):
+                    self._rewrite(data)
+                    break
+        return True
+
+    def _apply(self, change):
+        """Write one change as SQL; returns False if it needs a full rewrite."""
+        op, path, value = change
+        c = self._conn
+        if op == "append" and path == ["notes"]:
+            pos = c.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM notes").fetchone()[0]
+            self._insert_note(pos, value)
+        elif op == "append" and path == ["learned_responses"]:
+            pos = c.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM learned_responses").fetchone()[0]
+            self._insert_learned(pos, value.get("query"), value.get("response"))
+        elif op == "set" and len(path) == 3 and path[0] == "learned_responses" and path[2] == "response":
+            c.execute("UPDATE learned_responses SET response = ? WHERE pos = ?", (value, path[1]))
+            row = c.execute("SELECT query FROM learned_responses WHERE pos = ?", (path[1],)).fetchone()
+            c.execute("DELETE FROM memory_fts WHERE kind = 'learned' AND pos = ?", (path[1],))
+            c.execute("INSERT INTO memory_fts (kind, pos, text) VALUES ('learned', ?, ?)",
+                      (path[1], f"{row[0] if row else ''} {value}"))
+        elif op == "set" and len(path) == 2 and path[0] not in ("notes", "learned_responses"):
+            self._set_kv(path[0], path[1], value)
+        elif op == "set" and len(path) == 1 and path[0] not in ("notes", "learned_responses"):
+            self._set_section(path[0], value)
+        elif op == "delete" and len(path) == 2 and path[0] not in ("notes", "learned_responses"):
+            c.execute("DELETE FROM kv WHERE section = ? AND key = ?", (path[0], path[1]))
+        else:
+            return False
+        return True
+
+    def _insert_note(self, pos, text):
+        self._conn.execute("INSERT INTO notes (pos, text) VALUES (?, ?)", (pos, text))
+        self._conn.execute("INSERT INTO memory_fts (kind, pos, text) VALUES ('note', ?, ?)", (pos, text))
+
+    def _insert_learned(self, pos, query, response):
+        self._conn.execute("INSERT INTO learned_responses (pos, query, response) VALUES (?, ?, ?)",
+                           (pos, query, response))
+        self._conn.execute("INSERT INTO memory_fts (kind, pos, text) VALUES ('learned', ?, ?)",
+                           (pos, f"{query} {response}"))
+
+    def _set_kv(self, section, key, value):
+        self._conn.execute("DELETE FROM kv WHERE section = ? AND key = ''", (section,))
+        self._conn.execute("INSERT OR REPLACE INTO kv (section, key, value) VALUES (?, ?, ?)",
+                           (section, key, json.dumps(value, ensure_ascii=False)))
+
+    def _set_section(self, section, value):
+        self._conn.execute("DELETE FROM kv WHERE section = ?", (section,))
+        if isinstance(value, dict):
+            for key, item in value.items():
+                self._set_kv(section, key, item)
+        else:
+            # scalars (e.g. "version") are stored under an empty key
+            self._conn.execute("INSERT INTO kv (section, key, value) VALUES (?, '', ?)",
+                               (section, json.dumps(value, ensure_ascii=False)))
+
+    def _rewrite(self, data):
+        c = self._conn
+        for table in ("kv", "notes", "learned_responses", "memory_fts"):
+            c.execute(f"DELETE FROM {table}")
+        for section, value in data.items():
+            if section not in ("notes", "learned_responses"):
+                self._set_section(section, value)
+        for pos, text in enumerate(data.get("notes", [])):
+            self._insert_note(pos, text)
+        for pos, item in enumerate(data.get("learned_responses", [])):
+            self._insert_learned(pos, item.get("query"), item.get("response"))
+
+    def search(self, text, limit=5):
+        """Ranked full-text search; returns [(kind, text), ...] best first.
+
+        kind is "note" or "learned"; for learned entries text is the response.
+        """
+        words = re.findall(r"\w+", text.lower())
+        if not words:
+            return []
+        # any of the words may match; bm25 ranks entries matching more/rarer words higher
+        match = " OR ".join(f'"{w}"' for w in words)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT kind, pos FROM memory_fts WHERE memory_fts MATCH ? ORDER BY rank LIMIT ?",
+                (match, limit),
+            ).fetchall()
+            results = []
+            for kind, pos in rows:
+                if kind == "note":
+                    row = self._conn.execute("SELECT text FROM notes WHERE pos = ?", (pos,)).fetchone()
+                else:
+                    row = self._conn.execute("SELECT response FROM learned_responses WHERE pos = ?", (pos,)).fetchone()
+                if row:
+                    results.append((kind, row[0]))
+        return results
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def import_json_memory(json_path, backend):
+    """One-shot import of a sidd_memory.json file into a SqliteBackend."""
+    with open(json_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    with backend._lock, backend._conn:
+        backend._rewrite(data)
+    backend._empty = False
+    return data
+
+
+def make_backend(kind, path):
+    """Build a backend by name ("json", "journal" or "sqlite") for the given memory file."""
+    path = Path(path)
+    if kind == "json":
+        return JsonFileBackend(path)
+    if kind == "journal":
+        return JournalBackend(
+            path.with_suffix(".snapshot.json"),
+            path.with_suffix(".journal"),
+            import_from=path,
+        )
+    if kind == "sqlite":
+        return SqliteBackend(path.with_suffix(".db"), import_from=path)
+    raise ValueError(f"Unknown memory backend: {kind}")
+
+
+# -------------------- WRITE-BEHIND MANAGER --------------------
+class MemoryManager:
+    """Dirty-tracking, write-behind saver for the memory dict."""
+
+    def __init__(self, backend, debounce=2.0, lock=None):
+        self.backend = backend
+        self.debounce = debounce
+        # held while the backend reads the dict, so writers using the same
+        # lock never change it mid-save
+        self.lock = lock if lock is not None else threading.RLock()
+        self.writes = 0       # flushes that wrote something
+        self.skipped = 0      # flushes where nothing had changed
+
+        self._data = None
+        self._changes = []
+        self._dirty = False
+        self._last_change = 0.0
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._stopped = False
+        self._thread = None
+
+    def load(self):
+        """Return the stored memory dict, or None if there is none yet."""
+        return self.backend.load()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._flusher, name="memory-flusher", daemon=True)
+            self._thread.start()
+
+    def mark_dirty(self, data, change=None):
+        """Schedule data to be saved after the debounce window.
+
+        change describes what was modified; without it the whole document
+        is treated as replaced.
+        """
+        with self._cond:
+            self._data = data
+            self._changes.append(change or ("replace", [], data))
+            self._dirty = True
+            self._last_change = time.monotonic()
+            self._cond.notify()
+
+    def flush(self):
+        """Write pending changes now (no-op if nothing is dirty)."""
+        with self._write_lock:
+            with self._cond:
+                if not self._dirty:
+                    return False
+                data, changes = self._data, self._changes
+                self._changes = []
+                self._dirty = False
+            try:
+                with self.lock:
+                    wrote = self.backend.save(data, changes)
+            except BaseException:
+                # keep the changes so the next flush retries them
+                with self._cond:
+                    self._changes = changes + self._changes
+                    self._dirty = True
+                raise
+            if wrote:
+                self.writes += 1
+            else:
+                self.skipped += 1
+            return wrote
+
+    def close(self):
+        """Stop the flusher, write anything still pending and close the backend."""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        self.backend.close()
+
+    def _flusher(self):
+        while True:
+            with self._cond:
+                while not self._dirty and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                # wait until no new change arrived for `debounce` seconds
+                remaining = self._last_change + self.debounce - time.monotonic()
+                if remaining > 0:
+                    self._cond.wait(remaining)
+                    continue
+            try:
+                self.flush()
+            except RuntimeError:
+                pass  # memory was mutated while being serialized; retried next pass
+            except Exception as e:
+                print("[MEMORY] Error saving memory:", e)
+                time.sleep(self.debounce)  # don't spin on a persistent disk error
+
+
+if __name__ == "__main__":
+    # python memory_store.py import sidd_memory.json [sidd_memory.db]
+    if len(sys.argv) >= 3 and sys.argv[1] == "import":
+        src = Path(sys.argv[2])
+        dst = Path(sys.argv[3]) if len(sys.argv) > 3 else src.with_suffix(".db")
+        backend = SqliteBackend(dst)
+        data = import_json_memory(src, backend)
+        backend.close()
+        print(f"Imported {len(data.get('notes', []))} notes and "
+              f"{len(data.get('learned_responses', []))} learned responses into {dst}")
+    else:
+        print("usage: python memory_store.py import <sidd_memory.json> [<out.db>]")
@@ -0,0 +1,252 @@
+"""
+Shared snapshot of running processes and top-level windows.
+
+One background thread lists processes (and visible windows, when pywin32 is
+available) every `interval` seconds and swaps in a fresh index, keyed by
+lowercase executable name and by the words of each window title. Close
+commands then look up a name instead of walking the whole process table,
+and code that needs to wait for a process ("did Edge just start?") sleeps
+on a condition that is signalled after each refresh instead of polling.
+
+While someone is waiting, refreshes run every `fast_interval` seconds;
+otherwise the interval is stretched if a refresh takes more than
+`max_duty` of it, so the background cost stays bounded. stats() reports
+what it actually costs.
+"""
+
+import re
+import threading
+import time
+
+# Optional: process listing
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except Exception:
+    PSUTIL_AVAILABLE = False
+
+# Optional: window listing (Windows only)
+try:
+    import win32gui
+    import win32process
+    WIN32_AVAILABLE = True
+except Exception:
+    WIN32_AVAILABLE = False
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def list_processes():
+    """[(pid, name)] for every process psutil can see."""
+    result = []
+    for proc in psutil.process_iter(['pid', 'name']):
+        name = proc.info['name']
+        if name:
+            result.append((proc.info['pid'], name))
+    return result
+
+
+def list_windows():
+    """[(hwnd, pid, title)] for visible top-level windows with a title."""
+    result = []
+
+    def handler(hwnd, _):
+        if win32gui.IsWindowVisible(hwnd):
+            title = win32gui.GetWindowText(hwnd)
+            if title:
+                result.append((hwnd, win32process.GetWindowThreadProcessId(hwnd)[1], title))
+
+    win32gui.EnumWindows(handler, None)
+    return result
+
+
+class Snapshot:
+    """Immutable index of one refresh."""
+
+    def __init__(self, processes, windows, taken_at):
+        self.taken_at = taken_at
+        self.process_count = len(processes)
+        self.by_name = {}        # "notepad.exe" and "notepad" -> [pid, ...]
+        for pid, name in processes:
+            name = name.lower()
+            self.by_name.setdefault(name, []).append(pid)
+            stem = name[:-4] if name.endswith(".exe") else None
+            if stem:
+                self.by_name.setdefault(stem, []).append(pid)
+        self.windows = [(hwnd, pid, title.lower()) for hwnd, pid, title in windows]
+        self.by_word = {}        # title word -> [position in self.windows]
+        for pos, (_, _, title) in enumerate(self.windows):
+            for word in set(_WORD_RE.findall(title)):
+                self.by_word.setdefault(word, []).append(pos)
+
+    def pids(self, name):
+        """PIDs whose executable is name (with or without .exe); falls back to substring."""
+        key = name.lower().strip()
+        pids = self.by_name.get(key)
+        if pids is not None:
+            return list(pids)
+        found = set()
+        for proc_name, proc_pids in self.by_name.items():
+            if key in proc_name:
+                found.update(proc_pids)
+        return sorted(found)
+
+    def windows_matching(self, text):
+        """[(hwnd, pid, title)] whose title contains text."""
+        key = text.lower().strip()
+        words = _WORD_RE.findall(key)
+        if words:
+            # inner words must be whole title words; the ends may be partial, so check exactly
+            candidates = None
+            for word in words[1:-1]:
+                positions = set(self.by_word.get(word, ()))
+                candidates = positions if candidates is None else candidates & positions
+            if candidates is None:
+                candidates = range(len(self.windows))
+            return [self.windows[pos] for pos in sorted(candidates) if key in self.windows[pos][2]]
+        return [w for w in self.windows if key in w[2]]
+
+
+class ProcessSnapshotService:
+    """Background refresher that publishes a new Snapshot every interval."""
+
+    def __init__(self, interval=2.0, fast_interval=0.1, max_duty=0.05,
+                 process_lister=None, window_lister=None):
+        self.interval = interval
+        self.fast_interval = fast_interval
+        self.max_duty = max_duty          # at most this fraction of wall time spent refreshing
+        self.process_lister = process_lister or (list_processes if PSUTIL_AVAILABLE else list)
+        self.window_lister = window_lister or (list_windows if WIN32_AVAILABLE else list)
+        self.snapshot = Snapshot([], [], 0.0)
+        self._cond = threading.Condition()
+        self._wake = threading.Event()
+        self._waiters = 0
+        self._thread = None
+        self._running = False
+        self.refreshes = 0
+        self.refresh_seconds = 0.0
+        self.last_refresh_ms = 0.0
+
+    def start(self):
+        if self._thread is None:
+            self.refresh()
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name="process-snapshot", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._running = False
+        self._wake.set()
+
+    def refresh(self):
+        """Take a snapshot now and wake anyone waiting on it."""
+        start = time.perf_counter()
+        try:
+            processes = self.process_lister()
+        except Exception as e:
+            print("[PROCESSES] process listing failed:", e)
+            processes = []
+        try:
+            windows = self.window_lister()
+        except Exception as e:
+            print("[PROCESSES] window listing failed:", e)
+            windows = []
+        snapshot = Snapshot(processes, windows, time.monotonic())
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self.snapshot = snapshot
+            self.refreshes += 1
+            self.refresh_seconds += elapsed
+            self.last_refresh_ms = elapsed * 1000
+            self._cond.notify_all()
+        return snapshot
+
+    def invalidate(self):
+        """Ask the refresher for a new snapshot now (e.g. after killing something)."""
+        self._wake.set()
+
+    def _next_delay(self):
+        if self._waiters:
+            return self.fast_interval
+        # stretch the interval if refreshing is expensive on this machine
+        return max(self.interval, self.last_refresh_ms / 1000 / self.max_duty)
+
+    def _run(self):
+        while self._running:
+            self._wake.wait(self._next_delay())
+            self._wake.clear()
+            if self._running:
+                self.refresh()
+
+    # ---------- queries ----------
+    def pids(self, name):
+        return self.snapshot.pids(name)
+
+    def windows_matching(self, text):
+        return self.snapshot.windows_matching(text)
+
+    def wait_for_process(self, name, timeout):
+        """Block until a process called name is in a snapshot; returns its PIDs or []."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._waiters += 1
+            try:
+                self._wake.set()   # switch the refresher to fast_interval now
+                while True:
+                    pids = self.snapshot.pids(name)
+                    remaining = deadline - time.monotonic()
+                    if pids or remaining <= 0:
+                        return pids
+                    self._cond.wait(remaining)
+            finally:
+                self._waiters -= 1
+
+    def stats(self):
+        avg_ms = self.refresh_seconds / self.refreshes * 1000 if self.refreshes else 0.0
+        snapshot = self.snapshot
+        return {
+            "refreshes": self.refreshes,
+            "avg_refresh_ms": round(avg_ms, 2),
+            "last_refresh_ms": round(self.last_refresh_ms, 2),
+            "interval_s": round(self._next_delay(), 2),
+            "processes": snapshot.process_count,
+            "windows": len(snapshot.windows),
+        }
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(processes=400, windows=40, rounds=2000):
+    """Lookup cost on a synthetic process table vs. a linear scan of it."""
+    procs = [(1000 + i, f"proc{i}.exe") for i in range(processes)] + [(9, "msedge.exe")]
+    wins = [(i, 1000 + i, f"Document {i} - Editor") for i in range(windows)]
+    service = ProcessSnapshotService(process_lister=lambda: procs, window_lister=lambda: wins)
+    service.refresh()
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        [pid for pid, name in procs if "msedge" in name.lower()]
+    scan_us = (time.perf_counter() - start) / rounds * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        service.pids("msedge")
+    lookup_us = (time.perf_counter() - start) / rounds * 1e6
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        service.windows_matching("document 17 - editor")
+    window_us = (time.perf_counter() - start) / rounds * 1e6
+
+    print(f"processes: {len(procs)}  windows: {len(wins)}")
+    print(f"linear scan by name : {scan_us:8.2f} us")
+    print(f"snapshot pids()     : {lookup_us:8.2f} us")
+    print(f"window title match  : {window_us:8.2f} us")
+    if PSUTIL_AVAILABLE:
+        real = ProcessSnapshotService()
+        for _ in range(5):
+            real.refresh()
+        print("this machine        :", real.stats())
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,332 @@
+"""
+Reminders and timers for SIDD.
+
+Pending reminders live in a hierarchical timing wheel: four levels of 64
+slots with one-second ticks at the bottom (64 s, ~68 min, ~3 days, ~194
+days per level). Inserting or cancelling is a dict operation on one slot,
+whatever the number of pending reminders; advancing the clock touches only
+the slot that is due, plus one higher-level slot every 64 ticks whose
+entries cascade down. Nothing runs a thread or timer per reminder: the
+scheduler calls Reminders.tick() once a second.
+
+The wheel itself is not saved. Each reminder is stored as a plain record
+in memory["reminders"] ({id: {"due", "text", "kind", "created"}}) through
+the persist callback, and the wheel is rebuilt from those records on
+startup; reminders that came due while SIDD was off fire right away.
+
+parse_reminder() / parse_duration() turn "remind me in 20 minutes to call
+mom" or "set a timer for 5 minutes" into (due time, text).
+"""
+
+import datetime
+import random
+import re
+import threading
+import time
+import uuid
+
+
+# -------------------- TIMING WHEEL --------------------
+class TimingWheel:
+    """Hierarchical timing wheel keyed by id with O(1) add/cancel."""
+
+    def __init__(self, now, tick=1.0, slots=64, levels=4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.current = int(now // tick)
+        self._spans = [slots ** level for level in range(levels + 1)]   # ticks per slot, per level
+        self._wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self._where = {}        # id -> (level, slot), or None while in _ready
+        self._ready = {}        # already due: id -> (expire, payload)
+
+    def __len__(self):
+        return len(self._where)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def add(self, key, due, payload):
+        """Schedule payload under key at timestamp due (replaces an existing key)."""
+        self.cancel(key)
+        self._insert(key, max(int(-(-due // self.tick)), 0), payload)
+
+    def _insert(self, key, expire, payload):
+        delta = expire - self.current
+        if delta <= 0:
+            self._ready[key] = (expire, payload)
+            self._where[key] = None
+            return
+        level = 0
+        while level < self.levels - 1 and delta >= self._spans[level + 1]:
+            level += 1
+        # beyond the top level: park in the top wheel, it is re-inserted when its slot comes round
+        slot = (expire // self._spans[level]) % self.slots
+        self._wheels[level][slot][key] = (expire, payload)
+        self._where[key] = (level, slot)
+
+    def cancel(self, key):
+        """Remove key; returns its payload or None."""
+        if key not in self._where:
+            return None
+        where = self._where.pop(key)
+        if where is None:
+            return self._ready.pop(key)[1]
+        level, slot = where
+        return self._wheels[level][slot].pop(key)[1]
+
+    def advance(self, now):
+        """Move the wheel to now; returns [(key, payload)] that came due, earliest first."""
+        target = int(now // self.tick)
+        fired = list(self._ready.items())
+        self._ready.clear()
+        while self.current < target:
+            self.current += 1
+            # cascade: each time a level wraps, the next level's current slot moves down
+            for level in range(1, self.levels):
+                if self.current % self._spans[level]:
+                    break
+                slot = (self.current // self._spans[level]) % self.slots
+                entries = self._wheels[level][slot]
+                if entries:
+                    self._wheels[level][slot] = {}
+                    for key, (expire, payload) in entries.items():
+                        self._insert(key, expire, payload)
+            bucket = self._wheels[0][self.current % self.slots]
+            if bucket:
+                self._wheels[0][self.current % self.slots] = {}
+                fired.extend(bucket.items())
+            if self._ready:
+                fired.extend(self._ready.items())
+                self._ready.clear()
+        for key, _ in fired:
+            self._where.pop(key, None)
+        fired.sort(key=lambda item: item[1][0])
+        return [(key, payload) for key, (_, payload) in fired]
+
+
+# -------------------- REMINDERS --------------------
+class Reminders:
+    """Thread-safe reminder store: the wheel plus a persist(op, key, record) callback.
+
+    persist("set", key, record) is called for new reminders and
+    persist("delete", key, None) when one fires or is cancelled.
+    """
+
+    def __init__(self, on_fire, persist=None, clock=time.time):
+        self.on_fire = on_fire            # on_fire(key, record, late_seconds) for each due reminder
+        self.persist = persist
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._wheel = TimingWheel(clock())
+        self._records = {}                # key -> record, for listing and "cancel the last one"
+        self.fired = 0
+
+    def load(self, records):
+        """Rebuild the wheel from saved records; overdue ones fire on the next tick."""
+        with self._lock:
+            for key, record in (records or {}).items():
+                self._records[key] = record
+                self._wheel.add(key, record["due"], record)
+
+    def add(self, text, due, kind="reminder"):
+        record = {"due": due, "text": text, "kind": kind, "created": self.clock()}
+        key = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._records[key] = record
+            self._wheel.add(key, due, record)
+        if self.persist is not None:
+            self.persist("set", key, record)
+        return key
+
+    def cancel(self, key):
+        with self._lock:
+            record = self._records.pop(key, None)
+            self._wheel.cancel(key)
+        if record is not None and self.persist is not None:
+            self.persist("delete", key, None)
+        return record
+
+    def cancel_latest(self, kind=None):
+        """Cancel the most recently created pending reminder (of kind, if given)."""
+        with self._lock:
+            candidates = [(r["created"], k) for k, r in self._records.items() if kind is None or r["kind"] == kind]
+        if not candidates:
+            return None
+        return self.cancel(max(candidates)[1])
+
+    def pending(self, kind=None):
+        """[(key, record)] sorted by due time."""
+        with self._lock:
+            items = [(k, r) for k, r in self._records.items() if kind is None or r["kind"] == kind]
+        return sorted(items, key=lambda item: item[1]["due"])
+
+    def tick(self):
+        """Fire everything due by now (called once a second by the scheduler)."""
+        now = self.clock()
+        with self._lock:
+            due = self._wheel.advance(now)
+            for key, _ in due:
+                self._records.pop(key, None)
+        for key, record in due:
+            if self.persist is not None:
+                self.persist("delete", key, None)
+            self.fired += 1
+            try:
+                self.on_fire(key, record, now - record["due"])
+            except Exception as e:
+                print("[REMINDERS] firing failed:", e)
+        return len(due)
+
+    def __len__(self):
+        return len(self._records)
+
+
+# -------------------- PARSING --------------------
+_SMALL_NUMBERS = {
+    "zero": 0, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18, "nineteen": 19,
+}
+_TENS = {
+    "twenty": 20, "thirty": 30, "forty": 40, "fifty": 50, "sixty": 60,
+    "seventy": 70, "eighty": 80, "ninety": 90,
+}
+_UNITS = {"second": 1, "sec": 1, "minute": 60, "min": 60, "hour": 3600, "hr": 3600, "day": 86400}
+
+
+def _alternation(words):
+    return "|".join(sorted(words, key=len, reverse=True))
+
+
+# "5", "1.5", "a", "an", "seven", "twenty", "twenty five", "twenty-five"
+_NUM = (r"\b(?P<number>\d+(?:\.\d+)?"
+        rf"|(?:{_alternation(_TENS)})(?:[\s-]+(?:{_alternation(w for w, v in _SMALL_NUMBERS.items() if 0 < v < 10)}))?"
+        rf"|{_alternation(_SMALL_NUMBERS)}|an|a)")
+_AND_A_HALF = r"\s+and\s+(?:a\s+)?half"
+# "20 minutes", "one and a half hours", "an hour and a half"
+_DURATION_RE = re.compile(_NUM + rf"(?P<half>{_AND_A_HALF})?\s+(?P<unit>second|sec|minute|min|hour|hr|day)s?\b"
+                          rf"(?P<half_after>{_AND_A_HALF})?")
+_HALF_RE = re.compile(r"\bhalf an? hour\b")
+_AT_RE = re.compile(r"\bat\s+(\d{1,2})(?::(\d{2}))?\s*(a\.?m\.?|p\.?m\.?)?")
+
+
+def _number_value(number):
+    """Numeric value of a matched number: digits or words up to ninety-nine."""
+    try:
+        return float(number)
+    except ValueError:
+        pass
+    if number in ("a", "an"):
+        return 1
+    return sum(_SMALL_NUMBERS.get(word, _TENS.get(word, 0)) for word in re.split(r"[\s-]+", number))
+
+
+def parse_duration(text):
+    """Total seconds mentioned in text ("1 hour 30 minutes", "half an hour"), or None."""
+    text = text.lower()
+    total = 0.0
+    found = False
+    if _HALF_RE.search(text):
+        total += 1800
+        found = True
+        text = _HALF_RE.sub(" ", text)
+    for m in _DURATION_RE.finditer(text):
+        value = _number_value(m.group("number"))
+        if m.group("half") or m.group("half_after"):
+            value += 0.5
+        total += value * _UNITS[m.group("unit")]
+        found = True
+    return total if found else None
+
+
+def _strip(text, pattern):
+    return re.sub(pattern, " ", text).strip()
+
+
+def parse_reminder(query, now=None):
+    """(due timestamp, reminder text) from "remind me ...", or (None, text) if no time was given."""
+    now = time.time() if now is None else now
+    text = query.lower().strip()
+    text = re.sub(r"^remind me\b", "", text).strip()
+    due = None
+    seconds = parse_duration(text)
+    if seconds is not None:
+        due = now + seconds
+        text = _strip(text, r"\b(in|after)\s+" + _HALF_RE.pattern)
+        text = _strip(text, r"\b(in|after)\s+(" + _DURATION_RE.pattern + r"(\s+and\s+)?)+")
+        text = _strip(text, _DURATION_RE.pattern)
+    else:
+        m = _AT_RE.search(text)
+        if m:
+            hour, minute, meridiem = int(m.group(1)), int(m.group(2) or 0), (m.group(3) or "").replace(".", "")
+            if meridiem == "pm" and hour < 12:
+                hour += 12
+            elif meridiem == "am" and hour == 12:
+                hour = 0
+            if hour < 24 and minute < 60:
+                base = datetime.datetime.fromtimestamp(now)
+                at = base.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                if at <= base:
+                    at += datetime.timedelta(days=1)
+                due = at.timestamp()
+                text = (text[:m.start()] + " " + text[m.end():]).strip()
+    text = re.sub(r"^(to|that|about)\s+", "", " ".join(text.split()))
+    return due, text
+
+
+def describe_delay(seconds):
+    """Spoken form of a delay: "20 minutes", "1 hour and 5 minutes"."""
+    seconds = int(round(seconds))
+    parts = []
+    for name, size in (("day", 86400), ("hour", 3600), ("minute", 60), ("second", 1)):
+        if seconds >= size:
+            count, seconds = divmod(seconds, size)
+            parts.append(f"{count} {name}{'s' if count != 1 else ''}")
+    if not parts:
+        return "now"
+    return " and ".join(parts[:2])
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(count=100000, horizon=30 * 86400, seed=5):
+    import heapq
+
+    rng = random.Random(seed)
+    now = 1_000_000.0
+    dues = [now + rng.uniform(1, horizon) for _ in range(count)]
+
+    wheel = TimingWheel(now)
+    start = time.perf_counter()
+    for i, due in enumerate(dues):
+        wheel.add(i, due, None)
+    add_us = (time.perf_counter() - start) / count * 1e6
+
+    start = time.perf_counter()
+    for i in range(0, count, 2):
+        wheel.cancel(i)
+    cancel_us = (time.perf_counter() - start) / (count // 2) * 1e6
+
+    # a day of one-second ticks
+    start = time.perf_counter()
+    fired = 0
+    for t in range(1, 86400 + 1):
+        fired += len(wheel.advance(now + t))
+    tick_us = (time.perf_counter() - start) / 86400 * 1e6
+    expected = sum(1 for i, d in enumerate(dues) if i % 2 and d <= now + 86400)
+
+    # heap with lazy deletion, for comparison
+    heap = []
+    start = time.perf_counter()
+    for i, due in enumerate(dues):
+        heapq.heappush(heap, (due, i))
+    heap_add_us = (time.perf_counter() - start) / count * 1e6
+
+    print(f"pending: {count} over {horizon // 86400} days")
+    print(f"wheel add     : {add_us:6.2f} us   (heap push {heap_add_us:.2f} us)")
+    print(f"wheel cancel  : {cancel_us:6.2f} us   (heap needs lazy deletion or O(n))")
+    print(f"wheel tick    : {tick_us:6.2f} us per second of clock, {fired} fired (expected {expected})")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,332 @@
+"""
+One scheduler thread for SIDD's background jobs.
+
+Jobs sit in a heap ordered by their next run time. The thread sleeps on a
+condition until the earliest job is due (or a new, earlier job is added),
+so a 9 AM job runs at 9 AM instead of at the next tick of some 5-minute
+sleep loop.
+
+Triggers:
+  every(seconds)             periodic
+  cron(hour=9, minute=0)     calendar fields, like a crontab line
+  once(delay=... / at=...)   one-shot
+
+Each job can add random jitter to its run times and picks what happens
+when runs were missed (PC asleep, scheduler blocked):
+  SKIP      drop the missed runs, wait for the next slot
+  RUN_ONCE  run once now, then continue from the next slot
+  CATCH_UP  run once per missed slot (capped by max_catch_up)
+
+Jobs run on the scheduler thread, so they should be short. Slow jobs pass
+blocking=False and run on their own thread; a run is skipped while the
+previous one is still going.
+
+Times are wall-clock (time.time) so cron jobs follow the system clock and a
+suspend/resume shows up as lateness handled by the missed-run policy.
+"""
+
+import datetime
+import heapq
+import itertools
+import random
+import threading
+import time
+
+SKIP = "skip"
+RUN_ONCE = "run_once"
+CATCH_UP = "catch_up"
+
+
+# -------------------- TRIGGERS --------------------
+class IntervalTrigger:
+    def __init__(self, seconds, start_delay=None):
+        self.seconds = seconds
+        self.start_delay = seconds if start_delay is None else start_delay
+
+    def first(self, now):
+        return now + self.start_delay
+
+    def next_after(self, prev, now):
+        return prev + self.seconds
+
+
+class CronTrigger:
+    """Matches minute/hour/day/month/weekday fields (None = any, int or set of ints).
+
+    weekday follows datetime: Monday is 0.
+    """
+
+    def __init__(self, minute=0, hour=None, day=None, month=None, weekday=None):
+        self.minute = self._field(minute)
+        self.hour = self._field(hour)
+        self.day = self._field(day)
+        self.month = self._field(month)
+        self.weekday = self._field(weekday)
+
+    @staticmethod
+    def _field(value):
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return {value}
+        return set(value)
+
+    @staticmethod
+    def _ok(field, value):
+        return field is None or value in field
+
+    def _next(self, t):
+        dt = datetime.datetime.fromtimestamp(t).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        # jump a whole day / hour at a time when those fields do not match
+        for _ in range(366 * 2 + 24 + 60):
+            if not (self._ok(self.month, dt.month) and self._ok(self.day, dt.day)
+                    and self._ok(self.weekday, dt.weekday())):
+                dt = (dt + datetime.timedelta(days=1)).replace(hour=0, minute=0)
+            elif not self._ok(self.hour, dt.hour):
+                dt = (dt + datetime.timedelta(hours=1)).replace(minute=0)
+            elif not self._ok(self.minute, dt.minute):
+                dt += datetime.timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError("cron fields never match")
+
+    def first(self, now):
+        return self._next(now)
+
+    def next_after(self, prev, now):
+        return self._next(prev)
+
+
+class OnceTrigger:
+    def __init__(self, at):
+        self.at = at
+
+    def first(self, now):
+        return self.at
+
+    def next_after(self, prev, now):
+        return None
+
+
+# -------------------- JOBS --------------------
+class Job:
+    def __init__(self, name, fn, trigger, jitter, misfire, grace, max_catch_up, blocking):
+        self.name = name
+        self.fn = fn
+        self.trigger = trigger
+        self.jitter = jitter              # seconds of random delay added to each run
+        self.misfire = misfire
+        self.grace = grace                # lateness tolerated before a run counts as missed
+        self.max_catch_up = max_catch_up
+        self.blocking = blocking
+        self.cancelled = False
+        self.slot = None                  # nominal time of the next run (without jitter)
+        self.next_run = None
+        self.running = False
+        self.runs = 0
+        self.missed = 0
+        self.errors = 0
+        self.run_seconds = 0.0
+        self.max_run_seconds = 0.0
+        self.last_lateness = 0.0
+        self.max_lateness = 0.0
+
+    def _set_slot(self, slot):
+        self.slot = slot
+        self.next_run = None if slot is None else slot + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+    def stats(self, now):
+        return {
+            "runs": self.runs,
+            "missed": self.missed,
+            "errors": self.errors,
+            "avg_run_ms": round(self.run_seconds / self.runs * 1000, 2) if self.runs else 0.0,
+            "max_run_ms": round(self.max_run_seconds * 1000, 2),
+            "last_lateness_ms": round(self.last_lateness * 1000, 2),
+            "max_lateness_ms": round(self.max_lateness * 1000, 2),
+            "next_in_s": round(self.next_run - now, 1) if self.next_run is not None else None,
+        }
+
+
+class Scheduler:
+    """Heap of timers served by one thread."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._heap = []                   # (next_run, seq, job)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._jobs = {}
+        self._thread = None
+        self._stopped = False
+
+    # ---------- registration ----------
+    def add(self, name, fn, trigger, jitter=0.0, misfire=RUN_ONCE, grace=None,
+            max_catch_up=10, blocking=True):
+        """Register fn under name (replacing a job of the same name); returns the Job."""
+        if grace is None:
+            grace = getattr(trigger, "seconds", 60.0)
+        job = Job(name, fn, trigger, jitter, misfire, grace, max_catch_up, blocking)
+        with self._cond:
+            old = self._jobs.get(name)
+            if old is not None:
+                old.cancelled = True
+            self._jobs[name] = job
+            job._set_slot(trigger.first(self.clock()))
+            self._push(job)
+        return job
+
+    def every(self, seconds, fn, name=None, start_delay=None, **options):
+        return self.add(name or fn.__name__, fn, IntervalTrigger(seconds, start_delay), **options)
+
+    def cron(self, fn, name=None, minute=0, hour=None, day=None, month=None, weekday=None, **options):
+        trigger = CronTrigger(minute=minute, hour=hour, day=day, month=month, weekday=weekday)
+        return self.add(name or fn.__name__, fn, trigger, **options)
+
+    def once(self, fn, name=None, delay=None, at=None, **options):
+        """Run fn once, delay seconds from now or at a timestamp."""
+        if at is None:
+            at = self.clock() + (delay or 0.0)
+        return self.add(name or fn.__name__, fn, OnceTrigger(at), **options)
+
+    def cancel(self, name):
+        """Cancel a job by name; the heap entry is dropped when it surfaces."""
+        with self._cond:
+            job = self._jobs.pop(name, None)
+            if job is None:
+                return False
+            job.cancelled = True
+            self._cond.notify()
+            return True
+
+    def _push(self, job):
+        if job.next_run is None:
+            # one-shot job finished
+            if self._jobs.get(job.name) is job:
+                del self._jobs[job.name]
+            return
+        heapq.heappush(self._heap, (job.next_run, next(self._seq), job))
+        # wake the thread if this job is now the earliest
+        if self._heap[0][2] is job:
+            self._cond.notify()
+
+    # ---------- running ----------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._stopped:
+                        return
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    delay = self._heap[0][0] - self.clock()
+                    if delay <= 0:
+                        break
+                    self._cond.wait(delay)
+                _, _, job = heapq.heappop(self._heap)
+            self._fire(job)
+
+    def _fire(self, job):
+        now = self.clock()
+        lateness = max(0.0, now - job.next_run)
+        # how many nominal slots have passed by now
+        due = [job.slot]
+        if lateness > job.grace:
+            slot = job.trigger.next_after(job.slot, now)
+            while slot is not None and slot <= now and len(due) <= job.max_catch_up:
+                due.append(slot)
+                slot = job.trigger.next_after(slot, now)
+        if lateness <= job.grace:
+            runs = 1
+        elif job.misfire == SKIP:
+            runs = 0
+        elif job.misfire == CATCH_UP:
+            runs = len(due)
+        else:
+            runs = 1
+        job.missed += len(due) - runs
+
+        job.last_lateness = lateness
+        job.max_lateness = max(job.max_lateness, lateness)
+        for _ in range(runs):
+            if job.cancelled:
+                break
+            self._call(job)
+
+        # next slot strictly after now (missed slots are never queued again)
+        slot = job.trigger.next_after(due[-1], now)
+        while slot is not None and slot <= now and lateness > job.grace:
+            slot = job.trigger.next_after(slot, now)
+        with self._cond:
+            if not job.cancelled:
+                job._set_slot(slot)
+                self._push(job)
+
+    def _call(self, job):
+        if job.running:
+            job.missed += 1           # previous non-blocking run still going
+            return
+        if job.blocking:
+            self._execute(job)
+        else:
+            job.running = True
+            threading.Thread(target=self._execute, args=(job,), name=f"job-{job.name}", daemon=True).start()
+
+    def _execute(self, job):
+        job.running = True
+        start = time.perf_counter()
+        try:
+            job.fn()
+        except Exception as e:
+            job.errors += 1
+            print(f"[SCHEDULER] job {job.name} failed:", e)
+        finally:
+            elapsed = time.perf_counter() - start
+            job.runs += 1
+            job.run_seconds += elapsed
+            job.max_run_seconds = max(job.max_run_seconds, elapsed)
+            job.running = False
+
+    # ---------- introspection ----------
+    def jobs(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def stats(self):
+        """{job name: run count, run time, lateness, next run} for every registered job."""
+        now = self.clock()
+        return {job.name: job.stats(now) for job in self.jobs()}
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(jobs=2000, seconds=2.0):
+    """Timer accuracy with many periodic jobs on one thread."""
+    sched = Scheduler()
+    for i in range(jobs):
+        sched.every(0.05 + (i % 20) * 0.01, lambda: None, name=f"job{i}", start_delay=0.01)
+    sched.start()
+    time.sleep(seconds)
+    sched.stop()
+    stats = sched.stats().values()
+    runs = sum(s["runs"] for s in stats)
+    worst = max(s["max_lateness_ms"] for s in stats)
+    avg_late = sum(s["last_lateness_ms"] for s in stats) / len(stats)
+    print(f"{jobs} jobs, {runs} runs in {seconds:.1f}s")
+    print(f"lateness: avg {avg_late:.2f} ms, worst {worst:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark()
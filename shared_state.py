@@ -0,0 +1,105 @@
+"""
+Shared runtime state for SIDD's threads.
+
+The window scanner, the proactive checker and the command loop all read
+and write a few pieces of state (active window, UI elements, notifications,
+last query, last opened app). SharedState keeps them in one place:
+
+  - Every write builds a new dict (copy-on-write) and swaps it in under a
+    writer lock, so readers take snapshot() without locking and never see
+    a half-applied update or block the scanner.
+  - Each write bumps a version number, so a reader can tell whether
+    anything changed since it last looked.
+  - subscribe() registers a callback that runs after a write changes the
+    keys it cares about.
+
+Store immutable values (tuples, strings, numbers). A list put into the
+state could be mutated in place behind every snapshot's back.
+"""
+
+import threading
+from types import MappingProxyType
+
+
+class StateSnapshot:
+    """Read-only view of the state at one version."""
+
+    __slots__ = ("version", "values")
+
+    def __init__(self, version, values):
+        self.version = version
+        self.values = MappingProxyType(values)
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+
+class SharedState:
+    """Versioned copy-on-write key/value state with change subscriptions."""
+
+    def __init__(self, **initial):
+        self._snapshot = StateSnapshot(0, dict(initial))
+        self._write_lock = threading.Lock()
+        self._subscribers = []          # [(callback, keys or None)]
+        self._sub_lock = threading.Lock()
+
+    def snapshot(self):
+        """Current StateSnapshot; never blocks."""
+        return self._snapshot
+
+    @property
+    def version(self):
+        return self._snapshot.version
+
+    def get(self, key, default=None):
+        return self._snapshot.values.get(key, default)
+
+    def update(self, **changes):
+        """Set keys; returns the new snapshot (the old one if nothing changed)."""
+        return self._commit(lambda values: changes)
+
+    def mutate(self, key, fn, default=None):
+        """Atomically replace key with fn(current value), e.g. appending to a tuple."""
+        return self._commit(lambda values: {key: fn(values.get(key, default))})
+
+    def _commit(self, make_changes):
+        with self._write_lock:
+            old = self._snapshot
+            changes = make_changes(old.values)
+            changed = {k for k, v in changes.items() if k not in old.values or old.values[k] != v}
+            if not changed:
+                return old
+            values = dict(old.values)
+            values.update((k, changes[k]) for k in changed)
+            new = StateSnapshot(old.version + 1, values)
+            self._snapshot = new
+        self._notify(new, changed)
+        return new
+
+    def subscribe(self, callback, keys=None):
+        """Call callback(snapshot, changed_keys) after writes touching keys (all keys if None).
+
+        Callbacks run on the writing thread, after the write is visible, and
+        should return quickly. With several writers, callbacks can arrive out
+        of order; compare snapshot.version if that matters. Returns an
+        unsubscribe function.
+        """
+        entry = (callback, frozenset(keys) if keys is not None else None)
+        with self._sub_lock:
+            self._subscribers = self._subscribers + [entry]
+
+        def unsubscribe():
+            with self._sub_lock:
+                self._subscribers = [s for s in self._subscribers if s is not entry]
+        return unsubscribe
+
+    def _notify(self, snapshot, changed):
+        for callback, keys in self._subscribers:
+            if keys is None or keys & changed:
+                try:
+                    callback(snapshot, changed)
+                except Exception as e:
+                    print("[STATE] subscriber error:", e)
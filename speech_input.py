@@ -0,0 +1,536 @@
+"""
+Speech input for SIDD: where utterances come from and how they become text.
+
+Sources (produce Utterance segments):
+  MicrophoneSource - one always-open microphone stream, calibrated once.
+  ReplaySource     - WAV files from a folder, for offline runs and benchmarks.
+
+Engines (turn an Utterance into text):
+  GoogleEngine     - speech_recognition's recognize_google (network).
+  VoskEngine       - offline, CPU-only Vosk model.
+  TranscriptEngine - returns the .txt transcript stored next to a replayed WAV;
+                     deterministic, for CI.
+
+A voice activity detector (VoiceActivityDetector, NumPy) sits in front of
+the engines: the microphone is segmented with it directly (short hangover
+instead of a fixed 0.8 s pause), and any segment without speech is dropped
+before it costs a recognizer call.
+
+Run `python speech_input.py bench <corpus_dir>` to measure
+end-of-speech -> intent latency for each available engine.
+"""
+
+import array
+import json
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+import wave
+from pathlib import Path
+
+from intent_router import route
+
+# Optional: speech_recognition for the microphone and Google engine
+try:
+    import speech_recognition as sr
+    SR_AVAILABLE = True
+except Exception:
+    SR_AVAILABLE = False
+
+# Optional: numpy for voice activity detection
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except Exception:
+    NUMPY_AVAILABLE = False
+
+# Optional: vosk for offline recognition
+try:
+    import vosk
+    VOSK_AVAILABLE = True
+except Exception:
+    VOSK_AVAILABLE = False
+
+
+class ASRError(Exception):
+    """The recognition backend failed (network down, model missing, ...)."""
+
+
+class Utterance:
+    """One segment of speech: 16-bit PCM plus timing information."""
+
+    def __init__(self, frame_data, sample_rate, sample_width=2, start=None, end=None,
+                 transcript=None, name=None, audio=None):
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.end = end if end is not None else time.monotonic()  # end of speech
+        self.start = start if start is not None else self.end - self.duration
+        self.transcript = transcript   # known text (replay corpora only)
+        self.name = name
+        self.audio = audio             # original sr.AudioData, if any
+        self.during_speech = False     # overlapped SIDD's own speech (likely echo)
+
+    @property
+    def duration(self):
+        return len(self.frame_data) / float(self.sample_rate * self.sample_width)
+
+    def to_audio_data(self):
+        if self.audio is None:
+            self.audio = sr.AudioData(self.frame_data, self.sample_rate, self.sample_width)
+        return self.audio
+
+
+# -------------------- VOICE ACTIVITY DETECTION --------------------
+class VoiceActivityDetector:
+    """Energy + speech-band spectral VAD over fixed 30 ms frames.
+
+    A frame is speech when it is `margin_db` above the tracked noise floor
+    and most of its energy sits in the 300-3400 Hz voice band. Speech starts
+    after `min_speech_ms` of consecutive speech frames and ends after
+    `hangover_ms` of non-speech; `padding_ms` is kept on both sides.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, margin_db=9.0, band_ratio=0.45,
+                 min_speech_ms=90, hangover_ms=300, padding_ms=150):
+        self.frame_ms = frame_ms
+        self.margin_db = margin_db
+        self.band_ratio = band_ratio
+        self.min_speech = max(1, min_speech_ms // frame_ms)
+        self.hangover = max(1, hangover_ms // frame_ms)
+        self.padding = padding_ms // frame_ms
+        self.noise_db = None
+        self.set_sample_rate(sample_rate)
+
+        self.segments = 0   # segments checked by trim()
+        self.dropped = 0    # segments with no speech = recognizer calls avoided
+        self.segmented = 0  # utterances cut from a live stream by VadSegmenter
+        self.discarded = 0  # short bursts VadSegmenter threw away = recognizer calls avoided
+
+    def set_sample_rate(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.frame_len = int(sample_rate * self.frame_ms / 1000)
+        freqs = np.fft.rfftfreq(self.frame_len, 1.0 / sample_rate)
+        self._band = (freqs >= 300) & (freqs <= 3400)
+        self._window = np.hanning(self.frame_len).astype(np.float32)
+
+    def _frames(self, pcm):
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        n = len(samples) // self.frame_len
+        return samples[:n * self.frame_len].reshape(n, self.frame_len).astype(np.float32) / 32768.0
+
+    def features(self, pcm):
+        """Per-frame (energy in dBFS, fraction of energy in the voice band)."""
+        frames = self._frames(pcm)
+        if not len(frames):
+            return np.zeros(0), np.zeros(0)
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        spectrum = np.abs(np.fft.rfft(frames * self._window, axis=1)) ** 2
+        ratio = spectrum[:, self._band].sum(axis=1) / (spectrum.sum(axis=1) + 1e-10)
+        return energy_db, ratio
+
+    def calibrate(self, pcm):
+        """Set the noise floor from audio known to be (mostly) background."""
+        energy_db, _ = self.features(pcm)
+        if len(energy_db):
+            self.noise_db = max(float(np.percentile(energy_db, 20)), -70.0)
+
+    def is_speech(self, energy_db, ratio):
+        """Vector of per-frame speech decisions; adapts the noise floor on quiet frames."""
+        if self.noise_db is None:
+            self.noise_db = max(float(np.percentile(energy_db, 20)), -70.0) if len(energy_db) else -60.0
+        speech = (energy_db > self.noise_db + self.margin_db) & (ratio > self.band_ratio)
+        quiet = energy_db[~speech]
+        if len(quiet):
+            # slow follow of the background level (fans, traffic, ...)
+            self.noise_db = max(0.95 * self.noise_db + 0.05 * float(np.mean(quiet)), -70.0)
+        return speech
+
+    def trim(self, utterance):
+        """Return utterance cut to its speech (plus padding), or None if it has none."""
+        self.segments += 1
+        if utterance.sample_rate != self.sample_rate:
+            self.set_sample_rate(utterance.sample_rate)
+        speech = self.is_speech(*self.features(utterance.frame_data))
+
+        # first/last frame of a run of at least min_speech speech frames
+        run = 0
+        first = last = None
+        for i, flag in enumerate(speech.tolist()):
+            run = run + 1 if flag else 0
+            if run >= self.min_speech:
+                if first is None:
+                    first = i - run + 1
+                last = i
+        if first is None:
+            self.dropped += 1
+            return None
+
+        frame_bytes = self.frame_len * utterance.sample_width
+        lo = max(0, first - self.padding) * frame_bytes
+        hi = min(len(speech), last + 1 + self.padding) * frame_bytes
+        trimmed = Utterance(utterance.frame_data[lo:hi], utterance.sample_rate, utterance.sample_width,
+                            end=utterance.end, transcript=utterance.transcript, name=utterance.name)
+        trimmed.start = utterance.start + lo / float(utterance.sample_rate * utterance.sample_width)
+        return trimmed
+
+    def stats(self):
+        parts = []
+        if self.segmented or self.discarded:
+            parts.append(f"{self.segmented} utterances segmented, "
+                         f"{self.discarded} noise bursts discarded (recognizer calls avoided)")
+        if self.segments:
+            parts.append(f"{self.segments} segments checked, {self.dropped} recognizer calls avoided")
+        return ", ".join(parts) or "no audio checked"
+
+
+class VadSegmenter:
+    """Cuts a live PCM stream into utterances with a VoiceActivityDetector."""
+
+    def __init__(self, vad, sample_width=2, max_seconds=7):
+        self.vad = vad
+        self.sample_width = sample_width
+        self.max_frames = int(max_seconds * 1000 / vad.frame_ms)
+        self._pending = b""
+        self._preroll = []      # recent non-speech frames (for leading padding)
+        self._frames = []       # frames of the utterance in progress
+        self._speech_run = 0
+        self._silence_run = 0
+        self._triggered = False
+
+    def push(self, pcm):
+        """Feed raw PCM; returns the list of utterances completed by it."""
+        frame_bytes = self.vad.frame_len * self.sample_width
+        data = self._pending + pcm
+        n = len(data) // frame_bytes
+        self._pending = data[n * frame_bytes:]
+        if not n:
+            return []
+
+        chunk = data[:n * frame_bytes]
+        speech = self.vad.is_speech(*self.vad.features(chunk))
+        done = []
+        for i, flag in enumerate(speech.tolist()):
+            frame = chunk[i * frame_bytes:(i + 1) * frame_bytes]
+            if not self._triggered:
+                self._preroll.append(frame)
+                if not flag and self._speech_run:
+                    # a click, cough or door slam: too short to be speech, never recognized
+                    self.vad.discarded += 1
+                self._speech_run = self._speech_run + 1 if flag else 0
+                if self._speech_run >= self.vad.min_speech:
+                    self._triggered = True
+                    self._silence_run = 0
+                    self._frames = self._preroll[-(self.vad.min_speech + self.vad.padding):]
+                    self._preroll = []
+                else:
+                    del self._preroll[:-(self.vad.min_speech + self.vad.padding)]
+                continue
+
+            self._frames.append(frame)
+            self._silence_run = 0 if flag else self._silence_run + 1
+            if self._silence_run >= self.vad.hangover or len(self._frames) >= self.max_frames:
+                done.append(self._finish())
+        return done
+
+    def _finish(self):
+        # keep `padding` frames of the trailing silence
+        extra = max(0, self._silence_run - self.vad.padding)
+        frames = self._frames[:len(self._frames) - extra] if extra else self._frames
+        pcm = b"".join(frames)
+        utterance = Utterance(pcm, self.vad.sample_rate, self.sample_width, end=time.monotonic())
+        utterance.start += self.vad.padding * self.vad.frame_ms / 1000.0
+        self.vad.segmented += 1
+        self._frames = []
+        self._speech_run = 0
+        self._silence_run = 0
+        self._triggered = False
+        return utterance
+
+
+# -------------------- SOURCES --------------------
+class MicrophoneSource:
+    """Keeps one microphone stream open and queues every phrase heard.
+
+    With NumPy available the stream is segmented by the VAD; otherwise it
+    falls back to speech_recognition's listen() with a dynamic energy
+    threshold.
+    """
+
+    def __init__(self, device_index=1, phrase_time_limit=7, use_vad=NUMPY_AVAILABLE,
+                 reopen_delay=0.5, max_reopen_delay=5.0):
+        self.device_index = device_index
+        self.phrase_time_limit = phrase_time_limit
+        self.reopen_delay = reopen_delay
+        self.max_reopen_delay = max_reopen_delay
+        self.recognizer = sr.Recognizer()
+        self.vad = VoiceActivityDetector() if use_vad else None
+        self._queue = queue.Queue()
+        self._speaking = False
+        self._speech_ended = 0.0
+        self._stop = None
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        """Calibrate once, then listen in the background.
+
+        After the first calibration the noise floor keeps adapting between
+        phrases instead of paying for a fresh 1 second calibration every turn.
+        """
+        if self.vad is not None:
+            self._running = True
+            self._thread = threading.Thread(target=self._capture, name="mic-capture", daemon=True)
+            self._thread.start()
+            self._stop = self._stop_capture
+            return
+
+        mic = sr.Microphone(device_index=self.device_index)
+        with mic as source:
+            self.recognizer.adjust_for_ambient_noise(source)
+        self.recognizer.dynamic_energy_threshold = True
+        self._stop = self.recognizer.listen_in_background(
+            mic, self._on_audio, phrase_time_limit=self.phrase_time_limit
+        )
+
+    def _capture(self):
+        frame_len = self.vad.frame_len
+        segmenter = VadSegmenter(self.vad, max_seconds=self.phrase_time_limit)
+        delay = self.reopen_delay
+        while self._running:
+            try:
+                mic = sr.Microphone(device_index=self.device_index, sample_rate=self.vad.sample_rate,
+                                    chunk_size=frame_len)
+                with mic as source:
+                    # one second of background noise sets the initial floor
+                    calib = b"".join(source.stream.read(frame_len)
+                                     for _ in range(self.vad.sample_rate // frame_len))
+                    self.vad.calibrate(calib)
+                    delay = self.reopen_delay
+                    while self._running:
+                        try:
+                            pcm = source.stream.read(frame_len)
+                        except Exception as e:
+                            print("Microphone read error:", e)
+                            time.sleep(0.1)
+                            continue
+                        for utterance in segmenter.push(pcm):
+                            self._put(utterance)
+            except Exception as e:
+                # no device yet, unplugged, or held by another app: retry with backoff
+                print("Microphone open failed:", repr(e))
+                deadline = time.monotonic() + delay
+                while self._running and time.monotonic() < deadline:
+                    time.sleep(0.05)
+                delay = min(delay * 2, self.max_reopen_delay)
+
+    def _stop_capture(self, wait_for_stop=True):
+        # same signature as the stopper listen_in_background() returns
+        self._running = False
+        if wait_for_stop and self._thread is not None:
+            self._thread.join()
+
+    def _on_audio(self, recognizer, audio):
+        end = time.monotonic()
+        utterance = Utterance(audio.frame_data, audio.sample_rate, audio.sample_width,
+                              end=end, audio=audio)
+        # listen() keeps up to non_speaking_duration of silence before the phrase
+        utterance.start += recognizer.non_speaking_duration
+        self._put(utterance)
+
+    def _put(self, utterance):
+        utterance.during_speech = self._speaking or utterance.start < self._speech_ended
+        self._queue.put(utterance)
+
+    def set_speaking(self, speaking):
+        """Called by the TTS worker; segments overlapping speech get during_speech set."""
+        if not speaking:
+            self._speech_ended = time.monotonic()
+        self._speaking = speaking
+
+    def next(self, timeout=None):
+        """Return the next Utterance, or None on timeout."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self):
+        if self._stop is not None:
+            self._stop(wait_for_stop=False)
+            self._stop = None
+
+
+def read_wav(path):
+    """Load a 16-bit WAV file as an Utterance (multi-channel files keep channel 0)."""
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV is supported")
+        channels = wf.getnchannels()
+        rate = wf.getframerate()
+        frames = wf.readframes(wf.getnframes())
+    if channels > 1:
+        frames = array.array("h", frames)[::channels].tobytes()  # keep the first channel
+    transcript_path = Path(path).with_suffix(".txt")
+    transcript = None
+    if transcript_path.exists():
+        transcript = transcript_path.read_text(encoding="utf-8").strip().lower()
+    return Utterance(frames, rate, 2, transcript=transcript, name=Path(path).name)
+
+
+class ReplaySource:
+    """Replays a folder of WAV files (sorted by name) as if they were spoken.
+
+    Each `foo.wav` may have a `foo.txt` with the expected transcript. Segments
+    are stamped with end = the moment they are handed out, so latency measured
+    from `utterance.end` matches what a live microphone would see.
+    """
+
+    def __init__(self, folder, loop=False, use_vad=NUMPY_AVAILABLE):
+        self.paths = sorted(Path(folder).glob("*.wav"))
+        self.loop = loop
+        self.vad = VoiceActivityDetector() if use_vad else None
+        self._pos = 0
+
+    def start(self):
+        pass
+
+    def set_speaking(self, speaking):
+        pass
+
+    def next(self, timeout=None):
+        while True:
+            if self._pos >= len(self.paths):
+                if not self.loop or not self.paths:
+                    # nothing left to say; behave like a quiet microphone
+                    time.sleep(0.5 if timeout is None else timeout)
+                    return None
+                self._pos = 0
+            utterance = read_wav(self.paths[self._pos])
+            self._pos += 1
+            utterance.end = time.monotonic()
+            utterance.start = utterance.end - utterance.duration
+            if self.vad is not None:
+                utterance = self.vad.trim(utterance)
+                if utterance is None:
+                    continue  # silence / noise only: never reaches the recognizer
+            return utterance
+
+    def stop(self):
+        pass
+
+
+# -------------------- ENGINES --------------------
+class GoogleEngine:
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, utterance, language="en-in"):
+        """Return lowercase text, or "" if nothing intelligible was said."""
+        try:
+            return self.recognizer.recognize_google(utterance.to_audio_data(), language=language).lower()
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise ASRError(str(e))
+
+
+class VoskEngine:
+    """Offline recognition with a Vosk model folder (e.g. vosk-model-small-en-in)."""
+
+    name = "vosk"
+
+    def __init__(self, model_path):
+        if not VOSK_AVAILABLE:
+            raise ASRError("vosk is not installed")
+        if not os.path.isdir(model_path):
+            raise ASRError(f"Vosk model not found: {model_path}")
+        vosk.SetLogLevel(-1)
+        self.model = vosk.Model(model_path)
+
+    def transcribe(self, utterance, language="en-in"):
+        # the model decides the language; `language` is accepted for interface parity
+        rec = vosk.KaldiRecognizer(self.model, utterance.sample_rate)
+        rec.AcceptWaveform(utterance.frame_data)
+        return json.loads(rec.FinalResult()).get("text", "").lower()
+
+
+class TranscriptEngine:
+    """Returns the stored transcript of a replayed utterance."""
+
+    name = "transcript"
+
+    def transcribe(self, utterance, language="en-in"):
+        return utterance.transcript or ""
+
+
+def make_engine(kind, vosk_model_path=None):
+    """Build an engine by name ("google", "vosk" or "transcript")."""
+    if kind == "google":
+        return GoogleEngine()
+    if kind == "vosk":
+        return VoskEngine(vosk_model_path)
+    if kind == "transcript":
+        return TranscriptEngine()
+    raise ValueError(f"Unknown ASR engine: {kind}")
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(corpus_dir, engines):
+    """Replay a corpus through each engine and report end-of-speech -> intent latency.
+
+    When the corpus has .txt transcripts, intent accuracy is reported too
+    (the intent of the transcript is taken as ground truth).
+    """
+    for engine in engines:
+        source = ReplaySource(corpus_dir)
+        latencies = []
+        correct = 0
+        labelled = 0
+        while True:
+            utterance = source.next(timeout=0)
+            if utterance is None:
+                break
+            try:
+                text = engine.transcribe(utterance)
+            except ASRError as e:
+                print(f"[{engine.name}] {utterance.name}: {e}")
+                continue
+            intent, _ = route(text)
+            latencies.append((time.monotonic() - utterance.end) * 1000.0)
+            if utterance.transcript is not None:
+                labelled += 1
+                correct += intent == route(utterance.transcript)[0]
+
+        if not latencies:
+            print(f"{engine.name:10}: no utterances processed")
+            continue
+        latencies.sort()
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        line = (f"{engine.name:10}: n={len(latencies):4d}  mean {statistics.mean(latencies):8.1f} ms"
+                f"  p50 {statistics.median(latencies):8.1f} ms  p95 {p95:8.1f} ms")
+        if labelled:
+            line += f"  intent accuracy {correct / labelled:.0%}"
+        print(line)
+        if source.vad is not None:
+            print(f"{'':10}  VAD: {source.vad.stats()}")
+
+
+if __name__ == "__main__":
+    # python speech_input.py bench <corpus_dir> [--vosk-model <dir>] [--google]
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] != "bench":
+        print("usage: python speech_input.py bench <corpus_dir> [--vosk-model <dir>] [--google]")
+        sys.exit(1)
+    corpus = args[1]
+    engines = [TranscriptEngine()]
+    if "--vosk-model" in args:
+        engines.append(VoskEngine(args[args.index("--vosk-model") + 1]))
+    if "--google" in args and SR_AVAILABLE:
+        engines.append(GoogleEngine())
+    benchmark(corpus, engines)
@@ -0,0 +1,558 @@
+"""
+Speech output for SIDD.
+
+SpeechWorker owns the TTS engine on its own thread and speaks from a
+priority queue, so the dispatcher, the proactive checker and the handlers
+never block on `runAndWait()` unless they ask to. The current utterance can
+be interrupted (barge-in), and a duplicate alert that is already waiting in
+the queue is not queued again.
+
+Fixed phrases ("Volume increased.", greetings, farewells) can be served from
+PhraseCache, an on-disk store of synthesized WAV files keyed by (text, voice,
+rate), and played through a low-latency AudioSink instead of going through
+the speech engine again.
+"""
+
+import hashlib
+import itertools
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import wave
+from collections import OrderedDict
+from pathlib import Path
+
+# Optional: low-latency playback of cached phrases
+try:
+    import winsound
+    WINSOUND_AVAILABLE = True
+except Exception:
+    WINSOUND_AVAILABLE = False
+
+try:
+    import simpleaudio
+    SIMPLEAUDIO_AVAILABLE = True
+except Exception:
+    SIMPLEAUDIO_AVAILABLE = False
+
+# Priorities (lower is spoken first)
+URGENT = 0
+NORMAL = 1
+LOW = 2
+WARM = 3          # background cache synthesis, after everything audible
+
+
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+
+
+def split_sentences(text, min_chars=20):
+    """Split text at sentence ends; fragments shorter than min_chars join the next one."""
+    sentences = []
+    carry = ""
+    for part in _SENTENCE_RE.split(text.strip()):
+        carry = f"{carry} {part}".strip() if carry else part.strip()
+        if len(carry) >= min_chars:
+            sentences.append(carry)
+            carry = ""
+    if carry:
+        if sentences:
+            sentences[-1] = f"{sentences[-1]} {carry}"
+        else:
+            sentences.append(carry)
+    return sentences
+
+
+# -------------------- PHRASE CACHE --------------------
+class PhraseCache:
+    """Content-addressed WAV files with LRU eviction under a size cap.
+
+    The file name is a hash of (voice, rate, text), so changing the voice or
+    rate never plays a stale recording. Recency survives restarts through
+    the files' modification times. Used from the TTS worker thread only.
+    """
+
+    def __init__(self, folder, max_bytes=64 * 1024 * 1024):
+        self.folder = Path(folder)
+        self.max_bytes = max_bytes
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._entries = OrderedDict()   # key -> size in bytes, least recent first
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        files = sorted(self.folder.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._entries[path.stem] = size
+            self.total_bytes += size
+        self._evict()
+
+    @staticmethod
+    def key(text, voice, rate):
+        return hashlib.sha1(f"{voice}\0{rate}\0{text}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return self.folder / f"{key}.wav"
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, text, voice, rate):
+        """Return the WAV path for this phrase, or None if it is not cached."""
+        key = self.key(text, voice, rate)
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        path = self.path(key)
+        if not path.exists():
+            # deleted behind our back
+            self.total_bytes -= self._entries.pop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return path
+
+    def put(self, text, voice, rate, synthesize):
+        """Store a phrase; synthesize(path) must write a WAV file to path."""
+        key = self.key(text, voice, rate)
+        path = self.path(key)
+        tmp = path.with_suffix(".tmp.wav")
+        synthesize(tmp)
+        if not tmp.exists() or tmp.stat().st_size == 0:
+            return None
+        os.replace(tmp, path)
+        size = path.stat().st_size
+        self.total_bytes += size - self._entries.pop(key, 0)
+        self._entries[key] = size
+        self._evict()
+        return path
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                self.path(key).unlink()
+            except OSError:
+                pass
+
+    def stats(self):
+        return {"entries": len(self._entries), "bytes": self.total_bytes,
+                "hits": self.hits, "misses": self.misses}
+
+
+# -------------------- AUDIO SINKS --------------------
+def wav_duration(path):
+    with wave.open(str(path), "rb") as wf:
+        return wf.getnframes() / float(wf.getframerate() or 1)
+
+
+def playable(path):
+    """True if path is a readable WAV file with some audio in it."""
+    try:
+        return wav_duration(path) > 0
+    except (OSError, EOFError, wave.Error):
+        return False
+
+
+class AudioSink:
+    """Plays WAV files. start() returns at once; wait() blocks until done or stopped."""
+
+    def play(self, path):
+        self.start(path)
+        self.wait()
+
+
+class WinsoundSink(AudioSink):
+    """Plays WAV files with the Windows sound API (no engine round trip)."""
+
+    def __init__(self):
+        self._stopped = threading.Event()
+        self._ends_at = 0.0
+
+    def start(self, path):
+        self._stopped.clear()
+        self._ends_at = time.monotonic() + wav_duration(path)
+        winsound.PlaySound(str(path), winsound.SND_FILENAME | winsound.SND_ASYNC | winsound.SND_NODEFAULT)
+
+    def wait(self):
+        self._stopped.wait(max(0.0, self._ends_at - time.monotonic()))
+
+    def stop(self):
+        self._stopped.set()
+        winsound.PlaySound(None, 0)
+
+
+class SimpleaudioSink(AudioSink):
+    """Cross-platform playback through simpleaudio."""
+
+    def __init__(self):
+        self._play = None
+
+    def start(self, path):
+        with wave.open(str(path), "rb") as wf:
+            frames = wf.readframes(wf.getnframes())
+            self._play = simpleaudio.play_buffer(frames, wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+
+    def wait(self):
+        if self._play is not None:
+            self._play.wait_done()
+
+    def stop(self):
+        if self._play is not None:
+            self._play.stop()
+
+
+class NullSink(AudioSink):
+    """Silent sink that takes as long as the audio would (benchmarks, headless runs)."""
+
+    def __init__(self):
+        self._stopped = threading.Event()
+        self._ends_at = 0.0
+
+    def start(self, path):
+        self._stopped.clear()
+        self._ends_at = time.monotonic() + wav_duration(path)
+
+    def wait(self):
+        self._stopped.wait(max(0.0, self._ends_at - time.monotonic()))
+
+    def stop(self):
+        self._stopped.set()
+
+
+def make_sink():
+    """Best available sink for cached phrases, or None (engine-only speech)."""
+    if WINSOUND_AVAILABLE:
+        return WinsoundSink()
+    if SIMPLEAUDIO_AVAILABLE:
+        return SimpleaudioSink()
+    return None
+
+
+class SpeechItem:
+    """One queued utterance; `wait()` blocks until it was spoken or cancelled."""
+
+    def __init__(self, text, priority, warm=False, sentences=None, seq=None):
+        self.seq = seq                    # queue order; key of the worker's pending map
+        self.text = text
+        self.priority = priority
+        self.warm = warm                  # synthesize into the cache, don't speak
+        self.sentences = sentences        # streamed one sentence at a time, if set
+        self.cancelled = False
+        self.done = threading.Event()
+        self.queued_at = time.perf_counter()
+
+    def wait(self, timeout=None):
+        return self.done.wait(timeout)
+
+
+class SpeechWorker:
+    """Dedicated TTS thread fed by a priority queue.
+
+    engine_factory() is called on the worker thread (SAPI/COM engines must be
+    used from the thread that created them). log(text) is called in the
+    order say() was called, before the text is queued.
+
+    With a cache and a sink, phrases found in the cache are played from disk.
+    Phrases passed to warm() are synthesized in the background, and short
+    phrases spoken more than once are added as they come up.
+    """
+
+    def __init__(self, engine_factory, log=None, on_speaking=None, cache=None, sink=None,
+                 cache_max_chars=120):
+        self.engine_factory = engine_factory
+        self.log = log
+        self.on_speaking = on_speaking   # on_speaking(True/False) around each utterance
+        self.cache = cache if sink is not None else None
+        self.sink = sink
+        self.cache_max_chars = cache_max_chars
+        self._spoken = {}                # text -> times synthesized live (cache admission)
+        self._voice = None
+        self._rate = None
+        self._latency = {"cached": [], "engine": [], "stream": []}   # seconds from say() to audio start
+        self._rendering = False          # engine is writing a file, not speaking
+        self._stream_dir = None
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._pending = {}               # seq -> queued SpeechItem, so interrupt() reaches every one
+        self._waiting = {}               # text -> latest queued SpeechItem (for coalescing)
+        self._current = None
+        self._thread = None
+        self._failed = False             # engine_factory() raised; nothing will ever be spoken
+        self.engine = None
+
+    @property
+    def busy(self):
+        """True while something is being spoken or waiting to be spoken."""
+        return self._current is not None or bool(self._pending)
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+                self._thread.start()
+
+    def say(self, text, priority=NORMAL, coalesce=False, interrupt=False, stream=False):
+        """Queue text and return its SpeechItem.
+
+        coalesce: skip if the same text is already waiting (repeated alerts).
+        interrupt: cut off whatever is being said and drop the queue first.
+        stream: speak long text sentence by sentence, synthesizing the next
+        sentence while the current one plays.
+        """
+        if self._thread is None:
+            self.start()
+        with self._lock:
+            if coalesce:
+                existing = self._waiting.get(text)
+                if existing is not None and not existing.cancelled:
+                    return existing
+            if interrupt:
+                self._cancel_all()
+            item = SpeechItem(text, priority, sentences=split_sentences(text) if stream else None,
+                              seq=next(self._seq))
+            if self.log is not None:
+                self.log(text)
+            if self._failed:
+                # no engine: settle at once so callers waiting on it don't hang
+                item.cancelled = True
+                item.done.set()
+                return item
+            self._pending[item.seq] = item
+            self._waiting[text] = item
+            self._queue.put((priority, item.seq, item))
+        return item
+
+    def warm(self, phrases):
+        """Synthesize phrases into the cache when the worker is otherwise idle."""
+        if self.cache is None or self._failed:
+            return
+        if self._thread is None:
+            self.start()
+        for text in dict.fromkeys(phrases):
+            self._queue.put((WARM, next(self._seq), SpeechItem(text, WARM, warm=True)))
+
+    def interrupt(self):
+        """Stop the current utterance and drop everything queued."""
+        with self._lock:
+            self._cancel_all()
+
+    def _cancel_all(self):
+        for item in self._pending.values():
+            item.cancelled = True
+            item.done.set()
+        self._pending.clear()
+        self._waiting.clear()
+        current = self._current
+        if current is not None:
+            # The engine is only touched on the worker thread: marking the item
+            # cancelled is the stop request, picked up by _on_word (engine
+            # speech) or between sentences (streaming). Sink playback is not
+            # COM-bound and is cut off here.
+            current.cancelled = True
+            if self.sink is not None:
+                try:
+                    self.sink.stop()
+                except Exception as e:
+                    print("[TTS] stopping playback failed:", e)
+
+    def _on_word(self, name, location, length):
+        # pyttsx3 callback between words: the supported place to stop mid-utterance
+        current = self._current
+        if current is not None and current.cancelled:
+            self.engine.stop()
+
+    def _on_start(self, name):
+        current = self._current
+        if current is not None and not self._rendering:
+            self._latency["engine"].append(time.perf_counter() - current.queued_at)
+
+    def _synthesize(self, text, path):
+        self._rendering = True
+        try:
+            self.engine.save_to_file(text, str(path))
+            self.engine.runAndWait()
+        finally:
+            self._rendering = False
+
+    def _render(self, text, slot):
+        """WAV path for one streamed sentence (cached, or synthesized into slot); None if unusable."""
+        if self.cache is not None:
+            path = self.cache.get(text, self._voice, self._rate)
+            if path is not None and playable(path):
+                return path
+        if self._stream_dir is None:
+            self._stream_dir = Path(tempfile.mkdtemp(prefix="sidd-tts-"))
+        path = self._stream_dir / f"stream-{slot}.wav"
+        try:
+            path.unlink()       # don't mistake the previous sentence's file for this one
+        except OSError:
+            pass
+        try:
+            self._synthesize(text, path)
+        except Exception as e:
+            print("[TTS] sentence synthesis failed:", repr(e))
+            return None
+        return path if playable(path) else None
+
+    def _speak_streamed(self, item):
+        # Two files take turns: sentence i+1 is written while sentence i plays
+        sentences = item.sentences
+        path = self._render(sentences[0], 0)
+        for i, sentence in enumerate(sentences):
+            with self._lock:
+                # checked under the lock so interrupt() can't slip in before start()
+                if item.cancelled:
+                    return
+                if path is not None:
+                    self.sink.start(path)
+            if i == 0:
+                self._latency["stream"].append(time.perf_counter() - item.queued_at)
+            if path is None:
+                # the engine couldn't write a usable file: speak this sentence directly
+                self.engine.say(sentence)
+                self.engine.runAndWait()
+            playing = path is not None
+            if i + 1 < len(sentences):
+                path = self._render(sentences[i + 1], (i + 1) % 2)
+            if playing:
+                self.sink.wait()
+
+    def _warm(self, text):
+        if self.cache.key(text, self._voice, self._rate) in self.cache:
+            return
+        try:
+            self.cache.put(text, self._voice, self._rate, lambda path: self._synthesize(text, path))
+        except Exception as e:
+            print("[TTS] cache synthesis failed:", e)
+
+    def _speak(self, item):
+        if item.sentences and len(item.sentences) > 1:
+            if self.sink is not None:
+                self._speak_streamed(item)
+                return
+            # no sink: let the engine take one sentence at a time so "stop" lands between them
+            for sentence in item.sentences:
+                if item.cancelled:
+                    return
+                self.engine.say(sentence)
+                self.engine.runAndWait()
+            return
+        if self.cache is not None:
+            path = self.cache.get(item.text, self._voice, self._rate)
+            if path is not None:
+                try:
+                    self._latency["cached"].append(time.perf_counter() - item.queued_at)
+                    self.sink.play(path)
+                    return
+                except Exception as e:
+                    print("[TTS] cached playback failed:", e)
+        self.engine.say(item.text)
+        self.engine.runAndWait()
+        if self.cache is not None and len(item.text) <= self.cache_max_chars:
+            if len(self._spoken) > 1000:
+                self._spoken.clear()
+            count = self._spoken.get(item.text, 0) + 1
+            self._spoken[item.text] = count
+            if count == 2:
+                self._queue.put((WARM, next(self._seq), SpeechItem(item.text, WARM, warm=True)))
+
+    def stats(self):
+        """Average time from say() to audio start, per path, plus cache counters."""
+        result = {}
+        for path, samples in self._latency.items():
+            if samples:
+                result[f"{path}_ms"] = round(sum(samples) / len(samples) * 1000, 1)
+                result[f"{path}_count"] = len(samples)
+        if self.cache is not None:
+            result["cache"] = self.cache.stats()
+        return result
+
+    def _run(self):
+        try:
+            self.engine = self.engine_factory()
+            try:
+                self.engine.connect("started-word", self._on_word)
+                self.engine.connect("started-utterance", self._on_start)
+            except Exception:
+                pass
+            self._voice = self.engine.getProperty("voice")
+            self._rate = self.engine.getProperty("rate")
+        except Exception as e:
+            print("[TTS] speech engine could not be started:", repr(e))
+            with self._lock:
+                self._failed = True
+                self._cancel_all()
+            return
+        while True:
+            _, _, item = self._queue.get()
+            if item.warm:
+                self._warm(item.text)
+                item.done.set()
+                continue
+            with self._lock:
+                self._pending.pop(item.seq, None)
+                if self._waiting.get(item.text) is item:
+                    del self._waiting[item.text]
+                if item.cancelled:
+                    continue
+                self._current = item
+            try:
+                if self.on_speaking is not None:
+                    self.on_speaking(True)
+                self._speak(item)
+            except Exception as e:
+                # Prevent crash if pyttsx3 (or a sink) is in a weird state; the next item still plays
+                print("[TTS] speaking failed:", repr(e))
+            finally:
+                self._current = None
+                if self.on_speaking is not None:
+                    self.on_speaking(False)
+                item.done.set()
+
+
+# -------------------- BENCHMARK --------------------
+SAMPLE_ANSWER = (
+    "A black hole is a region of spacetime where gravity is so strong that nothing, "
+    "not even light, can escape it. The theory of general relativity predicts that a "
+    "sufficiently compact mass can deform spacetime to form a black hole. The boundary "
+    "of no escape is called the event horizon. Although it has a great effect on the "
+    "fate of an object crossing it, it has no locally detectable features."
+)
+
+
+def benchmark(text=SAMPLE_ANSWER):
+    """Time to first audio for a long answer: whole text vs sentence streaming.
+
+    The whole-text run speaks through the engine as speak() used to (it is
+    audible); the streamed run synthesizes with the engine and plays into a
+    silent sink.
+    """
+    import pyttsx3
+
+    worker = SpeechWorker(pyttsx3.init, sink=NullSink())
+    worker.say(text).wait()
+    worker.say(text, stream=True).wait()
+    stats = worker.stats()
+
+    print(f"sentences: {len(split_sentences(text))}")
+    print(f"whole text : {stats.get('engine_ms', float('nan')):8.1f} ms to first word")
+    print(f"streamed   : {stats.get('stream_ms', float('nan')):8.1f} ms to first word")
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 2 and sys.argv[1] == "bench":
+        benchmark(" ".join(sys.argv[2:]))
+    else:
+        benchmark()
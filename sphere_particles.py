@@ -0,0 +1,127 @@
+"""
+Golden sphere particles for the HUD, computed with NumPy.
+
+frontend.Dot keeps one Python object per dot and does its own trig in
+update() and project() every frame, then the frame sorts the objects by z.
+SphereParticles holds the same state as arrays (theta, phi, dtheta, dphi)
+and does the surface travel, both rotations, the perspective projection,
+depth shading and the back-to-front ordering as whole-array operations,
+so the per-frame cost grows with a few vector passes instead of thousands
+of Python calls.
+
+The maths is the same as Dot: positions on a sphere of the current radius,
+rotated around Y then X, camera on +z at 2.2 radii, dot size and brightness
+from depth.
+"""
+
+import math
+import time
+
+import numpy as np
+
+GOLD = (255, 215, 0)
+
+
+class Projection:
+    """One frame's visible dots, ordered farthest first."""
+
+    __slots__ = ("sx", "sy", "radius", "depth", "colors")
+
+    def __init__(self, sx, sy, radius, depth, colors):
+        self.sx = sx              # int32 screen x
+        self.sy = sy              # int32 screen y
+        self.radius = radius      # int32 dot radius (2..4)
+        self.depth = depth        # float 0..1, 1 = nearest
+        self.colors = colors      # uint8 (n, 3)
+
+    def __len__(self):
+        return len(self.sx)
+
+
+class SphereParticles:
+    """Array-backed replacement for a list of frontend.Dot."""
+
+    def __init__(self, count, seed=None, color=GOLD):
+        # float32 is plenty for pixels and lets NumPy use its SIMD trig
+        rng = np.random.default_rng(seed)
+        self.theta = rng.uniform(0, 2 * math.pi, count).astype(np.float32)
+        self.phi = rng.uniform(0, math.pi, count).astype(np.float32)
+        self.dtheta = rng.uniform(-0.4, 0.4, count).astype(np.float32)
+        self.dphi = rng.uniform(-0.25, 0.25, count).astype(np.float32)
+        self.color = np.array(color, dtype=np.float32)
+        self.x = np.zeros(count, dtype=np.float32)
+        self.y = np.zeros(count, dtype=np.float32)
+        self.z = np.zeros(count, dtype=np.float32)
+
+    def __len__(self):
+        return len(self.theta)
+
+    def update(self, dt, rot_x, rot_y, radius):
+        """Move every dot along the surface and rotate the sphere (dt in ms)."""
+        step = np.float32(dt * 0.001)
+        self.theta += self.dtheta * step
+        # keep longitude in [0, 2pi): unbounded float32 loses the per-frame step after hours
+        np.mod(self.theta, np.float32(2 * math.pi), out=self.theta)
+        self.phi += self.dphi * step
+
+        # bounce latitude off the poles
+        low = self.phi < 0
+        self.phi[low] = -self.phi[low]
+        self.dphi[low] *= -1
+        high = self.phi > math.pi
+        self.phi[high] = 2 * math.pi - self.phi[high]
+        self.dphi[high] *= -1
+
+        radius = np.float32(radius)
+        sin_phi = np.sin(self.phi)
+        x = radius * sin_phi * np.cos(self.theta)
+        y = radius * np.cos(self.phi)
+        z = radius * sin_phi * np.sin(self.theta)
+
+        cos_y, sin_y = np.float32(math.cos(rot_y)), np.float32(math.sin(rot_y))
+        cos_x, sin_x = np.float32(math.cos(rot_x)), np.float32(math.sin(rot_x))
+        zz = -x * sin_y + z * cos_y
+        self.x = x * cos_y + z * sin_y
+        self.y = y * cos_x - zz * sin_x
+        self.z = y * sin_x + zz * cos_x
+
+    def project(self, center_x, center_y, radius, radius_base, fov, width, height):
+        """Projection of the dots that land on screen, farthest first."""
+        z_cam = np.maximum(self.z + np.float32(radius * 2.2), np.float32(1.0))
+        factor = np.float32(fov) / z_cam
+        sx = (center_x + self.x * factor).astype(np.int32)
+        sy = (center_y + self.y * factor).astype(np.int32)
+
+        visible = (sx >= 0) & (sx < width) & (sy >= 0) & (sy < height)
+        order = np.argsort(-z_cam[visible])   # larger z_cam = farther away
+        sx = sx[visible][order]
+        sy = sy[visible][order]
+        z_cam = z_cam[visible][order]
+
+        depth = np.clip(1 - z_cam / np.float32(radius_base * 3.0), 0.0, 1.0)
+        dot_radius = np.maximum(2, (1 + depth * 3).astype(np.int32))
+        brightness = np.float32(0.5) + depth * np.float32(0.7)
+        colors = np.minimum(self.color[None, :] * brightness[:, None], 255).astype(np.uint8)
+        return Projection(sx, sy, dot_radius, depth, colors)
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(counts=(2000, 20000, 50000), frames=120, width=1280, height=720):
+    """ms per frame of update() + project() at several dot counts."""
+    radius = int(min(width, height) * 0.32)
+    fov = radius * 2.3
+    for count in counts:
+        particles = SphereParticles(count, seed=1)
+        rot_x = rot_y = 0.0
+        start = time.perf_counter()
+        for _ in range(frames):
+            rot_y += 0.4 * 16 * 0.001
+            rot_x += 0.18 * 16 * 0.001
+            particles.update(16, rot_x, rot_y, radius)
+            particles.project(width // 2, height // 2, radius, radius, fov, width, height)
+        ms = (time.perf_counter() - start) / frames * 1000
+        print(f"{count:6d} dots: {ms:6.2f} ms/frame")
+
+
+if __name__ == "__main__":
+    benchmark()
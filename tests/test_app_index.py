@@ -0,0 +1,79 @@
+import os
+
+from app_index import EXACT, FUZZY, PREFIX, AppIndex, AppRoot
+
+
+def bump(folder, seconds=10):
+    # make an mtime change visible even on filesystems with coarse timestamps
+    mtime = os.stat(folder).st_mtime + seconds
+    os.utime(folder, (mtime, mtime))
+
+
+def make_tree(tmp_path):
+    programs = tmp_path / "Programs"
+    (programs / "Accessories").mkdir(parents=True)
+    (programs / "Google Chrome.lnk").touch()
+    (programs / "Accessories" / "Notepad.lnk").touch()
+    (programs / "Accessories" / "readme.txt").touch()
+    return programs
+
+
+def test_lookup_tiers(tmp_path):
+    index = AppIndex([AppRoot(make_tree(tmp_path))], refresh_interval=None)
+    index.build()
+    assert len(index) == 2                          # .txt is not a shortcut
+    assert index.find("notepad")[0][0] == EXACT
+    assert index.find("goo")[0][0] == PREFIX
+    assert index.find("gogle chrom")[0][0] == FUZZY
+
+
+def test_refresh_only_relists_changed_folders(tmp_path):
+    programs = make_tree(tmp_path)
+    index = AppIndex([AppRoot(programs)], refresh_interval=None)
+    index.build()
+    assert index.refresh() == 0
+
+    (programs / "Accessories" / "Paint.lnk").touch()
+    bump(programs / "Accessories")
+    assert index.refresh() == 1
+    assert index.lookup("paint").endswith("Paint.lnk")
+
+    (programs / "Google Chrome.lnk").unlink()
+    bump(programs)
+    assert index.refresh() == 1
+    assert index.lookup("google chrome") is None
+
+
+def test_new_and_removed_subfolders(tmp_path):
+    programs = make_tree(tmp_path)
+    index = AppIndex([AppRoot(programs)], refresh_interval=None)
+    index.build()
+    (programs / "Games").mkdir()
+    (programs / "Games" / "Solitaire.lnk").touch()
+    bump(programs)
+    index.refresh()
+    assert index.lookup("solitaire") is not None
+
+    for child in (programs / "Accessories").iterdir():
+        child.unlink()
+    (programs / "Accessories").rmdir()
+    bump(programs)
+    index.refresh()
+    assert index.lookup("notepad") is None
+    assert str(programs / "Accessories") not in index._dirs
+
+
+def test_saved_index_is_reused_and_brought_up_to_date(tmp_path):
+    programs = make_tree(tmp_path)
+    cache = tmp_path / "app_index.json"
+    index = AppIndex([AppRoot(programs)], cache, refresh_interval=None)
+    index.load()
+    index.record_launch(index.lookup("notepad"))
+
+    (programs / "Calculator.lnk").touch()
+    bump(programs)
+    reloaded = AppIndex([AppRoot(programs)], cache, refresh_interval=None)
+    reloaded.build = None               # must not fall back to a full scan
+    reloaded.load()
+    assert reloaded.lookup("calculator") is not None
+    assert reloaded.launches == {index.lookup("notepad"): 1}
@@ -0,0 +1,113 @@
+import array
+import math
+import threading
+import time
+
+import pytest
+
+import audio_monitor
+from audio_monitor import AudioMonitor, PythonLevelMeter, make_source
+
+
+class FakeSource:
+    """Source that hands out a fixed tone; open() can fail or block on demand."""
+
+    rate = 8000
+    chunk = 256
+
+    def __init__(self, fail_open=False, block_open=None):
+        self.fail_open = fail_open
+        self.block_open = block_open        # Event that open() waits for
+        self.terminated = 0
+        samples = [int(3000 * math.sin(2 * math.pi * 440 * i / self.rate)) for i in range(self.chunk)]
+        self.data = array.array('h', samples).tobytes()
+
+    def open(self):
+        if self.block_open is not None:
+            self.block_open.wait()
+        if self.fail_open:
+            raise OSError("no device")
+
+    def read(self):
+        time.sleep(0.005)
+        return self.data
+
+    def close(self):
+        pass
+
+    def terminate(self):
+        self.terminated += 1
+
+
+def test_no_pyaudio_means_no_source(monkeypatch):
+    monkeypatch.setattr(audio_monitor, "PYAUDIO_AVAILABLE", False)
+    assert make_source() is None
+
+
+def test_synthetic_only_on_request():
+    pytest.importorskip("numpy")
+    assert isinstance(make_source(synthetic=True, realtime=False), audio_monitor.SyntheticSource)
+
+
+def test_python_meter_matches_numpy_meter():
+    np = pytest.importorskip("numpy")
+    source = FakeSource()
+    samples = array.array('h', source.data)
+    slow = PythonLevelMeter().measure(samples)
+    fast = audio_monitor.LevelMeter(rate=source.rate, fft_size=source.chunk).measure(
+        np.frombuffer(source.data, dtype=np.int16))
+    assert slow.rms == pytest.approx(fast.rms, rel=1e-4)
+    assert slow.peak == fast.peak
+    assert slow.bands is None
+
+
+@pytest.mark.parametrize("numpy_available", [True, False])
+def test_monitor_measures(monkeypatch, numpy_available):
+    if numpy_available:
+        pytest.importorskip("numpy")
+    monkeypatch.setattr(audio_monitor, "NUMPY_AVAILABLE", numpy_available)
+    source = FakeSource()
+    monitor = AudioMonitor(source)
+    monitor.start()
+    deadline = time.monotonic() + 2
+    while monitor.chunks < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert monitor.stop()
+    levels = monitor.latest()
+    assert levels.rms == pytest.approx(3000 / math.sqrt(2), rel=0.05)
+    assert (levels.bands is not None) == numpy_available
+    assert source.terminated == 1
+
+
+def test_stop_interrupts_reopen_backoff():
+    source = FakeSource(fail_open=True)
+    monitor = AudioMonitor(source, reopen_delay=5.0)
+    monitor.start()
+    time.sleep(0.1)
+    start = time.monotonic()
+    assert monitor.stop(timeout=1.0)
+    assert time.monotonic() - start < 0.5
+    assert source.terminated == 1
+
+
+def test_source_terminated_only_after_thread_exits():
+    release = threading.Event()
+    source = FakeSource(block_open=release)
+    monitor = AudioMonitor(source)
+    monitor.start()
+    assert not monitor.stop(timeout=0.1)    # thread is stuck in open()
+    assert source.terminated == 0
+    release.set()
+    deadline = time.monotonic() + 2
+    while source.terminated == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert source.terminated == 1
+
+
+def test_ring_buffer_wraps():
+    np = pytest.importorskip("numpy")
+    ring = audio_monitor.RingBuffer(8)
+    ring.write(np.arange(6, dtype=np.int16))
+    ring.write(np.arange(6, 11, dtype=np.int16))
+    assert ring.latest(4).tolist() == [7, 8, 9, 10]
+    assert ring.latest(8).tolist() == [3, 4, 5, 6, 7, 8, 9, 10]
@@ -0,0 +1,95 @@
+import time
+
+import pytest
+
+from http_client import FixtureTransport, HttpClient, HttpError, TTLCache, request_key
+
+LOCATION = "http://ip-api.com/json/"
+
+
+def is_success(body):
+    return body.get("status") == "success"
+
+
+def make_client(fixtures, **options):
+    transport = FixtureTransport(fixtures, **options)
+    return HttpClient(transport=transport), transport
+
+
+def test_request_key_sorts_params():
+    assert request_key("http://x/", {"b": 2, "a": 1}) == "http://x/?a=1&b=2"
+    assert request_key("http://x/") == "http://x/"
+
+
+def test_cached_within_ttl():
+    client, transport = make_client({LOCATION: {"status": "success", "city": "Kolkata"}})
+    assert client.get_json(LOCATION, ttl=60)["city"] == "Kolkata"
+    assert client.get_json(LOCATION, ttl=60)["city"] == "Kolkata"
+    assert len(transport.requests) == 1
+
+
+def test_http_error_status():
+    client, _ = make_client({LOCATION: (503, "busy")})
+    with pytest.raises(HttpError):
+        client.get_json(LOCATION, ttl=60)
+    assert client.errors == 1
+
+
+def test_failed_lookup_is_not_cached():
+    answers = [{"status": "fail", "message": "reserved range"}, {"status": "success", "city": "Pune"}]
+    client, transport = make_client({LOCATION: lambda url, params: answers.pop(0)})
+    with pytest.raises(HttpError):
+        client.get_json(LOCATION, ttl=3600, validate=is_success)
+    assert len(client.cache) == 0
+    assert client.get_json(LOCATION, ttl=3600, validate=is_success)["city"] == "Pune"
+    assert len(transport.requests) == 2
+
+
+def test_stale_value_kept_when_refresh_fails():
+    client, transport = make_client({LOCATION: {"status": "fail"}})
+    client.cache.put(LOCATION, {"status": "success", "city": "Delhi"}, ttl=-1)   # already expired
+    assert client.get_json(LOCATION, ttl=3600, stale_ok=True, validate=is_success)["city"] == "Delhi"
+    client._pool.shutdown(wait=True)
+    value, fresh = client.cache.lookup(LOCATION)
+    assert value["city"] == "Delhi" and not fresh
+
+
+def test_overlapping_requests_share_one_fetch():
+    client, transport = make_client({LOCATION: {"status": "success"}}, latency=0.1)
+    futures = [client.submit(client.get_json, LOCATION, ttl=60) for _ in range(4)]
+    assert all(f.result() == {"status": "success"} for f in futures)
+    assert len(transport.requests) == 1
+    assert client.shared == 3
+
+
+def test_ttl_cache_persists(tmp_path):
+    path = tmp_path / "http_cache.json"
+    cache = TTLCache(path)
+    cache.put("k", {"v": 1}, ttl=60)
+    cache.close()
+    value, fresh = TTLCache(path).lookup("k")
+    assert value == {"v": 1} and fresh
+
+
+def test_ttl_cache_batches_writes(tmp_path):
+    path = tmp_path / "http_cache.json"
+    cache = TTLCache(path, save_delay=0.1)
+    for i in range(20):
+        cache.put(f"k{i}", i, ttl=60)
+    assert not path.exists()                # nothing written per put
+    deadline = time.monotonic() + 2
+    while not path.exists() and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert cache.saves == 1
+    assert TTLCache(path).lookup("k19") == (19, True)
+    assert cache.flush() is False           # nothing new since the timed save
+
+
+def test_client_close_saves_pending_cache(tmp_path):
+    path = tmp_path / "http_cache.json"
+    client = HttpClient(transport=FixtureTransport({LOCATION: {"status": "success"}}),
+                        cache=TTLCache(path, save_delay=3600))
+    client.get_json(LOCATION, ttl=60)
+    assert not path.exists()
+    client.close()
+    assert TTLCache(path).lookup(LOCATION)[0] == {"status": "success"}
@@ -0,0 +1,49 @@
+import pytest
+
+from intent_router import UNKNOWN_INTENT, route
+
+
+@pytest.mark.parametrize("query, intent", [
+    # "unmute" contains "mute"; the more specific intent wins
+    ("unmute", "unmute"),
+    ("mute", "mute"),
+    ("mute the volume", "mute"),
+    # "power" is a whole-word keyword
+    ("open powerpoint", "open_app"),
+    ("how much power is left", "battery"),
+    ("battery status", "battery"),
+    # "close it" only as the whole query
+    ("close it", "close_last"),
+    ("close chrome", "close_app"),
+    ("close it now", "close_app"),
+    # reminder phrases beat the generic "stop" of quit
+    ("stop the timer", "cancel_reminder"),
+    ("stop", "quit"),
+    ("remind me in 5 minutes to call mom", "set_reminder"),
+    ("set a timer for 10 minutes", "set_timer"),
+    ("what are my reminders", "list_reminders"),
+    ("hello there", "greeting"),
+    ("play despacito", "play_song"),
+    ("tell me about python", "tell_me_about"),
+    ("what is the time", "tell_time"),
+    ("increase volume", "volume_up"),
+    ("set volume to 40", "set_volume"),
+])
+def test_route_priorities(query, intent):
+    assert route(query)[0] == intent
+
+
+def test_anchored_keywords():
+    # "^open " must start the query
+    assert route("please open notepad")[0] != "open_app"
+    assert route("open notepad") == ("open_app", {"keyword": "open ", "rest": "notepad"})
+
+
+def test_rest_is_text_after_keyword():
+    assert route("play shape of you")[1]["rest"] == "shape of you"
+    assert route("close notepad")[1]["rest"] == "notepad"
+
+
+def test_unknown():
+    assert route("what is the capital of france")[0] == UNKNOWN_INTENT
+    assert route("")[0] == UNKNOWN_INTENT
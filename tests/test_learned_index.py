@@ -0,0 +1,42 @@
+import learned_responses
+from learned_responses import LearnedResponseIndex, migrate_learned_responses
+
+
+def test_migrate_collapses_duplicates_latest_answer_wins():
+    items = [
+        {"query": "What's the time?", "response": "noon"},
+        {"query": "capital of france", "response": "Paris"},
+        {"query": "whats the time", "response": "never mind"},    # different once normalized
+        {"query": "what's the TIME", "response": "1 pm"},
+        {"query": "", "response": "dropped"},
+    ]
+    assert migrate_learned_responses(items) == [
+        {"query": "What's the time?", "response": "1 pm"},
+        {"query": "capital of france", "response": "Paris"},
+        {"query": "whats the time", "response": "never mind"},
+    ]
+
+
+def test_upsert_inserts_updates_and_skips(monkeypatch):
+    monkeypatch.setattr(learned_responses, "NUMPY_AVAILABLE", False)   # exact index only
+    index = LearnedResponseIndex()
+    items = []
+    assert index.upsert(items, "Who are you?", "SIDD") == (0, True)
+    assert index.upsert(items, "who are you", "SIDD") is None             # same answer: nothing to save
+    assert index.upsert(items, "WHO are you", "Your assistant") == (0, False)
+    assert index.upsert(items, "   ", "ignored") is None
+    assert items == [{"query": "Who are you?", "response": "Your assistant"}]
+    assert index.lookup(items, "who are you?!") == "Your assistant"
+    assert index.lookup(items, "who am i") is None
+
+
+def test_index_follows_reloaded_or_edited_lists(monkeypatch):
+    monkeypatch.setattr(learned_responses, "NUMPY_AVAILABLE", False)
+    index = LearnedResponseIndex()
+    first = [{"query": "a", "response": "1"}]
+    assert index.lookup(first, "a") == "1"
+    reloaded = [{"query": "b", "response": "2"}]
+    assert index.lookup(reloaded, "a") is None
+    assert index.lookup(reloaded, "b") == "2"
+    reloaded.append({"query": "c", "response": "3"})                  # edited behind the index's back
+    assert index.lookup(reloaded, "c") == "3"
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from learned_responses import LearnedResponseIndex, normalize_query, same_meaning
+
+LEARNED = [
+    {"query": "what is the capital of france", "response": "Paris"},
+    {"query": "turn on the lights", "response": "lights on"},
+    {"query": "how old are you", "response": "I was born this year"},
+    {"query": "i like tea", "response": "noted, tea"},
+    {"query": "who is your favourite singer", "response": "Arijit Singh"},
+]
+
+
+@pytest.fixture
+def index():
+    index = LearnedResponseIndex()
+    index.prepare(LEARNED, wait=True)
+    return index
+
+
+def test_normalize_query():
+    assert normalize_query("  What's the   TIME? ") == "what s the time"
+
+
+def test_exact_match(index):
+    assert index.lookup(LEARNED, "What is the capital of France?") == "Paris"
+
+
+@pytest.mark.parametrize("query, response", [
+    ("whats the capital of france", "Paris"),
+    ("what is the capitol of france", "Paris"),
+    ("who is your favorite singer", "Arijit Singh"),
+])
+def test_asr_variants_match(index, query, response):
+    assert index.lookup(LEARNED, query) == response
+
+
+@pytest.mark.parametrize("query", [
+    "turn off the lights",          # content word differs
+    "how old are we",               # pronoun differs
+    "i don't like tea",             # negation added
+    "i do not like tea",
+    "what is the capital of spain",
+])
+def test_different_meaning_does_not_match(index, query):
+    assert index.similar(LEARNED, query)            # close enough by n-grams...
+    assert index.lookup(LEARNED, query) is None     # ...but not the same question
+
+
+def test_same_meaning():
+    assert same_meaning("whats the weather", "what is the weather")
+    assert not same_meaning("turn off the fan", "turn on the fan")
+    assert not same_meaning("i can't hear you", "i can hear you")
+
+
+def test_upsert(index):
+    items = [dict(item) for item in LEARNED]
+    index.prepare(items, wait=True)
+    assert index.upsert(items, "Turn on the lights!", "lights on") is None
+    assert index.upsert(items, "turn on the lights", "done") == (1, False)
+    assert index.upsert(items, "turn off the lights", "lights off") == (len(LEARNED), True)
+    assert index.lookup(items, "turn off the light") == "lights off"
+    assert index.lookup(items, "turn on the light") == "done"
+
+
+def test_exact_lookups_work_before_fuzzy_index_is_ready():
+    index = LearnedResponseIndex()
+    index._building = LEARNED           # pretend a background build is still running
+    index.prepare(LEARNED)
+    assert index.similar(LEARNED, "whats the capital of france") == []
+    assert index.lookup(LEARNED, "what is the capital of france") == "Paris"
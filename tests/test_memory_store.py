@@ -0,0 +1,178 @@
+import time
+
+import pytest
+
+from memory_store import JsonFileBackend, MemoryManager, apply_change, make_backend, write_atomic
+
+
+def sample_memory():
+    return {
+        "user_profile": {"name": "Rahul", "nickname": None},
+        "notes": ["my favourite color is blue"],
+        "learned_responses": [{"query": "capital of france", "response": "Paris"}],
+        "reminders": {"abc": {"due": 10.0, "text": "tea", "kind": "timer", "created": 1.0}},
+    }
+
+
+CHANGES = [
+    ("set", ["user_profile", "nickname"], "Rah"),
+    ("append", ["notes"], "my sister is called Priya"),
+    ("append", ["learned_responses"], {"query": "capital of india", "response": "Delhi"}),
+    ("set", ["learned_responses", 0, "response"], "Paris, France"),
+    ("set", ["reminders", "def"], {"due": 20.0, "text": "call mom", "kind": "reminder", "created": 2.0}),
+    ("delete", ["reminders", "abc"], None),
+]
+
+
+KINDS = ["json", "journal", "sqlite"]
+
+
+class RecordingBackend:
+    """Backend that remembers each save; can be told to fail."""
+
+    def __init__(self):
+        self.saves = []
+        self.fail = False
+        self.closed = False
+
+    def load(self):
+        return None
+
+    def save(self, data, changes):
+        if self.fail:
+            raise OSError("disk full")
+        self.saves.append(list(changes))
+        return True
+
+    def close(self):
+        self.closed = True
+
+
+def test_write_atomic_replaces_file(tmp_path):
+    path = tmp_path / "sidd_memory.json"
+    path.write_text("old", encoding="utf-8")
+    write_atomic(path, "new")
+    assert path.read_text(encoding="utf-8") == "new"
+    assert [p.name for p in tmp_path.iterdir()] == ["sidd_memory.json"]     # no temp file left
+
+
+def test_apply_change():
+    data = sample_memory()
+    for change in CHANGES:
+        data = apply_change(data, change)
+    assert data["user_profile"]["nickname"] == "Rah"
+    assert data["notes"][-1] == "my sister is called Priya"
+    assert data["learned_responses"][0]["response"] == "Paris, France"
+    assert list(data["reminders"]) == ["def"]
+    assert apply_change(data, ("replace", [], {"x": 1})) == {"x": 1}
+    with pytest.raises(ValueError):
+        apply_change(data, ("move", [], None))
+
+
+def test_json_backend_skips_unchanged_content(tmp_path):
+    backend = JsonFileBackend(tmp_path / "sidd_memory.json")
+    data = sample_memory()
+    assert backend.save(data, [])
+    assert not backend.save(data, [])
+    assert JsonFileBackend(tmp_path / "sidd_memory.json").load() == data
+
+
+def test_manager_debounces_bursts_into_one_write():
+    backend = RecordingBackend()
+    manager = MemoryManager(backend, debounce=0.2)
+    manager.start()
+    data = sample_memory()
+    for i in range(5):
+        data["notes"].append(f"note {i}")
+        manager.mark_dirty(data, ("append", ["notes"], f"note {i}"))
+        time.sleep(0.02)
+    assert backend.saves == []                    # still inside the debounce window
+    deadline = time.monotonic() + 2
+    while not backend.saves and time.monotonic() < deadline:
+        time.sleep(0.02)
+    time.sleep(0.1)
+    assert len(backend.saves) == 1
+    assert len(backend.saves[0]) == 5
+    manager.close()
+
+
+def test_manager_flush_and_close():
+    backend = RecordingBackend()
+    manager = MemoryManager(backend, debounce=60)
+    assert manager.flush() is False               # nothing dirty
+    data = sample_memory()
+    manager.mark_dirty(data, ("set", ["user_profile", "name"], "Rahul"))
+    manager.start()
+    manager.close()                               # writes what is pending, then closes
+    assert backend.saves == [[("set", ["user_profile", "name"], "Rahul")]]
+    assert backend.closed
+
+
+def test_manager_keeps_changes_when_save_fails():
+    backend = RecordingBackend()
+    manager = MemoryManager(backend, debounce=60)
+    data = sample_memory()
+    manager.mark_dirty(data, ("append", ["notes"], "a"))
+    backend.fail = True
+    with pytest.raises(OSError):
+        manager.flush()
+    manager.mark_dirty(data, ("append", ["notes"], "b"))
+    backend.fail = False
+    assert manager.flush()
+    assert backend.saves == [[("append", ["notes"], "a"), ("append", ["notes"], "b")]]
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_round_trip(tmp_path, kind):
+    path = tmp_path / "sidd_memory.json"
+    backend = make_backend(kind, path)
+    assert backend.load() is None
+    data = sample_memory()
+    backend.save(data, [("replace", [], data)])
+    for change in CHANGES:
+        data = apply_change(data, change)
+        backend.save(data, [change])
+    backend.close()
+
+    reopened = make_backend(kind, path)
+    assert reopened.load() == data
+    reopened.close()
+
+
+@pytest.mark.parametrize("kind", KINDS)
+def test_manager_flushes_on_close(tmp_path, kind):
+    path = tmp_path / "sidd_memory.json"
+    manager = MemoryManager(make_backend(kind, path), debounce=60)
+    data = sample_memory()
+    manager.mark_dirty(data)
+    manager.start()
+    data["notes"].append("pending at exit")
+    manager.mark_dirty(data, ("append", ["notes"], "pending at exit"))
+    manager.close()
+
+    assert make_backend(kind, path).load()["notes"][-1] == "pending at exit"
+
+
+def test_journal_drops_torn_tail(tmp_path):
+    path = tmp_path / "sidd_memory.json"
+    backend = make_backend("journal", path)
+    backend.load()
+    data = sample_memory()
+    backend.save(data, [("replace", [], data)])
+    data = apply_change(data, CHANGES[0])
+    backend.save(data, [CHANGES[0]])
+    backend.close()
+    with open(path.with_suffix(".journal"), "ab") as f:
+        f.write(b"99 [2,\"set\",[\"user")      # crash mid-append
+
+    assert make_backend("journal", path).load() == data
+
+
+def test_sqlite_search(tmp_path):
+    backend = make_backend("sqlite", tmp_path / "sidd_memory.json")
+    backend.load()
+    data = sample_memory()
+    backend.save(data, [("replace", [], data)])
+    assert backend.search("favourite color")[0] == ("note", "my favourite color is blue")
+    assert ("learned", "Paris") in backend.search("france")
+    backend.close()
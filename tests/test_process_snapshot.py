@@ -0,0 +1,27 @@
+from process_snapshot import ProcessSnapshotService, Snapshot
+
+
+def test_pids_by_name_and_stem():
+    snap = Snapshot([(1, "Notepad.exe"), (2, "chrome.exe"), (3, "chrome.exe")], [], 0.0)
+    assert snap.pids("notepad") == [1]
+    assert snap.pids("notepad.exe") == [1]
+    assert snap.pids("chrome") == [2, 3]
+    assert snap.pids("chr") == [2, 3]          # substring fallback
+    assert snap.pids("word") == []
+
+
+def test_windows_matching():
+    snap = Snapshot([], [(10, 4, "Budget 2026 - Excel"), (11, 5, "Inbox - Outlook")], 0.0)
+    assert snap.windows_matching("budget 2026") == [(10, 4, "budget 2026 - excel")]
+    assert snap.windows_matching("outlook") == [(11, 5, "inbox - outlook")]
+    assert snap.windows_matching("word") == []
+
+
+def test_refresh_returns_live_snapshot():
+    processes = [(1, "explorer.exe")]
+    service = ProcessSnapshotService(process_lister=lambda: list(processes), window_lister=list)
+    service.refresh()
+    processes.append((2, "notepad.exe"))        # started after the last refresh
+    assert service.pids("notepad") == []
+    assert service.refresh().pids("notepad") == [2]
+    assert service.pids("notepad") == [2]
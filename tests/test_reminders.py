@@ -0,0 +1,114 @@
+import random
+
+import pytest
+
+from reminders import Reminders, TimingWheel, describe_delay, parse_duration, parse_reminder
+
+NOW = 1_700_000_000.0
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("5 minutes", 300),
+    ("1 hour 30 minutes", 5400),
+    ("half an hour", 1800),
+    ("an hour", 3600),
+    ("ten seconds", 10),
+    ("forty five minutes", 2700),
+    ("2 days", 172800),
+    ("1.5 hours", 5400),
+    ("set a timer for twenty five minutes", 1500),
+    ("twenty-five minutes", 1500),
+    ("ninety seconds", 90),
+    ("an hour and a half", 5400),
+    ("one and a half hours", 5400),
+    ("two hours and a half", 9000),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+def test_parse_duration_without_time():
+    assert parse_duration("call mom") is None
+
+
+@pytest.mark.parametrize("query, delay, text", [
+    ("remind me in 20 minutes to call mom", 1200, "call mom"),
+    ("remind me to drink water in half an hour", 1800, "drink water"),
+    ("remind me in 1 hour and 5 minutes about the meeting", 3900, "the meeting"),
+    ("remind me in an hour and a half to eat", 5400, "eat"),
+    ("remind me in twenty five minutes to call mom", 1500, "call mom"),
+    ("remind me in ninety seconds to check the oven", 90, "check the oven"),
+])
+def test_parse_reminder(query, delay, text):
+    due, what = parse_reminder(query, now=NOW)
+    assert due == NOW + delay
+    assert what == text
+
+
+def test_parse_reminder_without_time():
+    assert parse_reminder("remind me to call mom", now=NOW) == (None, "call mom")
+
+
+def test_describe_delay():
+    assert describe_delay(1200) == "20 minutes"
+    assert describe_delay(3900) == "1 hour and 5 minutes"
+    assert describe_delay(0) == "now"
+
+
+def test_wheel_fires_in_due_order():
+    rng = random.Random(3)
+    wheel = TimingWheel(NOW)
+    dues = {i: NOW + rng.uniform(1, 5 * 86400) for i in range(3000)}
+    for key, due in dues.items():
+        wheel.add(key, due, key)
+    fired = []
+    for t in range(1, 5 * 86400 + 2):
+        for key, _ in wheel.advance(NOW + t):
+            assert NOW + t - 1 < dues[key] <= NOW + t
+            fired.append(key)
+    assert sorted(fired) == sorted(dues)
+    assert len(wheel) == 0
+
+
+def test_wheel_cancel():
+    wheel = TimingWheel(NOW)
+    wheel.add("a", NOW + 10, "A")
+    wheel.add("b", NOW + 10, "B")
+    assert wheel.cancel("a") == "A"
+    assert wheel.cancel("a") is None
+    assert wheel.advance(NOW + 10) == [("b", "B")]
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_reminders_persist_and_reload():
+    clock = FakeClock(NOW)
+    saved = {}
+    fired = []
+
+    def persist(op, key, record):
+        if op == "set":
+            saved[key] = record
+        else:
+            saved.pop(key, None)
+
+    reminders = Reminders(lambda key, record, late: fired.append(record["text"]), persist, clock)
+    reminders.add("tea", NOW + 60)
+    key = reminders.add("call mom", NOW + 120)
+    assert set(saved) == {r[0] for r in reminders.pending()}
+
+    # restart after the first one came due
+    clock.now = NOW + 90
+    reloaded = Reminders(lambda key, record, late: fired.append(record["text"]), persist, clock)
+    reloaded.load(dict(saved))
+    reloaded.tick()
+    assert fired == ["tea"]
+    assert list(saved) == [key]
+    assert reloaded.cancel_latest() is not None
+    assert saved == {}
@@ -0,0 +1,111 @@
+import datetime
+import heapq
+
+import pytest
+
+from scheduler import CATCH_UP, RUN_ONCE, SKIP, Scheduler
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def run_due(sched):
+    """Fire every job due at the fake clock's time, like the scheduler thread would."""
+    while sched._heap and sched._heap[0][0] <= sched.clock():
+        _, _, job = heapq.heappop(sched._heap)
+        if not job.cancelled:
+            sched._fire(job)
+
+
+def make(misfire, grace=1.0):
+    clock = FakeClock(1000.0)
+    sched = Scheduler(clock)
+    calls = []
+    job = sched.every(10, lambda: calls.append(clock()), name="job", misfire=misfire, grace=grace)
+    return clock, sched, job, calls
+
+
+@pytest.mark.parametrize("misfire", [SKIP, RUN_ONCE, CATCH_UP])
+def test_on_time_runs_once(misfire):
+    clock, sched, job, calls = make(misfire)
+    clock.now = 1010.5
+    run_due(sched)
+    assert calls == [1010.5]
+    assert job.slot == 1020
+
+
+@pytest.mark.parametrize("misfire, runs, missed", [
+    (SKIP, 0, 4),
+    (RUN_ONCE, 1, 3),
+    (CATCH_UP, 4, 0),
+])
+def test_misfire_policies(misfire, runs, missed):
+    clock, sched, job, calls = make(misfire)
+    clock.now = 1045.0          # slots 1010, 1020, 1030 and 1040 were missed
+    run_due(sched)
+    assert len(calls) == runs
+    assert job.missed == missed
+    assert job.slot == 1050     # missed slots are never queued again
+
+
+def test_cron_next_slot():
+    start = datetime.datetime(2026, 3, 2, 8, 30).timestamp()
+    clock = FakeClock(start)
+    sched = Scheduler(clock)
+    job = sched.cron(lambda: None, name="morning", hour=9, minute=0)
+    assert job.slot == datetime.datetime(2026, 3, 2, 9, 0).timestamp()
+    clock.now = job.slot
+    run_due(sched)
+    assert job.slot == datetime.datetime(2026, 3, 3, 9, 0).timestamp()
+
+
+def test_once_and_cancel():
+    clock = FakeClock(0.0)
+    sched = Scheduler(clock)
+    calls = []
+    sched.once(lambda: calls.append("a"), name="a", delay=5)
+    sched.once(lambda: calls.append("b"), name="b", delay=5)
+    assert sched.cancel("b")
+    clock.now = 5
+    run_due(sched)
+    assert calls == ["a"]
+    assert sched.jobs() == []
+
+
+@pytest.mark.parametrize("wake, greeted", [
+    ((9, 30), True),      # asleep at 9, woke within the grace hour
+    ((23, 0), False),     # woke long after: no "good morning" at night
+])
+def test_morning_greeting_grace(wake, greeted):
+    day = datetime.datetime(2026, 3, 2)
+    clock = FakeClock(day.replace(hour=8).timestamp())
+    sched = Scheduler(clock)
+    calls = []
+    job = sched.cron(lambda: calls.append(1), name="morning", hour=9, minute=0, misfire=SKIP, grace=3600)
+    clock.now = day.replace(hour=wake[0], minute=wake[1]).timestamp()
+    run_due(sched)
+    assert bool(calls) == greeted
+    assert job.slot == datetime.datetime(2026, 3, 3, 9, 0).timestamp()
+
+
+def test_non_blocking_job_runs_off_the_scheduler_thread():
+    import threading
+
+    clock = FakeClock(0.0)
+    sched = Scheduler(clock)
+    release = threading.Event()
+    slow = sched.every(1, release.wait, name="slow", start_delay=0, blocking=False)
+    fast_calls = []
+    sched.every(1, lambda: fast_calls.append(1), name="fast", start_delay=0)
+    run_due(sched)                      # returns although "slow" is still running
+    assert fast_calls == [1]
+    assert slow.running
+    clock.now = 1
+    run_due(sched)
+    assert slow.missed == 1             # skipped while the previous run is going
+    release.set()
@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from shared_state import SharedState
+
+
+def test_writes_copy_and_bump_version():
+    state = SharedState(last_query="", notifications=())
+    before = state.snapshot()
+    after = state.update(last_query="open notepad")
+    assert after.version == before.version + 1 == state.version
+    assert before["last_query"] == ""               # old snapshots never change
+    assert after["last_query"] == "open notepad"
+    with pytest.raises(TypeError):
+        after.values["last_query"] = "x"            # read-only view
+
+
+def test_unchanged_write_keeps_version():
+    state = SharedState(active_window="Notepad")
+    snap = state.snapshot()
+    assert state.update(active_window="Notepad") is snap
+    assert state.version == 0
+
+
+def test_subscribers_see_only_their_keys():
+    state = SharedState(active_window=None, last_query="")
+    seen = []
+    unsubscribe = state.subscribe(lambda snap, changed: seen.append((snap.version, changed)),
+                                  keys=["active_window"])
+    state.update(last_query="hello")
+    state.update(active_window="Chrome", last_query="bye")
+    unsubscribe()
+    state.update(active_window="Notepad")
+    assert seen == [(2, {"active_window", "last_query"})]
+
+
+def test_subscriber_errors_do_not_break_writes():
+    state = SharedState(x=0)
+    state.subscribe(lambda snap, changed: 1 / 0)
+    assert state.update(x=1)["x"] == 1
+
+
+def test_concurrent_mutate_loses_nothing():
+    state = SharedState(notifications=())
+
+    def writer(n):
+        for i in range(200):
+            state.mutate("notifications", lambda notes: notes + ((n, i),))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(state.get("notifications")) == 800
+    assert state.version == 800
@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+import types
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from speech_input import (MicrophoneSource, ReplaySource, TranscriptEngine, VadSegmenter,
+                          VoiceActivityDetector)
+
+RATE = 16000
+
+
+def tone(seconds, amplitude=8000, freq=440):
+    t = np.arange(int(RATE * seconds)) / RATE
+    # a few harmonics so the energy sits in the voice band
+    signal = sum(np.sin(2 * math.pi * freq * k * t) / k for k in (1, 2, 3))
+    return (amplitude * signal).astype(np.int16).tobytes()
+
+
+def silence(seconds, noise=30, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.normal(0, noise, int(RATE * seconds)).astype(np.int16).tobytes()
+
+
+def write_wav(path, pcm, transcript=None):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(RATE)
+        wf.writeframes(pcm)
+    if transcript is not None:
+        path.with_suffix(".txt").write_text(transcript, encoding="utf-8")
+
+
+def test_replay_drops_silence_and_transcribes(tmp_path):
+    write_wav(tmp_path / "01.wav", silence(0.5) + tone(0.8) + silence(0.5), "Open Notepad")
+    write_wav(tmp_path / "02.wav", silence(1.0), "")
+    write_wav(tmp_path / "03.wav", silence(0.3) + tone(0.6) + silence(0.3), "what is the time")
+    source = ReplaySource(tmp_path)
+    engine = TranscriptEngine()
+
+    first = source.next(timeout=0)
+    assert engine.transcribe(first) == "open notepad"
+    assert first.duration < 1.4                     # trimmed to the speech plus padding
+    second = source.next(timeout=0)                 # the silent file is skipped
+    assert engine.transcribe(second) == "what is the time"
+    assert source.vad.dropped == 1
+    assert "1 recognizer calls avoided" in source.vad.stats()
+
+
+def test_segmenter_cuts_utterances():
+    vad = VoiceActivityDetector(sample_rate=RATE)
+    vad.calibrate(silence(1.0))
+    segmenter = VadSegmenter(vad)
+    stream = silence(0.5) + tone(0.6) + silence(0.6) + tone(0.4) + silence(0.6, seed=1)
+    utterances = []
+    for i in range(0, len(stream), 960):
+        utterances += segmenter.push(stream[i:i + 960])
+    assert len(utterances) == 2
+    assert vad.segmented == 2
+    assert vad.discarded == 0
+
+
+def test_segmenter_counts_discarded_bursts():
+    vad = VoiceActivityDetector(sample_rate=RATE)
+    vad.calibrate(silence(1.0))
+    segmenter = VadSegmenter(vad)
+    # two 30 ms clicks: speech-like, but shorter than min_speech
+    stream = silence(0.3) + tone(0.03) + silence(0.3, seed=1) + tone(0.03) + silence(0.3, seed=2)
+    assert segmenter.push(stream) == []
+    assert vad.discarded == 2
+    assert "2 noise bursts discarded (recognizer calls avoided)" in vad.stats()
+
+
+def test_microphone_stop_without_speech_recognition_stopper():
+    # the VAD path installs its own stopper; stop() must accept listen_in_background's signature
+    source = MicrophoneSource.__new__(MicrophoneSource)
+    source._running = True
+    source._thread = threading.Thread(target=lambda: None)
+    source._thread.start()
+    source._stop = source._stop_capture
+    source.stop()
+    assert not source._running
+    assert source._stop is None
+
+
+class FakeStream:
+    def __init__(self, pcm):
+        self.pcm = pcm
+        self.pos = 0
+
+    def read(self, n):
+        chunk = self.pcm[self.pos:self.pos + 2 * n]
+        self.pos += 2 * n
+        if len(chunk) < 2 * n:
+            time.sleep(0.01)
+            return silence(n / RATE, seed=self.pos)
+        return chunk
+
+
+def test_microphone_open_failure_is_retried(monkeypatch):
+    opens = []
+
+    class FakeMicrophone:
+        def __init__(self, **kwargs):
+            pass
+
+        def __enter__(self):
+            opens.append(time.monotonic())
+            if len(opens) < 3:
+                raise OSError("Invalid input device")
+            self.stream = FakeStream(silence(1.0) + silence(0.3, seed=1) + tone(0.6) + silence(0.6, seed=2))
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    monkeypatch.setattr("speech_input.sr", types.SimpleNamespace(Microphone=FakeMicrophone,
+                                                                 Recognizer=lambda: None),
+                        raising=False)
+    source = MicrophoneSource(use_vad=True, reopen_delay=0.01)
+    source.start()
+    try:
+        utterance = source.next(timeout=5)
+    finally:
+        source._stop_capture()
+    assert len(opens) == 3
+    assert utterance is not None and 0.5 < utterance.duration < 1.2
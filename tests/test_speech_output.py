@@ -0,0 +1,215 @@
+import os
+import threading
+import time
+import wave
+
+from speech_output import NullSink, PhraseCache, SpeechWorker, split_sentences
+
+
+class FakeEngine:
+    """pyttsx3-like engine: runAndWait 'speaks' one word every 10 ms."""
+
+    def __init__(self):
+        self.callbacks = {}
+        self.queued = []
+        self.spoken = []
+        self.stop_threads = []
+        self._stopped = False
+
+    def connect(self, name, fn):
+        self.callbacks[name] = fn
+
+    def getProperty(self, name):
+        return {"voice": "test", "rate": 200}[name]
+
+    def say(self, text):
+        self.queued.append(text)
+
+    def runAndWait(self):
+        self._stopped = False
+        for text in self.queued:
+            self.callbacks["started-utterance"]("utt")
+            for word in text.split():
+                if self._stopped:
+                    break
+                self.callbacks["started-word"]("utt", 0, len(word))
+                time.sleep(0.01)
+            if not self._stopped:
+                self.spoken.append(text)
+        self.queued = []
+
+    def stop(self):
+        self.stop_threads.append(threading.current_thread().name)
+        self._stopped = True
+
+
+def make_worker():
+    engine = FakeEngine()
+    worker = SpeechWorker(lambda: engine)
+    worker.start()
+    return worker, engine
+
+
+def test_speaks_in_priority_order():
+    worker, engine = make_worker()
+    blocker = worker.say("one two three four five")
+    time.sleep(0.02)
+    worker.say("low", priority=2)
+    worker.say("urgent", priority=0)
+    worker.say("low", priority=2).wait(2)
+    assert blocker.done.is_set()
+    assert engine.spoken == ["one two three four five", "urgent", "low", "low"]
+
+
+def test_coalesce_returns_waiting_item():
+    worker, engine = make_worker()
+    worker.say("busy busy busy busy")
+    first = worker.say("battery low", coalesce=True)
+    assert worker.say("battery low", coalesce=True) is first
+
+
+def test_interrupt_cancels_duplicate_texts_and_stops_on_worker_thread():
+    worker, engine = make_worker()
+    current = worker.say(" ".join(["word"] * 50))
+    time.sleep(0.05)
+    # the same text queued twice without coalescing: both must be cancellable
+    first = worker.say("repeat me")
+    second = worker.say("repeat me")
+    worker.interrupt()
+    assert first.cancelled and second.cancelled
+    current.wait(2)
+    time.sleep(0.05)
+    assert "repeat me" not in engine.spoken
+    assert not worker.busy
+    assert engine.stop_threads and set(engine.stop_threads) == {"tts-worker"}
+
+
+def test_failing_engine_factory_settles_every_item():
+    def broken():
+        raise OSError("SAPI not registered")
+
+    worker = SpeechWorker(broken)
+    first = worker.say("hello")
+    assert first.wait(2)
+    assert worker.say("still there?").wait(0.1)
+    assert not worker.busy
+
+
+def test_worker_survives_an_item_that_fails():
+    worker, engine = make_worker()
+    original = engine.runAndWait
+
+    def flaky():
+        if engine.queued == ["bad"]:
+            engine.queued = []
+            raise OSError("audio device lost")
+        original()
+
+    engine.runAndWait = flaky
+    assert worker.say("bad").wait(2)
+    assert worker.say("good").wait(2)
+    assert engine.spoken == ["good"]
+
+
+def fake_synth(size):
+    def synthesize(path):
+        path.write_bytes(b"\0" * size)
+    return synthesize
+
+
+def test_phrase_cache_evicts_least_recently_used(tmp_path):
+    cache = PhraseCache(tmp_path, max_bytes=250)
+    for text in ("one", "two"):
+        cache.put(text, "v", 200, fake_synth(100))
+    assert cache.get("one", "v", 200) is not None     # "two" is now the oldest
+    cache.put("three", "v", 200, fake_synth(100))
+    assert cache.get("two", "v", 200) is None
+    assert cache.get("one", "v", 200) is not None
+    assert cache.total_bytes == 200
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(
+        cache.path(cache.key(t, "v", 200)).name for t in ("one", "three"))
+
+
+def test_phrase_cache_keys_on_voice_and_skips_failed_synthesis(tmp_path):
+    cache = PhraseCache(tmp_path)
+    cache.put("hello", "v", 200, fake_synth(10))
+    assert cache.get("hello", "v", 180) is None
+    assert cache.put("broken", "v", 200, fake_synth(0)) is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_phrase_cache_recency_survives_restart(tmp_path):
+    cache = PhraseCache(tmp_path, max_bytes=1000)
+    for i, text in enumerate(("old", "new")):
+        path = cache.put(text, "v", 200, fake_synth(100))
+        os.utime(path, (1000 + i, 1000 + i))
+    reopened = PhraseCache(tmp_path, max_bytes=150)   # smaller cap: the oldest goes
+    assert reopened.get("old", "v", 200) is None
+    assert reopened.get("new", "v", 200) is not None
+
+
+def test_split_sentences():
+    text = "Hi. A black hole is a region of spacetime. Nothing escapes it, not even light."
+    assert split_sentences(text) == [
+        "Hi. A black hole is a region of spacetime.",
+        "Nothing escapes it, not even light.",
+    ]
+
+
+def test_split_sentences_keeps_short_tail_and_plain_text():
+    assert split_sentences("No punctuation at all") == ["No punctuation at all"]
+    assert split_sentences("The first sentence is long enough. Ok.") == [
+        "The first sentence is long enough. Ok.",
+    ]
+
+
+class RenderingEngine(FakeEngine):
+    """Writes 50 ms WAV files; sentences containing "broken" come out truncated."""
+
+    def save_to_file(self, text, path):
+        if "broken" in text:
+            with open(path, "wb") as f:
+                f.write(b"RIFF")
+            return
+        with wave.open(path, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(8000)
+            wf.writeframes(b"\0\0" * 400)
+        self.rendered = getattr(self, "rendered", []) + [text]
+
+
+class RecordingSink(NullSink):
+    def __init__(self):
+        super().__init__()
+        self.started = []
+
+    def start(self, path):
+        self.started.append(path)
+        super().start(path)
+
+
+STORY = ("The first sentence is about a cat. The second one is broken on purpose. "
+         "The third sentence ends the story.")
+
+
+def test_streaming_plays_sentences_and_falls_back_for_bad_files():
+    engine = RenderingEngine()
+    sink = RecordingSink()
+    worker = SpeechWorker(lambda: engine, sink=sink)
+    assert worker.say(STORY, stream=True).wait(2)
+    assert engine.rendered == ["The first sentence is about a cat.", "The third sentence ends the story."]
+    assert len(sink.started) == 2
+    assert engine.spoken == ["The second one is broken on purpose."]
+
+
+def test_streaming_stops_after_interrupt():
+    engine = RenderingEngine()
+    sink = RecordingSink()
+    worker = SpeechWorker(lambda: engine, sink=sink)
+    item = worker.say("A long first sentence to play. " * 3 + "Never reached at all.", stream=True)
+    time.sleep(0.02)
+    worker.interrupt()
+    assert item.wait(2)
+    time.sleep(0.1)
+    assert len(sink.started) == 1
@@ -0,0 +1,40 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from sphere_particles import SphereParticles
+
+
+def test_theta_stays_wrapped_after_long_uptime():
+    particles = SphereParticles(500, seed=1)
+    particles.dtheta[:] = 0.4
+    particles.theta[:] = 6.2
+    for _ in range(3000):
+        particles.update(16, 0.0, 0.0, 100)
+    assert particles.theta.min() >= 0
+    assert particles.theta.max() < 2 * math.pi
+    # slow dots still move: a tiny step is not lost in float32 rounding
+    before = particles.theta.copy()
+    particles.dtheta[:] = 0.001
+    particles.update(16, 0.0, 0.0, 100)
+    assert np.all(particles.theta != before)
+
+
+def test_phi_bounces_off_the_poles():
+    particles = SphereParticles(200, seed=2)
+    for _ in range(2000):
+        particles.update(100, 0.3, 0.2, 100)
+    assert particles.phi.min() >= 0 and particles.phi.max() <= math.pi
+
+
+def test_projection_is_farthest_first_and_on_screen():
+    particles = SphereParticles(2000, seed=3)
+    particles.update(16, 0.4, 0.8, 200)
+    proj = particles.project(320, 240, 200, 200, 460, 640, 480)
+    assert len(proj) > 0
+    assert np.all(np.diff(proj.depth) >= 0)
+    assert proj.sx.min() >= 0 and proj.sx.max() < 640
+    assert proj.sy.min() >= 0 and proj.sy.max() < 480
+    assert proj.colors.shape == (len(proj), 3)
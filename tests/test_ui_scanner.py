@@ -0,0 +1,56 @@
+import pytest
+
+from ui_scanner import ElementIndex, ElementScanner, SyntheticNode, SyntheticProvider, TreeProvider
+
+
+def test_incomplete_provider_fails_at_construction():
+    class NoClick(TreeProvider):
+        def foreground(self):
+            return None
+
+        def root(self, hwnd):
+            return None
+
+        def children(self, node):
+            return []
+
+        def text(self, node):
+            return ""
+
+    with pytest.raises(TypeError):
+        NoClick()
+
+
+def test_scan_is_cached_until_invalidated():
+    provider = SyntheticProvider(depth=3, fanout=3)
+    scanner = ElementScanner(provider, fingerprint_interval=3600)
+    first = scanner.poll()
+    assert scanner.poll() is first
+    assert scanner.scans == 1 and scanner.cache_hits == 1
+    scanner.invalidate()
+    assert scanner.poll() is not first
+    assert scanner.scans == 2
+
+
+def test_walk_respects_element_budget():
+    provider = SyntheticProvider(depth=5, fanout=4)
+    result = ElementScanner(provider, max_elements=50).poll()
+    assert result.truncated
+    assert len(result.elements) <= 50
+
+
+def test_index_matches_longest_label():
+    save, save_as = SyntheticNode("Save"), SyntheticNode("Save As")
+    index = ElementIndex([("Save", save), ("Save As", save_as)])
+    assert index.match("click save as please") == ("Save As", save_as)
+    assert index.match("click save") == ("Save", save)
+    assert index.match("click saved") is None
+
+
+def test_click_text_uses_cached_handle():
+    provider = SyntheticProvider(depth=2, fanout=2)
+    target = SyntheticNode("Send")
+    provider.root(1).children.append(target)
+    scanner = ElementScanner(provider)
+    assert scanner.click_text("click send") == "Send"
+    assert provider.clicked is target
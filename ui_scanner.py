@@ -0,0 +1,421 @@
+"""
+Cached UI element scanner for the foreground window.
+
+The old scanner walked the whole UIA tree of the foreground app every 1.5 s
+and again for every in-app command. ElementScanner keeps one scan per
+(window handle, title) and walks the tree again only when:
+
+  - the foreground window or its title changes,
+  - a structure-changed event calls invalidate() (providers that can
+    subscribe to events do this themselves),
+  - the cheap fingerprint of the window's top-level children changes, or
+  - the cached scan is older than max_age.
+
+A walk is breadth-first and stops at max_depth or after max_elements
+nodes, so a huge document or web page cannot stall the assistant.
+
+The tree itself comes from a TreeProvider: UIAProvider talks to Windows
+through pywinauto, SyntheticProvider builds a fake tree so the scanner can
+be benchmarked anywhere.
+
+Each scan also gets an ElementIndex, so "click X" finds X by token lookup
+and clicks the element handle that was cached during the walk, instead of
+reconnecting to the app and letting pywinauto search the tree again.
+"""
+
+import random
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+
+# Optional: Windows UI Automation
+try:
+    import win32gui
+    from pywinauto import Desktop
+    UIA_AVAILABLE = True
+except Exception:
+    UIA_AVAILABLE = False
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+
+# -------------------- TREE PROVIDERS --------------------
+class TreeProvider(ABC):
+    """What ElementScanner needs from a UI tree.
+
+    A provider missing one of the abstract methods fails when it is
+    constructed, not halfway through a scan.
+    """
+
+    @abstractmethod
+    def foreground(self):
+        """(hwnd, title) of the foreground window, or None."""
+
+    @abstractmethod
+    def root(self, hwnd):
+        """Root node of the window's element tree."""
+
+    @abstractmethod
+    def children(self, node):
+        """Child nodes of node."""
+
+    @abstractmethod
+    def text(self, node):
+        """Name / visible text of node."""
+
+    @abstractmethod
+    def click(self, node):
+        """Activate node."""
+
+    def subscribe(self, hwnd, on_change):
+        """Call on_change() when the window's structure changes.
+
+        Returns an unsubscribe callable, or None if events are not supported
+        (the scanner then falls back to fingerprint checks).
+        """
+        return None
+
+
+class UIAProvider(TreeProvider):
+    """Foreground window tree through pywinauto's UIA backend."""
+
+    def foreground(self):
+        hwnd = win32gui.GetForegroundWindow()
+        if not hwnd:
+            return None
+        return hwnd, win32gui.GetWindowText(hwnd).lower()
+
+    def root(self, hwnd):
+        return Desktop(backend="uia").window(handle=hwnd).wrapper_object()
+
+    def children(self, node):
+        return node.children()
+
+    def text(self, node):
+        return node.window_text()
+
+    def click(self, node):
+        try:
+            node.click()          # Invoke pattern: no mouse movement
+        except Exception:
+            node.click_input()
+
+
+class SyntheticNode:
+    __slots__ = ("text", "children")
+
+    def __init__(self, text, children=()):
+        self.text = text
+        self.children = list(children)
+
+
+class SyntheticProvider(TreeProvider):
+    """Generated tree (fanout ** depth nodes) with an optional artificial per-node cost."""
+
+    def __init__(self, depth=6, fanout=5, seed=1, node_cost=0.0):
+        self.rng = random.Random(seed)
+        self.node_cost = node_cost       # seconds per children() call, to mimic COM round trips
+        self.windows = {}
+        self.current = None
+        self.calls = 0
+        self.add_window(1, "synthetic editor", depth, fanout)
+
+    def add_window(self, hwnd, title, depth, fanout):
+        counter = [0]
+
+        def build(level):
+            counter[0] += 1
+            label = f"item {counter[0]}" if self.rng.random() < 0.7 else ""
+            kids = [build(level + 1) for _ in range(fanout)] if level < depth else []
+            return SyntheticNode(label, kids)
+
+        self.windows[hwnd] = (title, build(0))
+        self.current = hwnd
+
+    def foreground(self):
+        if self.current is None:
+            return None
+        return self.current, self.windows[self.current][0]
+
+    def root(self, hwnd):
+        return self.windows[hwnd][1]
+
+    def children(self, node):
+        self.calls += 1
+        if self.node_cost:
+            time.sleep(self.node_cost)
+        return node.children
+
+    def text(self, node):
+        return node.text
+
+    def click(self, node):
+        self.clicked = node
+
+
+# -------------------- SCANNER --------------------
+class ElementIndex:
+    """Normalized element label (as a token tuple) -> first element with that label."""
+
+    def __init__(self, elements):
+        self._by_label = {}
+        self.max_tokens = 0
+        for text, node in elements:
+            tokens = tuple(tokenize(text))
+            if tokens and tokens not in self._by_label:
+                self._by_label[tokens] = (text, node)
+                self.max_tokens = max(self.max_tokens, len(tokens))
+
+    def match(self, command):
+        """(text, node) of the longest element label found in command, or None.
+
+        Every word span of the command (up to the longest label) is one dict
+        lookup, so the cost depends on the command length, not on how many
+        elements the window has. Labels match whole words; for equal-length
+        labels the earlier one in the command wins.
+        """
+        words = tokenize(command)
+        for n in range(min(self.max_tokens, len(words)), 0, -1):
+            for i in range(len(words) - n + 1):
+                hit = self._by_label.get(tuple(words[i:i + n]))
+                if hit is not None:
+                    return hit
+        return None
+
+
+class ScanResult:
+    def __init__(self, elements, truncated, fingerprint, scan_ms):
+        self.elements = elements          # [(text, node)] in breadth-first order
+        self.truncated = truncated        # element budget hit before the whole tree was seen
+        self.fingerprint = fingerprint
+        self.scan_ms = scan_ms
+        self.scanned_at = time.monotonic()
+        self.stale = False
+        self._index = None
+
+    @property
+    def index(self):
+        if self._index is None:
+            self._index = ElementIndex(self.elements)
+        return self._index
+
+    def texts(self):
+        return [text for text, _ in self.elements]
+
+
+class ElementScanner:
+    """Per-window cache of the foreground window's named UI elements."""
+
+    def __init__(self, provider, max_depth=12, max_elements=2000, max_age=30.0,
+                 fingerprint_interval=1.5, cache_windows=8):
+        self.provider = provider
+        self.max_depth = max_depth
+        self.max_elements = max_elements
+        self.max_age = max_age
+        self.fingerprint_interval = fingerprint_interval
+        self.cache_windows = cache_windows
+        self._cache = OrderedDict()       # (hwnd, title) -> ScanResult, most recent last
+        self._lock = threading.RLock()
+        self._current = None
+        self._last_fingerprint_check = 0.0
+        self._unsubscribe = None
+        self.scans = 0
+        self.scan_seconds = 0.0
+        self.cache_hits = 0
+        self.timings = {"scan": [], "match": [], "click": []}   # ms per click_text() step
+        self.last_timing = {}
+
+    # ---------- walking ----------
+    def _fingerprint(self, root):
+        p = self.provider
+        return tuple(p.text(child) for child in p.children(root))
+
+    def _walk(self, hwnd):
+        p = self.provider
+        start = time.perf_counter()
+        root = p.root(hwnd)
+        elements = []
+        visited = 0
+        truncated = False
+        queue = deque([(root, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            visited += 1
+            if visited > self.max_elements:
+                truncated = True
+                break
+            text = p.text(node)
+            if text:
+                elements.append((text, node))
+            if depth < self.max_depth:
+                for child in p.children(node):
+                    queue.append((child, depth + 1))
+        elapsed = time.perf_counter() - start
+        self.scans += 1
+        self.scan_seconds += elapsed
+        return ScanResult(elements, truncated, self._fingerprint(root), elapsed * 1000)
+
+    def _scan(self, key):
+        result = self._walk(key[0])
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_windows:
+            self._cache.popitem(last=False)
+        return result
+
+    # ---------- events ----------
+    def invalidate(self, hwnd=None):
+        """Mark cached scans stale (all, or one window's); the next poll/lookup re-walks."""
+        with self._lock:
+            for key, result in self._cache.items():
+                if hwnd is None or key[0] == hwnd:
+                    result.stale = True
+
+    def _follow(self, key):
+        if self._unsubscribe is not None:
+            try:
+                self._unsubscribe()
+            except Exception:
+                pass
+            self._unsubscribe = None
+        if key is not None:
+            self._unsubscribe = self.provider.subscribe(key[0], lambda: self.invalidate(key[0]))
+
+    # ---------- public ----------
+    def poll(self):
+        """Check the foreground window; re-walk only if something changed.
+
+        Returns the ScanResult for the foreground window (None if there is none).
+        """
+        with self._lock:
+            key = self.provider.foreground()
+            if key is None:
+                self._current = None
+                return None
+            if key != self._current:
+                self._current = key
+                self._follow(key)
+            result = self._cache.get(key)
+            now = time.monotonic()
+            if result is None or result.stale or now - result.scanned_at > self.max_age:
+                return self._scan(key)
+            self._cache.move_to_end(key)
+            if self._unsubscribe is None and now - self._last_fingerprint_check >= self.fingerprint_interval:
+                self._last_fingerprint_check = now
+                if self._fingerprint(self.provider.root(key[0])) != result.fingerprint:
+                    return self._scan(key)
+            self.cache_hits += 1
+            return result
+
+    def elements(self):
+        """Named elements of the foreground window as [(text, node)], from cache when possible."""
+        result = self.poll()
+        return result.elements if result is not None else []
+
+    def texts(self):
+        result = self.poll()
+        return result.texts() if result is not None else []
+
+    def click_text(self, command):
+        """Click the element whose label appears in command; returns the label or None.
+
+        Uses the element handle cached by the last walk. If that handle has
+        gone stale the window is re-walked once and the click retried.
+        """
+        timing = {}
+        start = time.perf_counter()
+        result = self.poll()
+        timing["scan"] = (time.perf_counter() - start) * 1000
+        hit = None
+        if result is not None:
+            start = time.perf_counter()
+            hit = result.index.match(command)
+            timing["match"] = (time.perf_counter() - start) * 1000
+        if hit is not None:
+            label, node = hit
+            start = time.perf_counter()
+            try:
+                self.provider.click(node)
+            except Exception:
+                self.invalidate()
+                result = self.poll()
+                hit = result.index.match(command) if result is not None else None
+                if hit is None:
+                    raise
+                label, node = hit
+                self.provider.click(node)
+            timing["click"] = (time.perf_counter() - start) * 1000
+            self.invalidate(self._current[0] if self._current else None)  # the click probably changed the window
+        for step, ms in timing.items():
+            self.timings[step].append(ms)
+        self.last_timing = timing
+        return hit[0] if hit is not None else None
+
+    @property
+    def active_title(self):
+        return self._current[1] if self._current else None
+
+    def stats(self):
+        avg_ms = self.scan_seconds / self.scans * 1000 if self.scans else 0.0
+        stats = {"scans": self.scans, "cache_hits": self.cache_hits,
+                 "avg_scan_ms": round(avg_ms, 2), "windows_cached": len(self._cache)}
+        for step, samples in self.timings.items():
+            if samples:
+                stats[f"{step}_ms_avg"] = round(sum(samples) / len(samples), 2)
+        return stats
+
+
+# -------------------- BENCHMARK --------------------
+def benchmark(depth=6, fanout=5, node_cost=0.00002, polls=20):
+    provider = SyntheticProvider(depth=depth, fanout=fanout, node_cost=node_cost)
+    unbounded = ElementScanner(provider, max_depth=depth, max_elements=10 ** 9)
+
+    start = time.perf_counter()
+    for _ in range(polls):
+        unbounded._walk(1)
+    full_ms = (time.perf_counter() - start) / polls * 1000
+    total = len(unbounded._walk(1).elements)
+
+    scanner = ElementScanner(provider)
+    scanner.poll()
+    start = time.perf_counter()
+    for _ in range(polls):
+        scanner.poll()
+    cached_ms = (time.perf_counter() - start) / polls * 1000
+
+    budget = ElementScanner(provider, max_elements=1000)
+    budget_result = budget.poll()
+
+    print(f"tree: depth {depth}, fanout {fanout}, {total} named elements")
+    print(f"full walk (old behaviour) : {full_ms:8.2f} ms per scan")
+    print(f"cached poll (no change)   : {cached_ms:8.3f} ms per poll")
+    print(f"budgeted walk (1000 nodes): {budget_result.scan_ms:8.2f} ms, truncated={budget_result.truncated}")
+
+    # "click X": old per-command substring loop vs the token index
+    texts = scanner.texts()
+    commands = [f"click on {texts[i]} please" for i in range(0, len(texts), max(1, len(texts) // 50))]
+    start = time.perf_counter()
+    for command in commands:
+        for el in texts:
+            if el and el.lower() in command:
+                break
+    loop_us = (time.perf_counter() - start) / len(commands) * 1e6
+    result = scanner.poll()
+    result.index
+    start = time.perf_counter()
+    for command in commands:
+        result.index.match(command)
+    index_us = (time.perf_counter() - start) / len(commands) * 1e6
+    print(f"click match, linear loop  : {loop_us:8.1f} us")
+    print(f"click match, token index  : {index_us:8.1f} us")
+    print("scanner stats             :", scanner.stats())
+
+
+if __name__ == "__main__":
+    benchmark()